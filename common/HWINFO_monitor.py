@@ -10,8 +10,7 @@ import time
 from typing import List, Dict, Callable
 from dataclasses import dataclass
 
-from matplotlib import rcParams
-
+from common.precision_timer import Ticker
 from uitls.HWinfo_reader import HWiNFOReader, SensorReadingType, HWiNFOReadingElement
 
 # 常量定义
@@ -126,6 +125,7 @@ class HWiNFOMonitor:
                 raise ValueError("未找到指定的标签")
 
             self._running = True
+            ticker = Ticker(self.interval)
 
             while self._running:
                 try:
@@ -135,7 +135,7 @@ class HWiNFOMonitor:
                     # for callback in self._callbacks:
                     #     callback(readings)
 
-                    time.sleep(self.interval)
+                    ticker.wait()
 
                 except Exception as e:
                     print(f"读取数据时出错: {e}")
@@ -6,86 +6,243 @@
 @Desc    : 显示器刷新率监控模块
 """
 
+import ctypes
+import os
+import sys
+import threading
 import time
 import numpy as np
-import matplotlib.pyplot as plt
-from ctypes import windll
 from typing import Dict
 from datetime import datetime
 from common.logger import create_logger,Logger
+from common import plotting
+from common.frame_stats import FrameTimeStats
+from common import frame_analysis
+from common.vsync_source import VsyncSource, DwmVsyncSource
+from common import frame_trace
+
+# 时间戳缓冲区初始容量：144Hz下约1分钟
+FRAME_BUFFER_CHUNK = 144 * 60
+
+# 帧时间戳记录文件的默认目录
+FRAME_TRACE_DIR = "traces"
+
+# 丢帧点结构化数组的字段
+DROP_POINT_DTYPE = np.dtype([
+    ('index', np.int64),           # 帧间隔序号
+    ('timestamp', np.float64),     # 间隔起始时间戳（毫秒）
+    ('interval', np.float64),      # 帧间隔（毫秒）
+    ('dropped_frames', np.int64),  # 该间隔内丢失的帧数
+])
+
+# Windows线程优先级
+THREAD_PRIORITY_TIME_CRITICAL = 15
+
+
+def raise_thread_priority():
+    """提高当前线程的调度优先级，失败时忽略"""
+    try:
+        if sys.platform == 'win32':
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetThreadPriority(kernel32.GetCurrentThread(), THREAD_PRIORITY_TIME_CRITICAL)
+        else:
+            # Linux下线程有独立的nice值，需要CAP_SYS_NICE
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), -10)
+    except (OSError, AttributeError):
+        pass
 
 
 class RefreshRateMonitor:
-    def __init__(self, logger: Logger, show_plot=True):
+    def __init__(self, logger: Logger, show_plot=True, keep_timestamps: bool = True,
+                 target_fps: float = None, source: VsyncSource = None):
         """
         初始化刷新率监控器
         :param show_plot: 是否显示图表
+        :param keep_timestamps: 是否保留全部帧时间戳；长时间运行时可关闭，只保留在线统计
+        :param target_fps: 在线统计的目标帧率，不指定时由预热阶段的帧间隔中位数确定
+        :param source: 垂直同步信号源，默认为Windows DWM；可使用模拟源或回放源在其他平台上运行
         """
         self.show_plot = show_plot
-        self.timestamps = []
+        self.keep_timestamps = keep_timestamps
+        # 在线帧时间统计，内存占用固定，采集过程中可随时读取
+        self.frame_stats = FrameTimeStats(target_frame_time=1000.0 / target_fps if target_fps else None)
+        self._last_timestamp = None
+        # 预分配的int64时间戳缓冲区（perf_counter_ns），容量不足时成倍扩容
+        self._buffer = np.empty(FRAME_BUFFER_CHUNK, dtype=np.int64)
+        self._count = 0
+        # 加载的帧记录文件，分析直接使用其内存映射的帧间隔，需要时才还原绝对时间戳
+        self._trace = None
+        # 墙上时间与perf_counter_ns的对应关系，用于把帧时间戳换算成墙上时间
+        self._wall_anchor = (time.time_ns(), time.perf_counter_ns())
         self.intervals = []
-        self.dwm = windll.dwmapi
+        self.source = source if source is not None else DwmVsyncSource()
         self.is_monitoring = False
+        self.capture_thread = None
+        self._stop_event = threading.Event()
 
         # 初始化日志器
         self.logger = logger
 
-        # 设置matplotlib中文字体
-        if show_plot:
-            plt.rcParams['font.sans-serif'] = ['Microsoft YaHei']
-            plt.rcParams['axes.unicode_minus'] = False
-    
-    def record_frame(self):
-        """记录一帧"""
-        self.dwm.DwmFlush()  # 等待垂直同步
-        self.timestamps.append(time.perf_counter_ns())
+    @property
+    def timestamps(self) -> np.ndarray:
+        """
+        已记录的帧时间戳（纳秒），缓冲区的零拷贝视图
+        加载的帧记录在第一次访问时还原一次时间戳（一次累加），各项分析不依赖该属性
+        """
+        if self._trace is not None and self._count != len(self._trace):
+            self._buffer = self._trace.timestamps
+            self._count = len(self._trace)
+        return self._buffer[:self._count]
+
+    @property
+    def frame_count(self) -> int:
+        """已记录或已加载的帧数"""
+        return len(self._trace) if self._trace is not None else self._count
+
+    def _timestamps_at(self, index: np.ndarray) -> np.ndarray:
+        """
+        指定帧的时间戳（纳秒）
+        :param index: 升序的帧序号
+        加载的帧记录按相邻序号之间分段求和，不还原全部时间戳
+        """
+        if self._trace is None:
+            return self.timestamps[index]
+        index = np.asarray(index, dtype=np.int64)
+        if not len(index):
+            return np.zeros(0, dtype=np.int64)
+        # reduceat的分段起点必须严格递增，第0帧的偏移为0
+        bounds = np.concatenate(([0], index[index > 0]))
+        pieces = np.add.reduceat(self._trace.deltas, bounds, dtype=np.int64)
+        offsets = np.concatenate(([0], np.cumsum(pieces[:-1])))
+        if index[0] > 0:
+            offsets = offsets[1:]
+        return self._trace.first_ns + offsets
+
+    def _grow(self):
+        """缓冲区扩容，按块成倍增长，摊还后每帧为常数开销"""
+        buffer = np.empty(max(len(self._buffer) * 2, FRAME_BUFFER_CHUNK), dtype=np.int64)
+        buffer[:self._count] = self._buffer[:self._count]
+        self._buffer = buffer
+
+    def reset(self):
+        """清空已记录的帧，保留已分配的缓冲区"""
+        self._count = 0
+        self._trace = None
+        self.intervals = []
+        self._last_timestamp = None
+        self.frame_stats.reset()
+        self._wall_anchor = (time.time_ns(), time.perf_counter_ns())
+
+    def start_wall_time(self) -> int:
+        """第一帧对应的墙上时间（time.time_ns），没有记录时返回0"""
+        if self.frame_count == 0:
+            return 0
+        first_ns = self._trace.first_ns if self._trace is not None else int(self.timestamps[0])
+        wall_ns, perf_ns = self._wall_anchor
+        return wall_ns + first_ns - perf_ns
+
+    def save_trace(self, path: str = None) -> str:
+        """
+        把帧时间戳保存为二进制记录文件（差分编码），进程退出后可离线重新分析
+        :param path: 文件路径，不指定时保存到 traces/fps_时间.ftrace
+        :return: 文件路径
+        """
+        if path is None:
+            name = f"fps_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}{frame_trace.TRACE_SUFFIX}"
+            path = os.path.join(FRAME_TRACE_DIR, name)
+        frame_trace.save_trace(path, self.timestamps, start_wall_ns=self.start_wall_time(),
+                               source=self.source.name, refresh_hint=self.source.refresh_hint)
+        self.logger.info(f"帧记录已保存: {path}")
+        return path
+
+    def load_trace(self, path: str) -> frame_trace.FrameTrace:
+        """
+        加载帧时间戳记录文件，之后可直接调用各项分析
+        分析直接使用内存映射的帧间隔，不还原绝对时间戳
+        :param path: 文件路径
+        :return: 记录对象，帧间隔为内存映射视图
+        """
+        trace = frame_trace.load_trace(path)
+        self.reset()
+        self._trace = trace
+        if trace.start_wall_ns and len(trace):
+            self._wall_anchor = (trace.start_wall_ns, trace.first_ns)
+        return trace
 
-    def analyze_frame_drops(self, target_fps: float = None) -> Dict:
+    def record_frame(self) -> bool:
+        """
+        记录一帧
+        :return: 信号源已结束（模拟或回放完毕）时返回False
+        """
+        timestamp = self.source.wait()  # 等待垂直同步
+        if timestamp is None:
+            return False
+        if self._last_timestamp is not None:
+            self.frame_stats.update((timestamp - self._last_timestamp) / 1_000_000)
+        self._last_timestamp = timestamp
+        if not self.keep_timestamps:
+            return True
+        if self._count == len(self._buffer):
+            self._grow()
+        self._buffer[self._count] = timestamp
+        self._count += 1
+        return True
+
+    def frame_intervals(self) -> np.ndarray:
+        """帧间隔（毫秒），只做一次差分；加载的帧记录直接由内存映射的帧间隔换算"""
+        if self._trace is not None:
+            return self._trace.intervals
+        return np.diff(self.timestamps) / 1_000_000
+
+    def live_stats(self) -> Dict:
+        """
+        在线帧时间统计快照，采集过程中可随时调用
+        :return: 平均帧时间、标准差、1%/0.1% Low帧率、最长帧、丢帧数等
+        """
+        return self.frame_stats.snapshot()
+
+    def analyze_frame_drops(self, target_fps: float = None, intervals: np.ndarray = None) -> Dict:
         """
         分析丢帧情况
         :param target_fps: 目标帧率，如果不指定则使用平均刷新率
-        :return: 分析结果字典
+        :param intervals: 已计算好的帧间隔（毫秒），不指定时由时间戳计算
+        :return: 分析结果字典，drop_points为结构化数组（字段见DROP_POINT_DTYPE）
         """
-        if len(self.timestamps) < 2:
+        if self.frame_count < 2:
             return {
                 'max_drops': 0,
                 'max_drop_time': 0,
                 'max_drop_index': 0,
                 'total_drops': 0,
-                'drop_points': []
+                'drop_points': np.empty(0, dtype=DROP_POINT_DTYPE)
             }
-        
+
+        # 计算帧间隔（毫秒），整个分析过程只差分一次
+        if intervals is None:
+            intervals = self.frame_intervals()
+
         # 如果没有指定目标帧率，使用平均刷新率
         if target_fps is None:
-            intervals = np.diff(self.timestamps) / 1_000_000  # 转换为毫秒
-            avg_interval = np.mean(intervals)
-            target_fps = 1000 / avg_interval
-        
+            target_fps = 1000 / np.mean(intervals)
+
         target_frame_time = 1000.0 / target_fps  # 目标帧时间(ms)
-        
-        # 计算帧间隔（毫秒）
-        intervals = np.diff(self.timestamps) / 1_000_000
-        
-        # 计算每个间隔丢失的帧数
-        dropped_frames = np.floor(intervals / target_frame_time) - 1
-        dropped_frames = np.maximum(dropped_frames, 0)  # 小于0的设为0
-        
+
+        # 计算每个间隔丢失的帧数，小于0的设为0
+        dropped_frames = np.maximum(np.floor(intervals / target_frame_time) - 1, 0)
+
         # 找出最大丢帧数及其位置
-        max_drops = int(np.max(dropped_frames))
         max_drop_index = int(np.argmax(dropped_frames))
+        max_drops = int(dropped_frames[max_drop_index])
         max_drop_time = intervals[max_drop_index]
-        
+
         # 统计丢帧点（丢帧数大于0的位置）
-        drop_points = []
-        for i, drops in enumerate(dropped_frames):
-            if drops > 0:
-                drop_points.append({
-                    'index': i,
-                    'timestamp': self.timestamps[i] / 1_000_000,  # 转换为毫秒
-                    'interval': intervals[i],
-                    'dropped_frames': int(drops)
-                })
-        
+        drop_index = np.flatnonzero(dropped_frames)
+        drop_points = np.empty(len(drop_index), dtype=DROP_POINT_DTYPE)
+        drop_points['index'] = drop_index
+        drop_points['timestamp'] = self._timestamps_at(drop_index) / 1_000_000  # 转换为毫秒
+        drop_points['interval'] = intervals[drop_index]
+        drop_points['dropped_frames'] = dropped_frames[drop_index]
+
         # 计算总丢帧数
         total_drops = int(np.sum(dropped_frames))
 
@@ -99,22 +256,57 @@ class RefreshRateMonitor:
             'target_frame_time': target_frame_time
         }
 
+    def pacing_analysis(self, window: int = frame_analysis.PACING_WINDOW, intervals: np.ndarray = None) -> Dict:
+        """
+        帧节奏分析（滑动窗口方差、相邻帧时间差分位数、卡顿指数、最差窗口）
+        :param window: 滑动窗口帧数
+        :param intervals: 已计算好的帧间隔（毫秒），不指定时由时间戳计算
+        """
+        if intervals is None:
+            intervals = self.frame_intervals()
+        return frame_analysis.frame_pacing_metrics(intervals, window=window)
+
+    def segment_analysis(self, window: int = frame_analysis.SEGMENT_WINDOW,
+                         tolerance: float = frame_analysis.SEGMENT_TOLERANCE,
+                         intervals: np.ndarray = None) -> Dict:
+        """
+        按刷新率区间分段分析丢帧（60/144Hz切换、VRR、电池模式降频），每段使用各自的目标帧时间
+        :param window: 滑动中位数窗口帧数
+        :param tolerance: 刷新率切换判定的相对变化阈值
+        :param intervals: 已计算好的帧间隔（毫秒），不指定时由时间戳计算
+        :return: 分段结果，包含各段起始位置、目标刷新率、是否VRR和丢帧数
+        """
+        if intervals is None:
+            intervals = self.frame_intervals()
+        return frame_analysis.segment_refresh_rate(intervals, window=window, tolerance=tolerance)
+
+    def spectral_analysis(self, top: int = 5, intervals: np.ndarray = None) -> Dict:
+        """
+        帧间隔频谱分析，找出周期性卡顿并与各监听器的采样间隔（config.MONITOR_SAMPLING_INTERVALS）比对
+        :param top: 最多报告的周期分量个数
+        :param intervals: 已计算好的帧间隔（毫秒），不指定时由时间戳计算
+        """
+        if intervals is None:
+            intervals = self.frame_intervals()
+        return frame_analysis.interval_spectrum(intervals, top=top)
+
     def results_analysis(self, target_fps: float = None):
         """
         格式化丢帧分析结果
         :return: dict 包含分析结果的字典
         """
-        if len(self.timestamps) < 2:
-            return None
+        if self.frame_count < 2:
+            # 未保留时间戳时只输出在线统计
+            return self.stream_results_analysis()
             
         # 计算时间间隔（转换为毫秒）
-        self.intervals = np.diff(self.timestamps) / 1_000_000
+        self.intervals = self.frame_intervals()
         
         # 基本统计
         avg_interval = np.mean(self.intervals)  # 平均帧时间
         refresh_rate = 1000 / avg_interval  # 平均刷新率
         std_dev = np.std(self.intervals)  # 标准差
-        total_time = (self.timestamps[-1] - self.timestamps[0]) / 1_000_000
+        total_time = float(np.sum(self.intervals))
         actual_duration = total_time / 1000  # 转换为秒
         
         results = {
@@ -128,8 +320,20 @@ class RefreshRateMonitor:
             'actual_fps': len(self.intervals) / actual_duration  # 实际帧率
         }
 
+        # 在线统计给出的1%/0.1% Low帧率
+        results['streaming'] = self.live_stats()
+
+        # 帧节奏分析
+        results['pacing'] = self.pacing_analysis(intervals=self.intervals)
+
+        # 刷新率分段分析
+        results['segments'] = self.segment_analysis(intervals=self.intervals)
+
+        # 周期性卡顿分析
+        results['spectrum'] = self.spectral_analysis(intervals=self.intervals)
+
         # 添加丢帧分析结果
-        drop_results = self.analyze_frame_drops(target_fps=target_fps)
+        drop_results = self.analyze_frame_drops(target_fps=target_fps, intervals=self.intervals)
         results['frame_drops'] = drop_results
 
         output = [
@@ -138,9 +342,35 @@ class RefreshRateMonitor:
             f"最大丢帧数: {results['frame_drops']['max_drops']} 帧",
             f"最大丢帧时间: {results['frame_drops']['max_drop_time']:.2f} ms",
             f"总丢帧数: {results['frame_drops']['total_drops']} 帧",
-            f"\n丢帧点详情:"
         ]
 
+        segments = results['segments']['segments']
+        if len(segments) > 1:
+            # 刷新率发生过切换，单一目标帧率的丢帧统计不可靠，按段输出
+            output.append(f"\n刷新率分段: {len(segments)} 段, 分段总丢帧数: {results['segments']['total_drops']} 帧")
+            for segment in segments:
+                output.append(
+                    f"  第{segment['start']}-{segment['end']}帧, "
+                    f"起始: {segment['start_time']:.2f} ms, "
+                    f"刷新率: {segment['refresh_rate']:.2f} Hz{' (VRR)' if segment['vrr'] else ''}, "
+                    f"丢帧: {segment['total_drops']} 帧"
+                )
+
+        components = results['spectrum']['components']
+        if components:
+            output.append(f"\n周期性帧时间波动:")
+            for component in components:
+                monitors = ", ".join(
+                    f"{match['monitor']}({match['interval']}s)" + (f"×{match['harmonic']}" if match['harmonic'] > 1 else "")
+                    for match in component['monitors']
+                )
+                output.append(
+                    f"  频率: {component['frequency']:.3f} Hz (周期 {component['period']:.3f} s), "
+                    f"幅度: {component['amplitude']:.3f} ms, 信噪比: {component['snr']:.1f}"
+                    + (f", 疑似监听器采样: {monitors}" if monitors else "")
+                )
+
+        output.append(f"\n丢帧点详情:")
         for point in results['frame_drops']['drop_points']:
             output.append(
                 f"  位置: {point['index']}, "
@@ -158,54 +388,141 @@ class RefreshRateMonitor:
             f"\n采样数量: {results['sample_count']}"
             f"\n实际帧率: {results['actual_fps']:.2f} FPS"
         )
+        pacing = results['pacing']
+        if pacing:
+            worst = pacing['worst_window']
+            info += (
+                f"\n相邻帧时间差 P50/P95/P99: {pacing['delta_p50']:.3f} / {pacing['delta_p95']:.3f} / "
+                f"{pacing['delta_p99']:.3f} ms"
+                f"\n卡顿指数: {pacing['stutter_index']:.4f} (卡顿次数: {pacing['stutter_frames']})"
+                f"\n最差窗口: 第{worst['start']}-{worst['end']}帧, 起始 {worst['start_time']:.2f} ms, "
+                f"标准差 {worst['std']:.3f} ms"
+            )
+        if results['streaming'].get('low_1_fps'):
+            info += (
+                f"\n1% Low: {results['streaming']['low_1_fps']:.2f} FPS"
+                f"\n0.1% Low: {results['streaming']['low_01_fps']:.2f} FPS"
+            )
         self.logger.info(info)
         self.logger.info("\n".join(output))
         print(info)
         print("\n".join(output))
-        
-    def plot_results(self):
-        """绘制分析图表"""
-        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 8))
-        
-        # 帧时间分布直方图
-        ax1.hist(self.intervals, bins=50, alpha=0.75, color='blue')
-        ax1.set_title('帧时间分布', fontsize=12)
-        ax1.set_xlabel('帧时间 (ms)', fontsize=10)
-        ax1.set_ylabel('频次', fontsize=10)
-        ax1.grid(True, alpha=0.3)
-        
-        # 帧时间随时间变化图
-        time_points = np.cumsum(self.intervals)
-        ax2.plot(time_points, self.intervals, 'g-', alpha=0.5)
-        ax2.set_title('帧时间随时间变化', fontsize=12)
-        ax2.set_xlabel('累计时间 (ms)', fontsize=10)
-        ax2.set_ylabel('帧时间 (ms)', fontsize=10)
-        ax2.grid(True, alpha=0.3)
-        
-        plt.tight_layout()
-        plt.show()
+        return results
+
+    def stream_results_analysis(self):
+        """
+        输出在线帧时间统计结果，不依赖保留的时间戳
+        :return: 在线统计快照，没有数据时返回None
+        """
+        stats = self.live_stats()
+        if not stats['sample_count']:
+            return None
+        info = (
+            f"\n===========FPS在线统计结果============="
+            f"\n采样数量: {stats['sample_count']}"
+            f"\n平均帧率: {stats['avg_fps']:.2f} FPS"
+            f"\n平均帧时间: {stats['frame_time']:.3f} ms"
+            f"\n标准差: {stats['std_dev']:.3f} ms"
+            f"\n1% Low: {stats['low_1_fps']:.2f} FPS"
+            f"\n0.1% Low: {stats['low_01_fps']:.2f} FPS"
+            f"\n最长帧: {stats['max_frame_time']:.2f} ms (位置: {stats['max_frame_index']})"
+        )
+        if stats['target_frame_time'] is not None:
+            info += (
+                f"\n目标帧时间: {stats['target_frame_time']:.2f} ms"
+                f"\n总丢帧数: {stats['total_drops']} 帧 (丢帧次数: {stats['drop_events']})"
+            )
+        self.logger.info(info)
+        print(info)
+        return stats
+
+    def plot_results(self, save_path: str = None, background: bool = True):
+        """
+        绘制分析图表，帧时间曲线按像素列做最小/最大值包络降采样，保留所有尖峰
+        :param save_path: 保存路径，不指定时弹窗显示
+        :param background: 保存文件时是否在后台进程渲染
+        :return: 后台渲染时返回渲染进程，可调用 join() 等待完成
+        """
+        if len(self.intervals) == 0:
+            if self.frame_count < 2:
+                return None
+            self.intervals = self.frame_intervals()
+        intervals = np.asarray(self.intervals)
+        time_points = np.cumsum(intervals)
+
+        panels = [
+            # 帧时间分布直方图
+            {'pos': (0, 0), 'title': '帧时间分布', 'xlabel': '帧时间 (ms)', 'ylabel': '频次', 'grid': True,
+             'series': [plotting.histogram(intervals, bins=50, alpha=0.75, color='blue')]},
+            # 帧时间随时间变化图
+            {'pos': (1, 0), 'title': '帧时间随时间变化', 'xlabel': '累计时间 (ms)', 'ylabel': '帧时间 (ms)', 'grid': True,
+             'series': [plotting.line(time_points, intervals, color='green', alpha=0.5)]},
+        ]
+        spec = plotting.panels_of(panels, layout=(2, 1), figsize=(12, 8))
+
+        if save_path and background:
+            return plotting.render_in_background(spec, save_path)
+        plotting.render(spec, save_path)
+        return None
+
+    def _capture_loop(self):
+        """采集线程：以较高优先级持续等待垂直同步并记录时间戳"""
+        raise_thread_priority()
+        while not self._stop_event.is_set():
+            try:
+                if not self.record_frame():
+                    break
+            except Exception as e:
+                self.logger.error(f"读取数据时出错: {e}")
+                break
+        self.is_monitoring = False
 
     def start_monitoring(self):
-        """开始监控"""
+        """开始监控，在后台线程中采集，立即返回"""
+        if self.is_monitoring:
+            return
+        self.reset()
         try:
-            print("FPS监听已启动")
-            self.is_monitoring = True
-            while self.is_monitoring:
-                try:
-                    self.record_frame()
-                except Exception as e:
-                    print(f"读取数据时出错: {e}")
-        except Exception as e:
-            print(f"监听器启动失败: {e}")
-        finally:
-            self.stop_monitoring()
-
-    def stop_monitoring(self):
-        """停止监听"""
-        self.is_monitoring = False
+            self.source.open()
+        except OSError as e:
+            self.logger.error(f"垂直同步信号源不可用: {e}")
+            return
+        self._stop_event.clear()
+        self.is_monitoring = True
+        self.capture_thread = threading.Thread(target=self._capture_loop, name="FrameCapture", daemon=True)
+        self.capture_thread.start()
+        self.logger.info("FPS监听已启动")
+
+    def stop_monitoring(self) -> np.ndarray:
+        """
+        停止监听
+        :return: 帧时间戳（纳秒）的零拷贝视图
+        """
+        self._stop_event.set()
+        if self.capture_thread and self.capture_thread is not threading.current_thread():
+            self.capture_thread.join()
+        self.capture_thread = None
         self.is_monitoring = False
+        self.source.close()
         self.logger.info("FPS监听已停止")
+        return self.timestamps
 
+    def capture(self, frames: int = None) -> np.ndarray:
+        """
+        在当前线程中同步采集，直到信号源结束或达到指定帧数
+        配合模拟源或回放源使用时不等待真实时间，可远快于实时地产生数据
+        :param frames: 最多采集的帧数，不指定时采集到信号源结束
+        :return: 帧时间戳（纳秒）的零拷贝视图
+        """
+        self.reset()
+        self.source.open()
+        recorded = 0
+        while frames is None or recorded < frames:
+            if not self.record_frame():
+                break
+            recorded += 1
+        self.source.close()
+        return self.timestamps
 
 # 监控Win+D操作的示例
 def monitor_win_d_operation():
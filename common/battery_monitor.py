@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : battery_monitor.py
+@Time    : 2025/03/26
+@Author  : Bruce.Si
+@Desc    : 电池放电功耗估算（笔记本整机功耗）
+    - Linux下读取 /sys/class/power_supply/BAT*/energy_now、power_now（或charge_now/current_now × voltage_now）
+    - 其他平台通过 psutil.sensors_battery() 的电量百分比 × 电池容量估算剩余能量
+    - 电池读数更新很粗（数秒到数十秒一次），以读数发生变化的时刻为观测点，相邻观测点的能量差得到放电功率
+    - 负载变点用双侧CUSUM检测：累计观测相对当前负载段均值的偏差（减去漂移量），超过阈值时判定负载变化，
+      变点取累计和最后一次为0之后的第一个观测；单个离群观测只会短暂抬高累计和，不会误判
+    - 同一负载段内放电功率做指数平滑；检测到变点后以变点之后的观测均值重新开始，避免平滑带来的滞后
+    - 与其他功耗提供者共用PowerMonitor的采样时间戳，同一次运行可同时得到整机功耗和package功耗
+"""
+
+import glob
+import os
+from typing import Dict, List, Optional, Tuple
+
+import psutil
+
+from common.metric_provider import MetricProvider
+
+POWER_SUPPLY_ROOT = "/sys/class/power_supply"
+
+
+class BatteryPowerProvider(MetricProvider):
+    """电池放电功耗估算"""
+    name = "battery"
+
+    def __init__(self, root: str = POWER_SUPPLY_ROOT, capacity_wh: Optional[float] = None,
+                 smoothing: float = 0.3, cusum_drift: float = 0.1, cusum_threshold: float = 0.5):
+        """
+        Args:
+            root: power_supply目录，可以指向伪造的sysfs目录用于测试
+            capacity_wh: 电池满电容量（瓦时），仅在没有sysfs能量读数、需要用电量百分比估算时使用
+            smoothing: 同一负载段内的指数平滑系数，越大越跟随新观测
+            cusum_drift: CUSUM每个观测扣除的相对偏差，小于该值的持续偏差视为噪声（约为待检测变化幅度的一半）
+            cusum_threshold: CUSUM判定阈值（相对偏差的累计和），越大误判越少、检测越慢；
+                默认值下功率变化超过60%时一个观测即可检测，变化20%约需5个观测
+        """
+        self.root = root
+        self.capacity_wh = capacity_wh
+        self.smoothing = smoothing
+        self.cusum_drift = cusum_drift
+        self.cusum_threshold = cusum_threshold
+        self.available = False
+        self.source = None  # 'sysfs' 或 'psutil'
+        self.reading_updates: List[int] = []  # 电池读数发生变化的时间戳（纳秒）
+        self.change_points: List[int] = []    # 检测到的负载变点（纳秒）
+        self._fds: List[Dict[str, int]] = []
+        self._reset_state()
+
+    def _reset_state(self):
+        self._last_energy = None     # 上一个观测点的能量（瓦时）
+        self._last_change_ts = None  # 上一个观测点的时间戳
+        self._last_power_now = None
+        self._estimate = None        # 平滑后的放电功率（瓦）
+        self._start_segment([])
+        self.reading_updates = []
+        self.change_points = []
+
+    def _start_segment(self, observations: List[Tuple[int, float]]):
+        """以给定的观测 [(时间戳, 功率)] 开始新的负载段，清空CUSUM累计和"""
+        self._segment_sum = sum(power for _, power in observations)
+        self._segment_count = len(observations)
+        self._cusum_up = 0.0
+        self._cusum_down = 0.0
+        # 各侧累计和最后一次为0之后的观测，判定变点时作为新负载段的起点
+        self._pending_up: List[Tuple[int, float]] = []
+        self._pending_down: List[Tuple[int, float]] = []
+        # 累计和未回到0之前的观测不计入负载段均值，避免持续的偏移被均值吸收
+        self._unsettled: List[float] = []
+
+    def _open_sysfs(self) -> bool:
+        """打开所有电池的sysfs属性文件"""
+        for path in sorted(glob.glob(os.path.join(self.root, "*"))):
+            try:
+                with open(os.path.join(path, "type"), 'r') as f:
+                    if f.read().strip() != "Battery":
+                        continue
+            except OSError:
+                continue
+            fds = {}
+            for attr in ("energy_now", "charge_now", "voltage_now", "power_now", "current_now", "status"):
+                attr_path = os.path.join(path, attr)
+                if os.path.exists(attr_path):
+                    try:
+                        fds[attr] = os.open(attr_path, os.O_RDONLY)
+                    except OSError:
+                        pass
+            if "energy_now" in fds or ("charge_now" in fds and "voltage_now" in fds):
+                self._fds.append(fds)
+            else:
+                for fd in fds.values():
+                    os.close(fd)
+        return bool(self._fds)
+
+    def open(self):
+        if self.available:
+            return
+        self._reset_state()
+        if self._open_sysfs():
+            self.source = 'sysfs'
+            self.available = True
+        elif self.capacity_wh and psutil.sensors_battery() is not None:
+            self.source = 'psutil'
+            self.available = True
+
+    @staticmethod
+    def _pread(fd: int) -> str:
+        return os.pread(fd, 64, 0).decode().strip()
+
+    def _read_sysfs(self):
+        """读取所有电池，返回 (能量瓦时, 瞬时功率瓦或None, 是否放电)"""
+        energy = 0.0
+        power = 0.0
+        has_power = False
+        discharging = False
+        for fds in self._fds:
+            voltage = int(self._pread(fds["voltage_now"])) / 1e6 if "voltage_now" in fds else None
+            if "energy_now" in fds:
+                energy += int(self._pread(fds["energy_now"])) / 1e6
+            else:
+                energy += int(self._pread(fds["charge_now"])) / 1e6 * voltage
+            if "power_now" in fds:
+                power += abs(int(self._pread(fds["power_now"]))) / 1e6
+                has_power = True
+            elif "current_now" in fds and voltage is not None:
+                power += abs(int(self._pread(fds["current_now"]))) / 1e6 * voltage
+                has_power = True
+            if "status" in fds:
+                discharging = discharging or self._pread(fds["status"]) == "Discharging"
+        return energy, (power if has_power else None), discharging
+
+    def _read_psutil(self):
+        battery = psutil.sensors_battery()
+        if battery is None:
+            return None, None, False
+        return battery.percent / 100 * self.capacity_wh, None, not battery.power_plugged
+
+    def _observe(self, timestamp_ns: int, power: float):
+        """输入一个新的放电功率观测，更新CUSUM；检测到负载变点时切换到新负载段，否则做平滑"""
+        if self._estimate is None:
+            self._estimate = power
+            self._start_segment([(timestamp_ns, power)])
+            return
+        reference = self._segment_sum / self._segment_count
+        deviation = (power - reference) / max(reference, 1e-6)
+        self._cusum_up = max(0.0, self._cusum_up + deviation - self.cusum_drift)
+        self._cusum_down = max(0.0, self._cusum_down - deviation - self.cusum_drift)
+        for cusum, pending in ((self._cusum_up, self._pending_up), (self._cusum_down, self._pending_down)):
+            if cusum > 0:
+                pending.append((timestamp_ns, power))
+            else:
+                pending.clear()
+
+        if self._cusum_up > self.cusum_threshold or self._cusum_down > self.cusum_threshold:
+            pending = self._pending_up if self._cusum_up > self.cusum_threshold else self._pending_down
+            self.change_points.append(pending[0][0])
+            self._start_segment(pending)
+            self._estimate = self._segment_sum / self._segment_count
+            return
+        self._unsettled.append(power)
+        if self._cusum_up == 0 and self._cusum_down == 0:
+            self._segment_sum += sum(self._unsettled)
+            self._segment_count += len(self._unsettled)
+            self._unsettled.clear()
+        self._estimate += self.smoothing * (power - self._estimate)
+
+    def sample(self, timestamp_ns: int) -> Dict[str, float]:
+        if not self.available:
+            return {}
+        if self.source == 'sysfs':
+            energy, power_now, discharging = self._read_sysfs()
+        else:
+            energy, power_now, discharging = self._read_psutil()
+        if energy is None:
+            return {}
+
+        if not discharging:
+            # 外接电源时电池读数不代表整机功耗，重新开始估算
+            self._last_energy = None
+            self._last_change_ts = None
+            self._last_power_now = None
+            self._estimate = None
+            self._start_segment([])
+            return {'battery_energy_wh': energy, 'battery_discharging': 0.0}
+
+        if self._last_energy is None:
+            # 第一个读数的更新时刻未知，从下一个变化点开始计算
+            self._last_energy = energy
+        elif energy != self._last_energy:
+            # 读数变化点：用两个变化点之间的能量差计算平均放电功率
+            if power_now is None and self._last_change_ts is not None and energy < self._last_energy:
+                dt = (timestamp_ns - self._last_change_ts) / 1e9
+                if dt > 0:
+                    self._observe(timestamp_ns, (self._last_energy - energy) * 3600 / dt)
+            self.reading_updates.append(timestamp_ns)
+            self._last_energy = energy
+            self._last_change_ts = timestamp_ns
+
+        # 电池直接给出瞬时功率时优先使用，同样只在读数更新时作为观测
+        if power_now and power_now != self._last_power_now:
+            self._observe(timestamp_ns, power_now)
+            self._last_power_now = power_now
+
+        result = {'battery_energy_wh': energy, 'battery_discharging': 1.0}
+        if self._estimate is not None:
+            result['battery_power'] = self._estimate
+        return result
+
+    def close(self):
+        for fds in self._fds:
+            for fd in fds.values():
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self._fds = []
+        self.available = False
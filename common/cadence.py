@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : cadence.py
+@Time    : 2025/04/03
+@Author  : Bruce.Si
+@Desc    : 自适应轮询节奏
+    - 空闲时慢速轮询，避免监听器自身的CPU占用干扰被测的CPU和功耗数据
+    - 触发事件（操作开始）或检测到变化时进入突发模式：先连续自旋，再以很短的间隔轮询
+    - 突发模式结束后轮询间隔按倍数逐步退回空闲间隔
+    - 触发事件可以是 threading.Event 或 multiprocessing.Event，空闲等待时一旦触发立即唤醒
+    - 统计轮询次数、CPU时间和检测时延，用于评估时延与CPU占用的取舍
+    - 突发和退避阶段的等待使用 PrecisionTimer，Windows默认约15.6毫秒的sleep粒度下突发间隔依然有效；
+      只有空闲阶段在触发事件上等待
+    - 事件驱动的监听器不轮询，用 poll() 只做触发检测和统计，得到等待事件的超时
+"""
+
+import time
+from typing import Dict, List, Optional
+
+from common.precision_timer import PrecisionTimer, WaitStats, get_timer
+
+# 默认参数（秒）
+IDLE_INTERVAL = 0.02      # 空闲轮询间隔
+BURST_INTERVAL = 0.0005   # 突发模式轮询间隔
+SPIN_DURATION = 0.05      # 触发后连续自旋的时长
+BURST_DURATION = 1.0      # 最后一次触发或变化后保持突发模式的时长
+DECAY_FACTOR = 2.0        # 退回空闲时每次轮询间隔的放大倍数
+
+
+class AdaptiveCadence:
+    """自适应轮询节奏"""
+
+    IDLE = 'idle'
+    SPIN = 'spin'
+    BURST = 'burst'
+    DECAY = 'decay'
+
+    def __init__(self, idle_interval: float = IDLE_INTERVAL, burst_interval: float = BURST_INTERVAL,
+                 spin_duration: float = SPIN_DURATION, burst_duration: float = BURST_DURATION,
+                 decay_factor: float = DECAY_FACTOR, trigger=None, timer: Optional[PrecisionTimer] = None):
+        """
+        Args:
+            idle_interval: 空闲轮询间隔（秒）
+            burst_interval: 突发模式轮询间隔（秒）
+            spin_duration: 触发后连续自旋的时长（秒）
+            burst_duration: 最后一次触发或变化后保持突发模式的时长（秒）
+            decay_factor: 退回空闲时每次轮询间隔的放大倍数
+            trigger: 触发事件（threading.Event / multiprocessing.Event），置位时进入突发模式
+            timer: 定时器，默认使用进程共享的定时器
+        """
+        self.idle_interval = idle_interval
+        self.burst_interval = burst_interval
+        self.spin_duration = spin_duration
+        self.burst_duration = burst_duration
+        self.decay_factor = decay_factor
+        self.trigger = trigger
+        self.timer = timer if timer is not None else get_timer()
+        self.reset()
+
+    def reset(self):
+        """清空状态和统计"""
+        self.state = self.IDLE
+        self.interval = self.idle_interval
+        self._spin_until = 0
+        self._burst_until = 0
+        self._trigger_seen = False
+        self._trigger_ns: Optional[int] = None
+        self._start_ns: Optional[int] = None
+        self._cpu_start: Optional[float] = None
+        self.cpu_time = 0.0
+        # 本节奏自己的定时精度统计，定时器在进程内共享
+        self.wait_stats = WaitStats()
+        self.polls = {self.IDLE: 0, self.SPIN: 0, self.BURST: 0, self.DECAY: 0}
+        self.latencies_ns: List[int] = []
+
+    def fire(self, timestamp_ns: Optional[int] = None):
+        """
+        进入突发模式（操作即将开始）
+
+        Args:
+            timestamp_ns: 触发时刻（perf_counter_ns），用于统计检测时延，默认为当前时刻
+        """
+        now = time.perf_counter_ns()
+        self._trigger_ns = now if timestamp_ns is None else timestamp_ns
+        self._spin_until = now + int(self.spin_duration * 1e9)
+        self._burst_until = now + int(self.burst_duration * 1e9)
+
+    def notify_change(self):
+        """监听器检测到变化时调用，延长突发模式；触发后的第一次变化记录检测时延"""
+        now = time.perf_counter_ns()
+        if self._trigger_ns is not None:
+            self.latencies_ns.append(now - self._trigger_ns)
+            self._trigger_ns = None
+        self._burst_until = now + int(self.burst_duration * 1e9)
+
+    def _check_trigger(self) -> bool:
+        """触发事件按边沿检测，多个监听器可以共享同一个事件"""
+        if self.trigger is None:
+            return False
+        is_set = self.trigger.is_set()
+        if is_set and not self._trigger_seen:
+            self._trigger_seen = True
+            self.fire()
+            return True
+        if not is_set:
+            self._trigger_seen = False
+        return False
+
+    def _update_state(self, now: int):
+        if now < self._spin_until:
+            self.state = self.SPIN
+            self.interval = 0.0
+        elif now < self._burst_until:
+            self.state = self.BURST
+            self.interval = self.burst_interval
+        elif self.interval < self.idle_interval:
+            self.state = self.DECAY
+            self.interval = min(max(self.interval, self.burst_interval) * self.decay_factor, self.idle_interval)
+        else:
+            self.state = self.IDLE
+            self.interval = self.idle_interval
+
+    def _begin_poll(self):
+        """每次轮询开始时的触发检测、状态更新和计数"""
+        now = time.perf_counter_ns()
+        if self._start_ns is None:
+            self._start_ns = now
+            self._cpu_start = time.thread_time()
+        self._check_trigger()
+        self._update_state(now)
+        self.polls[self.state] += 1
+
+    def wait(self):
+        """两次轮询之间调用，按当前状态等待"""
+        self._begin_poll()
+        if self.state == self.SPIN:
+            pass
+        elif self.state == self.IDLE and self.trigger is not None and not self._trigger_seen:
+            # 空闲等待期间一旦触发立即唤醒
+            if self.trigger.wait(self.interval):
+                self._check_trigger()
+        else:
+            # 突发阶段按时醒来；空闲和退避阶段允许迟到半个间隔，不自旋
+            slack = 0.0 if self.state == self.BURST else self.interval / 2
+            self.timer.sleep(self.interval, slack, self.wait_stats)
+        self.cpu_time = time.thread_time() - self._cpu_start
+
+    def poll(self) -> float:
+        """
+        事件驱动的监听器在每次等待事件前调用，只做触发检测和统计，不等待
+
+        事件到达即唤醒，不需要突发轮询；触发事件只在两次等待之间检查，
+        因此检测时延的起点最多晚一个空闲间隔（见stats中的idle_latency_bound_ms）
+
+        Returns:
+            等待事件的超时（秒），即空闲间隔
+        """
+        self._begin_poll()
+        self.cpu_time = time.thread_time() - self._cpu_start
+        return self.idle_interval
+
+    def stats(self) -> Dict:
+        """
+        轮询统计
+
+        Returns:
+            polls: 各状态的轮询次数
+            wall_time: 轮询线程运行时长（秒）
+            cpu_time: 轮询线程占用的CPU时间（秒）
+            cpu_percent: 单核CPU占用率
+            detections: 触发后检测到变化的次数
+            latency_avg_ms / latency_max_ms: 从触发到检测到变化的时延
+            idle_latency_bound_ms: 未触发时的最大检测时延（空闲间隔）
+            timer: 本节奏的定时精度统计
+        """
+        wall = (time.perf_counter_ns() - self._start_ns) / 1e9 if self._start_ns else 0.0
+        latencies = [latency / 1e6 for latency in self.latencies_ns]
+        return {
+            'polls': dict(self.polls),
+            'wall_time': wall,
+            'cpu_time': self.cpu_time,
+            'cpu_percent': self.cpu_time / wall * 100 if wall > 0 else 0.0,
+            'detections': len(latencies),
+            'latency_avg_ms': sum(latencies) / len(latencies) if latencies else None,
+            'latency_max_ms': max(latencies) if latencies else None,
+            'idle_latency_bound_ms': self.idle_interval * 1000,
+            'timer': self.timer.stats(self.wait_stats),
+        }
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : column_store.py
+@Time    : 2025/03/18
+@Author  : Bruce.Si
+@Desc    : 列式性能数据存储
+    - 所有指标列共用一块预分配的float32二维数组，按需倍增扩容
+    - 时间戳单独存为int64纳秒列
+    - 缺失值统一为NaN，不再使用None
+    - to_numpy()/to_dataframe()均为零拷贝视图
+"""
+
+import warnings
+from typing import Dict, Iterable, List, Mapping, Optional
+
+import numpy as np
+
+
+class ColumnStore:
+    """列式数据存储"""
+
+    def __init__(self, columns: Iterable[str] = (), capacity: int = 1024, dtype=np.float32):
+        """
+        初始化存储
+
+        Args:
+            columns: 初始列名
+            capacity: 初始容量（采样点数）
+            dtype: 指标列的数据类型，默认float32
+        """
+        self.dtype = np.dtype(dtype)
+        self._columns: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._capacity = max(int(capacity), 1)
+        self._size = 0
+        self._timestamps = np.zeros(self._capacity, dtype=np.int64)
+        # 形状为 (列数, 容量)，每一列在内存中连续，转置后即为pandas的原生块布局
+        self._data = np.full((0, self._capacity), np.nan, dtype=self.dtype)
+        for name in columns:
+            self.add_column(name)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._index
+
+    @property
+    def columns(self) -> List[str]:
+        """列名列表"""
+        return list(self._columns)
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """时间戳（纳秒）视图"""
+        return self._timestamps[:self._size]
+
+    @property
+    def nbytes(self) -> int:
+        """已用数据占用的字节数"""
+        return self._size * (self._timestamps.itemsize + len(self._columns) * self.dtype.itemsize)
+
+    def add_column(self, name: str):
+        """新增一列，已有的采样点以NaN填充"""
+        if name in self._index:
+            return
+        row = np.full((1, self._capacity), np.nan, dtype=self.dtype)
+        self._data = np.concatenate([self._data, row], axis=0)
+        self._index[name] = len(self._columns)
+        self._columns.append(name)
+
+    def _grow(self):
+        """容量翻倍"""
+        capacity = self._capacity * 2
+        timestamps = np.zeros(capacity, dtype=np.int64)
+        timestamps[:self._size] = self._timestamps[:self._size]
+        data = np.full((len(self._columns), capacity), np.nan, dtype=self.dtype)
+        data[:, :self._size] = self._data[:, :self._size]
+        self._timestamps = timestamps
+        self._data = data
+        self._capacity = capacity
+
+    def append(self, timestamp_ns: int, values: Mapping[str, Optional[float]]):
+        """
+        追加一个采样点
+
+        Args:
+            timestamp_ns: 采样时间戳（纳秒）
+            values: 列名到数值的映射，未出现的列或None记为NaN，未知列自动新增
+        """
+        if self._size == self._capacity:
+            self._grow()
+        i = self._size
+        self._timestamps[i] = timestamp_ns
+        for name, value in values.items():
+            idx = self._index.get(name)
+            if idx is None:
+                self.add_column(name)
+                idx = self._index[name]
+            if value is not None:
+                self._data[idx, i] = value
+        self._size += 1
+
+    def column(self, name: str) -> np.ndarray:
+        """获取单列视图"""
+        return self._data[self._index[name], :self._size]
+
+    def block(self, names: Optional[Iterable[str]] = None) -> np.ndarray:
+        """
+        获取 (列数, 采样点数) 的二维数据
+        不指定列名时返回全部列的视图；指定列名时按顺序取出（会产生拷贝）
+        """
+        if names is None:
+            return self._data[:, :self._size]
+        return self._data[[self._index[name] for name in names], :self._size]
+
+    def summary(self, ndigits: Optional[int] = None) -> Dict[str, Dict[str, Optional[float]]]:
+        """
+        按列向量化统计最小值、最大值和平均值，NaN视为缺失值
+
+        Args:
+            ndigits: 平均值保留的小数位数，不指定则不做舍入
+        Returns:
+            列名 -> {'min', 'max', 'avg'}，整列缺失时均为None
+        """
+        block = self.block()
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            mins = np.nanmin(block, axis=1)
+            maxs = np.nanmax(block, axis=1)
+            avgs = np.nanmean(block, axis=1, dtype=np.float64)
+
+        summary = {}
+        for i, name in enumerate(self._columns):
+            if np.isnan(avgs[i]):
+                summary[name] = {'min': None, 'max': None, 'avg': None}
+                continue
+            avg = float(avgs[i])
+            summary[name] = {
+                'min': float(mins[i]),
+                'max': float(maxs[i]),
+                'avg': avg if ndigits is None else round(avg, ndigits),
+            }
+        return summary
+
+    def clear(self):
+        """清空数据，保留列和已分配的容量"""
+        self._data[:, :self._size] = np.nan
+        self._size = 0
+
+    def to_numpy(self) -> Dict[str, np.ndarray]:
+        """导出为列名到数组视图的字典（零拷贝）"""
+        result = {'timestamp': self.timestamps}
+        for name, idx in self._index.items():
+            result[name] = self._data[idx, :self._size]
+        return result
+
+    def to_dataframe(self):
+        """
+        导出为pandas DataFrame（零拷贝）
+        指标数据转置后是Fortran连续的二维数组，正好对应pandas内部的块布局，不会发生拷贝
+        """
+        import pandas as pd
+
+        index = pd.Index(self.timestamps, name='timestamp', copy=False)
+        return pd.DataFrame(
+            self._data[:, :self._size].T,
+            index=index,
+            columns=list(self._columns),
+            copy=False
+        )
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : cpu_core_monitor.py
+@Time    : 2025/03/20
+@Author  : Bruce.Si
+@Desc    : 逐核CPU使用率和频率监听
+    - 通过 psutil.cpu_percent(percpu=True) 和 psutil.cpu_freq(percpu=True) 采集，最高20Hz
+    - 数据写入预分配的 (时间 × 核心) float32 环形缓冲区，采集循环不追加任何Python对象
+    - 统计摘要包含逐核和逐簇（按最大频率划分大小核）统计，并支持导出热力图数据
+"""
+
+import threading
+import time
+import warnings
+from typing import Dict, List, Optional
+
+import numpy as np
+import psutil
+
+from common.logger import create_logger, Logger
+from common.precision_timer import Ticker
+
+# 最高采样频率20Hz
+MIN_INTERVAL = 0.05
+
+
+class CpuCoreMonitor:
+    def __init__(self, logger: Logger, interval: float = MIN_INTERVAL, capacity: int = 12000,
+                 clusters: Optional[Dict[str, List[int]]] = None):
+        """
+        初始化逐核监听器
+
+        Args:
+            logger: 日志器
+            interval: 采样间隔（秒），不低于0.05秒
+            capacity: 环形缓冲区的采样点数，默认20Hz下约10分钟
+            clusters: 核心簇划分，簇名 -> 核心序号列表；不指定时按各核心最大频率自动划分
+        """
+        self.logger = logger
+        self.interval = max(interval, MIN_INTERVAL)
+        self.capacity = int(capacity)
+        self.core_count = psutil.cpu_count(logical=True) or 1
+        self.is_monitoring = False
+        self.monitor_thread = None
+
+        # 环形缓冲区
+        self.timestamps = np.zeros(self.capacity, dtype=np.int64)
+        self.utilization = np.zeros((self.capacity, self.core_count), dtype=np.float32)
+        self.frequency = np.full((self.capacity, self.core_count), np.nan, dtype=np.float32)
+        self._cursor = 0  # 下一个写入位置
+        self._count = 0   # 累计写入次数
+
+        self.clusters = clusters if clusters is not None else self.detect_clusters()
+
+    def detect_clusters(self) -> Dict[str, List[int]]:
+        """按各核心最大频率划分核心簇，频率相同或无法获取时归为一个簇"""
+        try:
+            freqs = psutil.cpu_freq(percpu=True) or []
+        except Exception:
+            freqs = []
+        if len(freqs) != self.core_count:
+            return {'all': list(range(self.core_count))}
+
+        max_freqs = np.array([f.max for f in freqs], dtype=np.float32)
+        levels = np.unique(max_freqs)[::-1]
+        if len(levels) <= 1:
+            return {'all': list(range(self.core_count))}
+        return {
+            f"cluster{i}_{int(level)}MHz": np.flatnonzero(max_freqs == level).tolist()
+            for i, level in enumerate(levels)
+        }
+
+    def __len__(self) -> int:
+        return min(self._count, self.capacity)
+
+    def sample(self):
+        """采集一次，直接写入环形缓冲区的当前行"""
+        i = self._cursor
+        self.timestamps[i] = time.perf_counter_ns()
+        self.utilization[i] = psutil.cpu_percent(percpu=True)
+        freqs = psutil.cpu_freq(percpu=True)
+        if freqs:
+            row = self.frequency[i]
+            if len(freqs) == self.core_count:
+                for core, freq in enumerate(freqs):
+                    row[core] = freq.current
+            else:
+                # Windows下只返回一个整体频率
+                row[:] = freqs[0].current
+        self._cursor = (i + 1) % self.capacity
+        self._count += 1
+
+    def start_monitoring(self):
+        """开始监控"""
+        if not self.is_monitoring:
+            # 首次调用cpu_percent返回无意义的0，先预热一次
+            psutil.cpu_percent(percpu=True)
+            self.is_monitoring = True
+            self.monitor_thread = threading.Thread(target=self.monitor)
+            self.monitor_thread.daemon = True
+            self.monitor_thread.start()
+            self.logger.info("逐核CPU监听工具启动")
+
+    def stop_monitoring(self):
+        """停止监控"""
+        self.is_monitoring = False
+        if self.monitor_thread:
+            self.monitor_thread.join()
+        self.logger.info("逐核CPU监听工具停止")
+
+    def monitor(self):
+        """监控循环，按固定节拍采样，避免误差累积"""
+        ticker = Ticker(self.interval)
+        while self.is_monitoring:
+            ticker.wait()
+            try:
+                self.sample()
+            except Exception as e:
+                self.logger.error(f"逐核CPU采集失败: {e}")
+        if ticker.missed:
+            self.logger.warning(f"逐核CPU采样落后，跳过 {ticker.missed} 个节拍")
+
+    def _ordered(self, buffer: np.ndarray) -> np.ndarray:
+        """按时间顺序展开环形缓冲区"""
+        if self._count <= self.capacity:
+            return buffer[:self._count]
+        return np.roll(buffer, -self._cursor, axis=0)
+
+    def _valid(self, buffer: np.ndarray) -> np.ndarray:
+        """有效数据视图（不保证时间顺序，仅用于统计）"""
+        return buffer[:len(self)]
+
+    def get_core_summary(self) -> Dict:
+        """获取逐核和逐簇统计摘要"""
+        if not len(self):
+            return {}
+
+        util = self._valid(self.utilization)
+        freq = self._valid(self.frequency)
+        mean_util = util.mean(axis=0, dtype=np.float64)
+        max_util = util.max(axis=0)
+        p95_util = np.percentile(util, 95, axis=0)
+        with warnings.catch_warnings():
+            # 没有频率数据的核心平均值为NaN
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            mean_freq = np.nanmean(freq, axis=0)
+
+        cores = {
+            core: {
+                'avg': round(float(mean_util[core]), 2),
+                'max': round(float(max_util[core]), 2),
+                'p95': round(float(p95_util[core]), 2),
+                'avg_freq_mhz': None if np.isnan(mean_freq[core]) else round(float(mean_freq[core]), 1),
+            }
+            for core in range(self.core_count)
+        }
+
+        clusters = {}
+        for name, members in self.clusters.items():
+            # 簇平均使用率随时间的序列
+            series = util[:, members].mean(axis=1, dtype=np.float64)
+            cluster_freq = mean_freq[members]
+            clusters[name] = {
+                'cores': list(members),
+                'avg': round(float(series.mean()), 2),
+                'max': round(float(series.max()), 2),
+                'p95': round(float(np.percentile(series, 95)), 2),
+                'busiest_core': int(members[int(np.argmax(mean_util[members]))]),
+                'avg_freq_mhz': None if np.isnan(cluster_freq).all() else round(float(np.nanmean(cluster_freq)), 1),
+            }
+
+        return {
+            'sample_count': len(self),
+            'interval': self.interval,
+            'hotspot_core': int(np.argmax(mean_util)),
+            'cores': cores,
+            'clusters': clusters,
+        }
+
+    def to_heatmap(self) -> Dict[str, np.ndarray]:
+        """
+        导出热力图数据，按时间顺序排列
+        :return: time为相对时间（秒），utilization/frequency形状为 (核心, 时间)
+        """
+        timestamps = self._ordered(self.timestamps)
+        relative_time = (timestamps - timestamps[0]) / 1e9 if len(timestamps) else timestamps.astype(np.float64)
+        return {
+            'time': relative_time,
+            'cores': np.arange(self.core_count),
+            'utilization': self._ordered(self.utilization).T,
+            'frequency': self._ordered(self.frequency).T,
+        }
+
+
+if __name__ == '__main__':
+    logger = create_logger("cpu_core_monitor")
+    monitor = CpuCoreMonitor(logger)
+    monitor.start_monitoring()
+    time.sleep(3)
+    monitor.stop_monitoring()
+    print(monitor.get_core_summary())
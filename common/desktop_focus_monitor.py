@@ -15,12 +15,14 @@ import time
 from datetime import datetime
 from typing import Optional
 from common.logger import create_logger, Logger
+from common.cadence import AdaptiveCadence
 
 class DesktopFocusMonitor:
-    def __init__(self, logger: Logger):
+    def __init__(self, logger: Logger, cadence: AdaptiveCadence = None):
         self.is_monitoring = False
         self.monitor_thread: Optional[threading.Thread] = None
-        self.monitor_interval = 0.00001  # 1毫秒的监听间隔
+        # 自适应轮询节奏：空闲时慢速轮询，触发或检测到变化后短时间高频轮询
+        self.cadence = cadence if cadence is not None else AdaptiveCadence()
         self.last_focus_time: Optional[datetime] = None
         
         # 初始化日志器
@@ -63,6 +65,7 @@ class DesktopFocusMonitor:
                 self.last_focus_time = datetime.now()
                 # 状态变化：非桌面 -> 桌面
                 if is_desktop_focused and not was_desktop_focused:
+                    self.cadence.notify_change()
                     self.logger.info((
                         f"\n标题: 桌面焦点\n"
                         f"时间: {self.last_focus_time.strftime('%Y-%m-%d %H:%M:%S.%f')}\n"
@@ -73,6 +76,7 @@ class DesktopFocusMonitor:
                 
                 # 状态变化：桌面 -> 非桌面
                 elif not is_desktop_focused and was_desktop_focused:
+                    self.cadence.notify_change()
                     if self.last_focus_time:
                         self.logger.info((
                             f"\n标题: 非桌面焦点\n"
@@ -81,7 +85,7 @@ class DesktopFocusMonitor:
                         ))
                 
                 was_desktop_focused = is_desktop_focused
-                time.sleep(self.monitor_interval)
+                self.cadence.wait()
                 
             except Exception as e:
                 self.logger.error(f"监控过程出错: {e}")
@@ -119,13 +123,15 @@ def main():
         name="desktop_focus",
         level="INFO",
         time_rotating=True,
-        when='midnight'
+        when='midnight',
+        async_mode=True
     )
     monitor = DesktopFocusMonitor(logger=logger)
     try:
         monitor.start_monitoring()
-        while monitor.is_monitoring:
-            time.sleep(0.00001)
+        # 带超时的join，Windows下主线程仍能响应Ctrl+C
+        while monitor.monitor_thread.is_alive():
+            monitor.monitor_thread.join(0.5)
     except KeyboardInterrupt:
         monitor.stop_monitoring()
 
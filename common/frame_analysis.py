@@ -0,0 +1,347 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : frame_analysis.py
+@Time    : 2025/03/29
+@Author  : Bruce.Si
+@Desc    : 帧间隔序列分析
+    - 滑动窗口统计全部用累计和计算，不在Python中逐窗口循环，适用于百万帧级别的采集
+    - 帧节奏（pacing）：窗口方差、相邻帧时间差分位数、卡顿指数、最差窗口
+    - 刷新率分段：检测60/144Hz切换、VRR、电池模式降频等刷新率区间，每段按各自的目标帧时间统计丢帧
+    - 频谱分析：帧间隔减去所在刷新率分段的目标帧时间后重采样到均匀时间网格做FFT，
+      找出周期性卡顿并与各监听器的采样间隔比对
+"""
+
+from typing import Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# 默认滑动窗口帧数（144Hz下约0.4秒）
+PACING_WINDOW = 60
+
+# 相邻帧时间差超过平均帧时间的该比例时记为一次卡顿
+STUTTER_THRESHOLD = 0.5
+
+# 刷新率分段：滑动中位数窗口帧数，奇数；单次丢帧不会改变窗口中位数
+SEGMENT_WINDOW = 31
+# 相邻帧的局部帧时间相对变化超过该值时视为刷新率切换
+SEGMENT_TOLERANCE = 0.15
+# 段内局部帧时间的变异系数超过该值时视为VRR区间，逐帧使用局部帧时间作为目标
+VRR_CV = 0.05
+
+# 频谱分析：峰值幅度超过噪声基底（幅度谱中位数）的倍数才报告
+SPECTRAL_PROMINENCE = 8.0
+# 频谱分析：峰值幅度的绝对下限（毫秒），低于该值的是时间戳取整等量化误差
+SPECTRAL_MIN_AMPLITUDE = 0.05
+# 与监听器采样频率比对的谐波次数
+SPECTRAL_HARMONICS = 3
+
+# 滑动中位数分块计算的行数，限制临时内存
+_MEDIAN_CHUNK = 1 << 16
+
+
+def rolling_mean_var(values: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    滑动窗口均值和方差（总体方差），基于累计和，O(n)
+
+    Args:
+        values: 一维序列
+        window: 窗口长度
+    Returns:
+        (均值, 方差)，长度为 len(values) - window + 1，第i个值对应 values[i:i+window]
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if window <= 0 or len(values) < window:
+        return np.empty(0), np.empty(0)
+    # 先减去全局均值，避免平方累计和的精度损失
+    centered = values - values.mean()
+    csum = np.concatenate(([0.0], np.cumsum(centered)))
+    csum2 = np.concatenate(([0.0], np.cumsum(centered * centered)))
+    sums = csum[window:] - csum[:-window]
+    sums2 = csum2[window:] - csum2[:-window]
+    mean = sums / window
+    var = np.maximum(sums2 / window - mean * mean, 0.0)
+    return mean + values.mean(), var
+
+
+def frame_pacing_metrics(intervals: np.ndarray, window: int = PACING_WINDOW,
+                         stutter_threshold: float = STUTTER_THRESHOLD) -> Dict:
+    """
+    帧节奏分析，捕捉没有整帧丢失、但帧时间忽长忽短的微卡顿
+
+    Args:
+        intervals: 帧间隔（毫秒）
+        window: 滑动窗口帧数
+        stutter_threshold: 相邻帧时间差与平均帧时间之比超过该值时记为卡顿
+    Returns:
+        分析结果字典：
+        - window_std: 各窗口帧时间标准差（毫秒）
+        - delta_p50/p95/p99: 相邻帧时间差绝对值的分位数（毫秒）
+        - stutter_index: 相邻帧时间差绝对值的均值 / 平均帧时间，完全平稳时为0
+        - stutter_frames: 相邻帧时间差超过阈值的次数
+        - worst_window: 标准差最大的窗口 {'start', 'end', 'start_time', 'mean', 'std'}
+    """
+    intervals = np.asarray(intervals, dtype=np.float64)
+    if len(intervals) < 2:
+        return {}
+    window = min(window, len(intervals))
+    mean_interval = float(intervals.mean())
+
+    deltas = np.abs(np.diff(intervals))
+    p50, p95, p99 = np.percentile(deltas, [50, 95, 99])
+
+    window_mean, window_var = rolling_mean_var(intervals, window)
+    window_std = np.sqrt(window_var)
+    worst = int(np.argmax(window_std))
+    # 窗口起始时间 = 之前所有帧间隔之和
+    start_time = float(intervals[:worst].sum())
+
+    return {
+        'window': window,
+        'window_std': window_std,
+        'window_std_mean': float(window_std.mean()),
+        'delta_p50': float(p50),
+        'delta_p95': float(p95),
+        'delta_p99': float(p99),
+        'stutter_index': float(deltas.mean() / mean_interval) if mean_interval > 0 else 0.0,
+        'stutter_frames': int(np.count_nonzero(deltas > stutter_threshold * mean_interval)),
+        'worst_window': {
+            'start': worst,
+            'end': worst + window,
+            'start_time': start_time,
+            'mean': float(window_mean[worst]),
+            'std': float(window_std[worst]),
+        },
+    }
+
+
+def rolling_median(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    居中滑动中位数，两端以边缘值填充，输出与输入等长
+    分块在滑动窗口视图上计算，临时内存不超过 _MEDIAN_CHUNK * window
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if n == 0:
+        return values.copy()
+    window = max(1, min(window, n) | 1)  # 取奇数，保证居中
+    half = window // 2
+    windows = sliding_window_view(np.pad(values, half, mode='edge'), window)
+    result = np.empty(n)
+    for start in range(0, n, _MEDIAN_CHUNK):
+        stop = min(start + _MEDIAN_CHUNK, n)
+        result[start:stop] = np.median(windows[start:stop], axis=1)
+    return result
+
+
+def _merge_short_segments(boundaries: np.ndarray, n: int, min_segment: int) -> List[int]:
+    """合并过短的分段（合并到前一段），循环次数为切换点个数而不是帧数"""
+    starts = [0]
+    for boundary in boundaries.tolist():
+        if boundary - starts[-1] >= min_segment:
+            starts.append(boundary)
+    # 最后一段过短时并入前一段
+    if len(starts) > 1 and n - starts[-1] < min_segment:
+        starts.pop()
+    return starts
+
+
+def segment_refresh_rate(intervals: np.ndarray, window: int = SEGMENT_WINDOW,
+                         tolerance: float = SEGMENT_TOLERANCE, min_segment: int = None,
+                         vrr_cv: float = VRR_CV) -> Dict:
+    """
+    按刷新率区间分段，并在每段内按各自的目标帧时间统计丢帧
+
+    局部帧时间取滑动中位数，相邻帧局部帧时间的对数差超过 log(1 + tolerance) 的位置为切换点；
+    段内局部帧时间持续变化（变异系数超过vrr_cv）的区间视为VRR，逐帧以局部帧时间为目标
+
+    Args:
+        intervals: 帧间隔（毫秒）
+        window: 滑动中位数窗口帧数
+        tolerance: 刷新率切换判定的相对变化阈值
+        min_segment: 最短分段帧数，默认等于window
+        vrr_cv: VRR判定的变异系数阈值
+    Returns:
+        {'boundaries': 各段起始帧间隔序号, 'segments': [...], 'total_drops', 'dropped_frames': 逐帧丢帧数,
+         'targets': 逐帧目标帧时间}
+    """
+    intervals = np.asarray(intervals, dtype=np.float64)
+    n = len(intervals)
+    if n == 0:
+        return {'boundaries': np.zeros(0, dtype=np.int64), 'segments': [], 'total_drops': 0,
+                'dropped_frames': np.zeros(0), 'targets': np.zeros(0)}
+    min_segment = window if min_segment is None else min_segment
+
+    local = rolling_median(intervals, window)
+    log_local = np.log(local)
+    changes = np.flatnonzero(np.abs(np.diff(log_local)) > np.log1p(tolerance)) + 1
+    starts = np.array(_merge_short_segments(changes, n, min_segment), dtype=np.int64)
+    ends = np.append(starts[1:], n)
+    counts = ends - starts
+
+    # 每段的目标帧时间和VRR判定，全部按段归约
+    seg_id = np.repeat(np.arange(len(starts)), counts)
+    sums = np.add.reduceat(local, starts)
+    sums2 = np.add.reduceat(local * local, starts)
+    local_mean = sums / counts
+    local_cv = np.sqrt(np.maximum(sums2 / counts - local_mean ** 2, 0.0)) / local_mean
+    vrr = local_cv > vrr_cv
+    medians = np.array([np.median(intervals[a:b]) for a, b in zip(starts.tolist(), ends.tolist())])
+
+    # 逐帧目标：固定刷新率区间用段内中位数，VRR区间用局部帧时间
+    target = np.where(vrr[seg_id], local, medians[seg_id])
+    dropped = np.maximum(np.floor(intervals / target) - 1, 0)
+    seg_drops = np.add.reduceat(dropped, starts)
+    seg_max_drops = np.maximum.reduceat(dropped, starts)
+    seg_duration = np.add.reduceat(intervals, starts)
+    start_times = np.concatenate(([0.0], np.cumsum(intervals)))[starts]
+
+    segments = []
+    for i in range(len(starts)):
+        target_frame_time = float(local_mean[i] if vrr[i] else medians[i])
+        segments.append({
+            'start': int(starts[i]),
+            'end': int(ends[i]),
+            'start_time': float(start_times[i]),
+            'duration': float(seg_duration[i]),
+            'frame_count': int(counts[i]),
+            'target_frame_time': target_frame_time,
+            'refresh_rate': 1000.0 / target_frame_time,
+            'vrr': bool(vrr[i]),
+            'total_drops': int(seg_drops[i]),
+            'max_drops': int(seg_max_drops[i]),
+        })
+
+    return {
+        'boundaries': starts,
+        'segments': segments,
+        'total_drops': int(dropped.sum()),
+        'dropped_frames': dropped,
+        'targets': target,
+    }
+
+
+def _match_monitors(frequency: float, tolerance: float, monitor_intervals: Mapping[str, float],
+                    harmonics: int) -> List[Dict]:
+    """查找采样频率（或其谐波）与给定频率吻合的监听器"""
+    matches = []
+    for name, interval in monitor_intervals.items():
+        if not interval or interval <= 0:
+            continue
+        harmonic = int(round(frequency * interval))
+        if 1 <= harmonic <= harmonics and abs(frequency - harmonic / interval) <= tolerance:
+            matches.append({'monitor': name, 'interval': interval, 'harmonic': harmonic})
+    return matches
+
+
+def spectral_analysis(timestamps_ns: np.ndarray, top: int = 5,
+                      prominence: float = SPECTRAL_PROMINENCE,
+                      min_amplitude: float = SPECTRAL_MIN_AMPLITUDE,
+                      monitor_intervals: Optional[Mapping[str, float]] = None,
+                      harmonics: int = SPECTRAL_HARMONICS) -> Dict:
+    """
+    按帧时间戳做频谱分析，参数和返回值见 interval_spectrum
+
+    Args:
+        timestamps_ns: 帧时间戳（纳秒）
+    """
+    timestamps_ns = np.asarray(timestamps_ns, dtype=np.int64)
+    return interval_spectrum(np.diff(timestamps_ns) / 1_000_000, top=top, prominence=prominence,
+                             min_amplitude=min_amplitude, monitor_intervals=monitor_intervals,
+                             harmonics=harmonics)
+
+
+def interval_spectrum(intervals: np.ndarray, top: int = 5,
+                      prominence: float = SPECTRAL_PROMINENCE,
+                      min_amplitude: float = SPECTRAL_MIN_AMPLITUDE,
+                      monitor_intervals: Optional[Mapping[str, float]] = None,
+                      harmonics: int = SPECTRAL_HARMONICS) -> Dict:
+    """
+    帧间隔频谱分析，找出周期性卡顿源（例如1Hz轮询的驱动或监听器自身的采样）
+
+    帧间隔先减去所在刷新率分段的目标帧时间（见segment_refresh_rate），刷新率切换和VRR的缓慢变化不进入频谱；
+    残差在时间上不均匀，以中位帧间隔为步长线性插值到均匀网格，去均值并加Hann窗后做实数FFT，
+    幅度换算为帧时间波动的毫秒数
+
+    Args:
+        intervals: 帧间隔（毫秒），不需要还原绝对时间戳
+        top: 最多报告的周期分量个数
+        prominence: 峰值幅度至少为噪声基底的倍数
+        min_amplitude: 峰值幅度的绝对下限（毫秒）
+        monitor_intervals: 监听器名称 -> 采样间隔（秒），默认使用配置中的 MONITOR_SAMPLING_INTERVALS
+        harmonics: 与监听器采样频率比对的谐波次数
+    Returns:
+        {'sample_rate', 'resolution', 'noise_floor', 'components': [...], 'frequencies', 'amplitudes'}
+        components按基频及其谐波的幅度总和降序，每项包含 frequency(Hz)、period(秒)、
+        amplitude(毫秒)、harmonics(检测到的谐波个数)、snr、monitors
+    """
+    if monitor_intervals is None:
+        from config.config import MONITOR_SAMPLING_INTERVALS
+        monitor_intervals = MONITOR_SAMPLING_INTERVALS
+
+    intervals = np.asarray(intervals, dtype=np.float64)
+    if len(intervals) < 15:
+        return {'components': []}
+    # 每个帧间隔记在其结束时刻（相对第一帧，秒）
+    times = np.cumsum(intervals) / 1000
+    step = float(np.median(intervals)) / 1000
+    if step <= 0:
+        return {'components': []}
+    residuals = intervals - segment_refresh_rate(intervals)['targets']
+
+    grid = np.arange(times[0], times[-1], step)
+    if len(grid) < 16:
+        return {'components': []}
+    signal = np.interp(grid, times, residuals)
+    signal -= signal.mean()
+
+    window = np.hanning(len(signal))
+    amplitudes = 2 * np.abs(np.fft.rfft(signal * window)) / window.sum()
+    frequencies = np.fft.rfftfreq(len(signal), step)
+    resolution = frequencies[1]
+    noise_floor = float(np.median(amplitudes[1:]))
+
+    # 局部极大值，去掉直流和周期长于半个采集时长的分量
+    peak = np.zeros(len(amplitudes), dtype=bool)
+    peak[1:-1] = (amplitudes[1:-1] > amplitudes[:-2]) & (amplitudes[1:-1] >= amplitudes[2:])
+    peak &= frequencies >= 2 * resolution
+    peak &= amplitudes > max(prominence * noise_floor, min_amplitude)
+    candidates = np.flatnonzero(peak)
+
+    # 周期性的尖峰是脉冲串，频谱上是基频及其一串等幅谐波，按频率从低到高归并到基频
+    fundamentals = []
+    for idx in candidates.tolist():
+        frequency = float(frequencies[idx])
+        amplitude = float(amplitudes[idx])
+        for component in fundamentals:
+            order = round(frequency / component['frequency'])
+            if order >= 2 and abs(frequency - order * component['frequency']) <= order * component['tolerance']:
+                component['harmonics'] += 1
+                component['power'] += amplitude
+                break
+        else:
+            fundamentals.append({'frequency': frequency, 'amplitude': amplitude, 'power': amplitude,
+                                 'harmonics': 0, 'tolerance': max(2 * resolution, 0.02 * frequency)})
+    # 按基频及其谐波的幅度总和排序
+    fundamentals.sort(key=lambda component: component['power'], reverse=True)
+
+    components = []
+    for component in fundamentals[:top]:
+        frequency = component['frequency']
+        components.append({
+            'frequency': frequency,
+            'period': 1 / frequency,
+            'amplitude': component['amplitude'],
+            'harmonics': component['harmonics'],
+            'snr': component['amplitude'] / noise_floor if noise_floor > 0 else float('inf'),
+            'monitors': _match_monitors(frequency, component['tolerance'], monitor_intervals, harmonics),
+        })
+
+    return {
+        'sample_rate': 1 / step,
+        'resolution': float(resolution),
+        'noise_floor': noise_floor,
+        'components': components,
+        'frequencies': frequencies,
+        'amplitudes': amplitudes,
+    }
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : frame_stats.py
+@Time    : 2025/03/28
+@Author  : Bruce.Si
+@Desc    : 在线帧时间统计
+    - 帧间隔落入固定数量的对数刻度桶，内存占用与运行时长无关
+    - Welford算法在线计算均值和标准差
+    - 由直方图得到分位数，进而得到1%/0.1% Low帧率
+    - 前若干帧的中位数作为目标帧时间，之后按目标帧时间累计丢帧
+    - 运行过程中可随时读取快照，多次运行的统计可以合并
+"""
+
+import math
+import threading
+from typing import Dict, Optional
+
+import numpy as np
+
+# 直方图范围（毫秒）和精度：每十倍程的桶数，200个桶对应约1.2%的相对误差
+HIST_MIN_MS = 0.05
+HIST_MAX_MS = 60000.0
+BUCKETS_PER_DECADE = 200
+
+# 用于确定目标帧时间的预热帧数
+WARMUP_FRAMES = 120
+
+
+class FrameTimeStats:
+    """在线帧时间统计"""
+
+    def __init__(self, target_frame_time: Optional[float] = None, warmup: int = WARMUP_FRAMES,
+                 min_ms: float = HIST_MIN_MS, max_ms: float = HIST_MAX_MS,
+                 buckets_per_decade: int = BUCKETS_PER_DECADE):
+        """
+        Args:
+            target_frame_time: 目标帧时间（毫秒），不指定时取预热阶段帧间隔的中位数
+            warmup: 预热帧数
+            min_ms: 直方图下限，更小的间隔计入下溢桶
+            max_ms: 直方图上限，更大的间隔计入上溢桶
+            buckets_per_decade: 每十倍程的桶数
+        """
+        self.min_ms = min_ms
+        self.max_ms = max_ms
+        self.buckets_per_decade = buckets_per_decade
+        self.warmup = warmup
+        self._log_min = math.log10(min_ms)
+        self._buckets = int(math.ceil((math.log10(max_ms) - self._log_min) * buckets_per_decade))
+        # 桶边界，首尾各有一个下溢/上溢桶
+        self.edges = min_ms * np.power(10.0, np.arange(self._buckets + 1) / buckets_per_decade)
+        self._fixed_target = target_frame_time
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """清空统计"""
+        with self._lock:
+            self.histogram = np.zeros(self._buckets + 2, dtype=np.int64)
+            self.count = 0
+            self.mean = 0.0
+            self._m2 = 0.0
+            self.min_frame_time = math.inf
+            self.max_frame_time = 0.0
+            self.max_frame_index = -1
+            self.target_frame_time = self._fixed_target
+            self.total_drops = 0
+            self.drop_events = 0
+            self._warmup_buffer = []
+
+    def _bucket(self, interval: float) -> int:
+        """帧间隔所在的桶序号，0为下溢桶，最后一个为上溢桶"""
+        if interval < self.min_ms:
+            return 0
+        idx = int((math.log10(interval) - self._log_min) * self.buckets_per_decade) + 1
+        return min(idx, self._buckets + 1)
+
+    def _count_drops(self, interval: float):
+        drops = int(interval // self.target_frame_time) - 1
+        if drops > 0:
+            self.total_drops += drops
+            self.drop_events += 1
+
+    def update(self, interval: float):
+        """
+        加入一个帧间隔
+
+        Args:
+            interval: 帧间隔（毫秒）
+        """
+        with self._lock:
+            self.histogram[self._bucket(interval)] += 1
+            self.count += 1
+            delta = interval - self.mean
+            self.mean += delta / self.count
+            self._m2 += delta * (interval - self.mean)
+            if interval < self.min_frame_time:
+                self.min_frame_time = interval
+            if interval > self.max_frame_time:
+                self.max_frame_time = interval
+                self.max_frame_index = self.count - 1
+
+            if self.target_frame_time is not None:
+                self._count_drops(interval)
+                return
+            # 预热阶段先缓存，确定目标帧时间后补算丢帧
+            self._warmup_buffer.append(interval)
+            if len(self._warmup_buffer) >= self.warmup:
+                self.target_frame_time = float(np.median(self._warmup_buffer))
+                for value in self._warmup_buffer:
+                    self._count_drops(value)
+                self._warmup_buffer = []
+
+    @property
+    def std_dev(self) -> float:
+        """总体标准差（毫秒）"""
+        return math.sqrt(self._m2 / self.count) if self.count else 0.0
+
+    def percentile(self, q: float) -> Optional[float]:
+        """
+        由直方图估算帧时间分位数，取所在桶的几何中点
+
+        Args:
+            q: 百分位（0-100）
+        Returns:
+            毫秒，没有数据时返回None
+        """
+        with self._lock:
+            return self._percentile(q)
+
+    def _percentile(self, q: float) -> Optional[float]:
+        if self.count == 0:
+            return None
+        rank = max(int(math.ceil(q / 100 * self.count)), 1)
+        idx = int(np.searchsorted(np.cumsum(self.histogram), rank))
+        if idx == 0:
+            return min(self.min_frame_time, self.min_ms)
+        if idx == self._buckets + 1:
+            return self.max_frame_time
+        value = math.sqrt(self.edges[idx - 1] * self.edges[idx])
+        # 桶中点不应超出实际观测到的范围
+        return min(max(value, self.min_frame_time), self.max_frame_time)
+
+    def snapshot(self) -> Dict:
+        """
+        读取当前统计，可在采集过程中随时调用
+
+        1% Low / 0.1% Low 定义为第99 / 99.9百分位帧时间对应的帧率
+        """
+        with self._lock:
+            if self.count == 0:
+                return {'sample_count': 0}
+            p99 = self._percentile(99)
+            p999 = self._percentile(99.9)
+            return {
+                'sample_count': self.count,
+                'frame_time': self.mean,
+                'std_dev': self.std_dev,
+                'min_frame_time': self.min_frame_time,
+                'max_frame_time': self.max_frame_time,
+                'max_frame_index': self.max_frame_index,
+                'median_frame_time': self._percentile(50),
+                'p99_frame_time': p99,
+                'p999_frame_time': p999,
+                'avg_fps': 1000 / self.mean if self.mean > 0 else None,
+                'low_1_fps': 1000 / p99 if p99 else None,
+                'low_01_fps': 1000 / p999 if p999 else None,
+                'target_frame_time': self.target_frame_time,
+                'total_drops': self.total_drops,
+                'drop_events': self.drop_events,
+            }
+
+    def merge(self, other: 'FrameTimeStats') -> 'FrameTimeStats':
+        """
+        合并另一次运行的统计（并行Welford合并），直方图配置必须一致
+        目标帧时间保留本对象的值，本对象尚未确定时使用对方的值
+        """
+        if len(other.histogram) != len(self.histogram) or other.min_ms != self.min_ms \
+                or other.buckets_per_decade != self.buckets_per_decade:
+            raise ValueError("直方图配置不一致，无法合并")
+        # 先在对方的锁内复制状态，再在本对象的锁内合并：两把锁不同时持有，
+        # a.merge(b) 与 b.merge(a) 并发时不会死锁；合并自身（other is self）时复制的是合并前的状态
+        with other._lock:
+            if other.count == 0:
+                return self
+            count, mean, m2 = other.count, other.mean, other._m2
+            histogram = other.histogram.copy()
+            min_frame_time, max_frame_time = other.min_frame_time, other.max_frame_time
+            max_frame_index = other.max_frame_index
+            total_drops, drop_events = other.total_drops, other.drop_events
+            target_frame_time = other.target_frame_time
+            warmup_buffer = list(other._warmup_buffer)
+
+        with self._lock:
+            total = self.count + count
+            delta = mean - self.mean
+            self._m2 += m2 + delta * delta * self.count * count / total
+            self.mean += delta * count / total
+            self.histogram += histogram
+            if max_frame_time > self.max_frame_time:
+                self.max_frame_time = max_frame_time
+                self.max_frame_index = self.count + max_frame_index
+            self.min_frame_time = min(self.min_frame_time, min_frame_time)
+            self.count = total
+            self.total_drops += total_drops
+            self.drop_events += drop_events
+            if self.target_frame_time is None:
+                self.target_frame_time = target_frame_time
+            self._warmup_buffer.extend(warmup_buffer)
+            if self.target_frame_time is not None:
+                for value in self._warmup_buffer:
+                    self._count_drops(value)
+                self._warmup_buffer = []
+        return self
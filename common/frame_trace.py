@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : frame_trace.py
+@Time    : 2025/04/01
+@Author  : Bruce.Si
+@Desc    : 帧时间戳二进制记录文件
+    - 固定64字节文件头 + 差分编码的帧间隔块（纳秒，小端）
+    - 所有帧间隔都小于2^31纳秒（约2.1秒）时用int32存储，体积减半；否则用int64
+    - 加载时对帧间隔块做内存映射，不读入内存，适合离线批量重新分析大量历史记录
+
+文件头布局（小端）:
+    magic        4s   b'FTRC'
+    version      H
+    delta_size   H    帧间隔的字节数（4或8）
+    count        Q    帧数
+    first_ns     q    第一帧时间戳（perf_counter_ns时基）
+    start_wall   q    第一帧对应的墙上时间（time.time_ns），未知时为0
+    refresh_hint d    标称刷新率（Hz），未知时为NaN
+    source       16s  信号源名称（ASCII，右侧补0）
+    reserved     8s
+"""
+
+import os
+import struct
+from typing import Optional
+
+import numpy as np
+
+TRACE_MAGIC = b'FTRC'
+TRACE_VERSION = 1
+TRACE_SUFFIX = '.ftrace'
+
+_HEADER = struct.Struct('<4sHHQqqd16s8x')
+HEADER_SIZE = _HEADER.size  # 64
+
+_INT32_MAX = np.iinfo(np.int32).max
+
+
+class FrameTrace:
+    """已加载的帧时间戳记录，帧间隔为内存映射的零拷贝视图"""
+
+    def __init__(self, path: str, deltas: np.ndarray, count: int, first_ns: int, start_wall_ns: int,
+                 refresh_hint: Optional[float], source: str):
+        self.path = path
+        self.deltas = deltas  # 帧间隔（纳秒），np.memmap
+        self.count = count
+        self.first_ns = first_ns
+        self.start_wall_ns = start_wall_ns
+        self.refresh_hint = refresh_hint
+        self.source = source
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def intervals(self) -> np.ndarray:
+        """帧间隔（毫秒）"""
+        return self.deltas / 1_000_000
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """还原帧时间戳（纳秒），需要一次累加，会生成新数组"""
+        timestamps = np.empty(self.count, dtype=np.int64)
+        if self.count:
+            timestamps[0] = self.first_ns
+            np.cumsum(self.deltas, out=timestamps[1:], dtype=np.int64)
+            timestamps[1:] += self.first_ns
+        return timestamps
+
+    def wall_time(self, index: int = 0) -> int:
+        """第index帧的墙上时间（time.time_ns），记录中没有墙上时间时返回0"""
+        if not self.start_wall_ns:
+            return 0
+        offset = int(np.sum(self.deltas[:index], dtype=np.int64)) if index else 0
+        return self.start_wall_ns + offset
+
+
+def save_trace(path: str, timestamps_ns: np.ndarray, start_wall_ns: int = 0, source: str = '',
+               refresh_hint: Optional[float] = None) -> str:
+    """
+    保存帧时间戳
+
+    Args:
+        path: 文件路径
+        timestamps_ns: 帧时间戳（纳秒）
+        start_wall_ns: 第一帧对应的墙上时间（time.time_ns）
+        source: 信号源名称
+        refresh_hint: 标称刷新率（Hz）
+    Returns:
+        文件路径
+    """
+    timestamps_ns = np.asarray(timestamps_ns, dtype=np.int64)
+    deltas = np.diff(timestamps_ns)
+    if len(deltas) and (deltas.min() < 0 or deltas.max() > _INT32_MAX):
+        deltas = deltas.astype('<i8', copy=False)
+    else:
+        deltas = deltas.astype('<i4')
+    header = _HEADER.pack(
+        TRACE_MAGIC, TRACE_VERSION, deltas.itemsize, len(timestamps_ns),
+        int(timestamps_ns[0]) if len(timestamps_ns) else 0, int(start_wall_ns),
+        float('nan') if refresh_hint is None else float(refresh_hint),
+        source.encode('ascii', errors='replace')[:16]
+    )
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    with open(path, 'wb') as f:
+        f.write(header)
+        f.write(deltas.tobytes())
+    return path
+
+
+def load_trace(path: str) -> FrameTrace:
+    """
+    加载帧时间戳记录，帧间隔块以只读方式内存映射
+
+    Raises:
+        ValueError: 文件格式不正确
+    """
+    with open(path, 'rb') as f:
+        raw = f.read(HEADER_SIZE)
+    if len(raw) < HEADER_SIZE:
+        raise ValueError(f"帧记录文件头不完整: {path}")
+    magic, version, delta_size, count, first_ns, start_wall_ns, refresh_hint, source = _HEADER.unpack(raw)
+    if magic != TRACE_MAGIC:
+        raise ValueError(f"不是帧记录文件: {path}")
+    if version > TRACE_VERSION:
+        raise ValueError(f"不支持的帧记录版本 {version}: {path}")
+    if delta_size not in (4, 8):
+        raise ValueError(f"帧间隔字节数错误 {delta_size}: {path}")
+
+    n_deltas = max(count - 1, 0)
+    if os.path.getsize(path) < HEADER_SIZE + n_deltas * delta_size:
+        raise ValueError(f"帧记录文件被截断: {path}")
+    dtype = np.dtype('<i4' if delta_size == 4 else '<i8')
+    if n_deltas:
+        deltas = np.memmap(path, dtype=dtype, mode='r', offset=HEADER_SIZE, shape=(n_deltas,))
+    else:
+        deltas = np.zeros(0, dtype=dtype)
+    return FrameTrace(
+        path=path,
+        deltas=deltas,
+        count=count,
+        first_ns=first_ns,
+        start_wall_ns=start_wall_ns,
+        refresh_hint=None if np.isnan(refresh_hint) else refresh_hint,
+        source=source.rstrip(b'\0').decode('ascii', errors='replace'),
+    )
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : io_monitor.py
+@Time    : 2025/03/19
+@Author  : Bruce.Si
+@Desc    : 磁盘和网络吞吐监听
+    - 每个采样周期只调用一次 psutil.disk_io_counters(perdisk=True) 和 net_io_counters(pernic=True)
+    - 速率由当前快照与上一次快照做向量化差分得到
+    - 处理32位计数器回绕、计数器重置以及设备的出现和消失
+"""
+
+from typing import Dict, List, Sequence
+
+import numpy as np
+import psutil
+
+from common.metric_provider import MetricProvider
+
+_WRAP_32 = np.uint64(1 << 32)
+_HALF_32 = np.uint64(1 << 31)
+
+
+class CounterRates:
+    """一组设备累计计数器的差分速率计算"""
+
+    def __init__(self, fields: Sequence[str]):
+        """
+        Args:
+            fields: 计数器字段名，例如 ('read_bytes', 'write_bytes')
+        """
+        self.fields = tuple(fields)
+        self.devices: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._prev = np.zeros((0, len(self.fields)), dtype=np.uint64)
+        self._valid = np.zeros(0, dtype=bool)
+        self._prev_ts = None
+
+    def _ensure_devices(self, names):
+        """登记新出现的设备"""
+        new = [name for name in names if name not in self._index]
+        if not new:
+            return
+        for name in new:
+            self._index[name] = len(self.devices)
+            self.devices.append(name)
+        self._prev = np.concatenate([self._prev, np.zeros((len(new), len(self.fields)), dtype=np.uint64)])
+        self._valid = np.concatenate([self._valid, np.zeros(len(new), dtype=bool)])
+
+    def update(self, counters: Dict, timestamp_ns: int) -> np.ndarray:
+        """
+        输入一次计数器快照，返回每个设备每个字段的速率（每秒）
+
+        Args:
+            counters: psutil返回的 设备名 -> namedtuple 字典
+            timestamp_ns: 快照时间戳（纳秒）
+        Returns:
+            形状为 (设备数, 字段数) 的float64数组，无法计算的位置为NaN
+        """
+        self._ensure_devices(counters)
+        present = np.zeros(len(self.devices), dtype=bool)
+        cur = self._prev.copy()
+        for name, counter in counters.items():
+            idx = self._index[name]
+            present[idx] = True
+            cur[idx] = [getattr(counter, field) for field in self.fields]
+
+        rates = np.full(cur.shape, np.nan)
+        if self._prev_ts is not None and timestamp_ns > self._prev_ts:
+            dt = (timestamp_ns - self._prev_ts) / 1e9
+            prev = self._prev
+            # uint64减法自带 2^64 取模
+            delta = cur - prev
+            wrapped = cur < prev
+            # 上一次的值在32位范围内且回绕后的增量小于半个量程，按32位计数器回绕处理；否则视为计数器重置
+            wrap32 = wrapped & (prev < _WRAP_32)
+            delta[wrap32] = cur[wrap32] + (_WRAP_32 - prev[wrap32])
+            wrap32 &= delta < _HALF_32
+            ok = (present & self._valid)[:, None] & ~(wrapped & ~wrap32)
+            np.divide(delta, dt, out=rates, where=ok)
+
+        # 消失的设备不再保留旧快照，再次出现时重新开始
+        self._prev = cur
+        self._valid = present
+        self._prev_ts = timestamp_ns
+        return rates
+
+    def reset(self):
+        """丢弃上一次快照"""
+        self._valid[:] = False
+        self._prev_ts = None
+
+
+class DiskNetProvider(MetricProvider):
+    """逐磁盘读写吞吐、IOPS和逐网卡吞吐"""
+    name = "disk_net"
+
+    DISK_FIELDS = ('read_bytes', 'write_bytes', 'read_count', 'write_count')
+    DISK_COLUMNS = ('read_bps', 'write_bps', 'read_iops', 'write_iops')
+    NET_FIELDS = ('bytes_sent', 'bytes_recv')
+    NET_COLUMNS = ('sent_bps', 'recv_bps')
+
+    def __init__(self, disks: bool = True, nics: bool = True):
+        """
+        Args:
+            disks: 是否采集磁盘
+            nics: 是否采集网卡
+        """
+        self.disks = disks
+        self.nics = nics
+        self.disk_rates = CounterRates(self.DISK_FIELDS)
+        self.net_rates = CounterRates(self.NET_FIELDS)
+        self._disk_names: List[List[str]] = []
+        self._net_names: List[List[str]] = []
+
+    def open(self):
+        self.disk_rates.reset()
+        self.net_rates.reset()
+
+    @staticmethod
+    def _column_names(prefix, devices, columns, cache):
+        """按设备生成列名，结果缓存避免每个周期重复拼接字符串"""
+        for device in devices[len(cache):]:
+            cache.append([f"{prefix}_{device}_{column}" for column in columns])
+        return cache
+
+    def _collect(self, rates, values, prefix, columns, cache, result):
+        names = self._column_names(prefix, rates.devices, columns, cache)
+        for i, device_columns in enumerate(names):
+            for j, column in enumerate(device_columns):
+                result[column] = values[i, j]
+        # 全部设备求和，便于绘图和摘要
+        with np.errstate(invalid='ignore'):
+            valid = ~np.isnan(values).all(axis=0)
+            totals = np.nansum(values, axis=0)
+        for j, column in enumerate(columns):
+            result[f"{prefix}_{column}"] = totals[j] if valid[j] else np.nan
+
+    def sample(self, timestamp_ns: int) -> Dict[str, float]:
+        result = {}
+        if self.disks:
+            counters = psutil.disk_io_counters(perdisk=True) or {}
+            values = self.disk_rates.update(counters, timestamp_ns)
+            self._collect(self.disk_rates, values, 'disk', self.DISK_COLUMNS, self._disk_names, result)
+        if self.nics:
+            counters = psutil.net_io_counters(pernic=True) or {}
+            values = self.net_rates.update(counters, timestamp_ns)
+            self._collect(self.net_rates, values, 'net', self.NET_COLUMNS, self._net_names, result)
+        return result
@@ -12,7 +12,6 @@ from typing import Dict, Set, Optional, Callable
 import time
 from datetime import datetime
 from common.logger import Logger
-import keyboard as key
 
 
 class KeyboardMonitor:
@@ -182,6 +181,7 @@ def main():
     """
     独立运行时的入口函数
     """
+    import keyboard as key
     from common.logger import create_logger
     
     # 创建日志器
@@ -189,7 +189,8 @@ def main():
         name="keyboard_monitor",
         level="DEBUG",
         time_rotating=True,
-        when='midnight'
+        when='midnight',
+        async_mode=True
     )
     
     # 创建监控实例，设置目标组合键为 Win+D
@@ -17,12 +17,15 @@ from datetime import datetime
 import time
 from typing import Optional
 from common.logger import create_logger, Logger
+from common.cadence import AdaptiveCadence
 
 class LockScreenMonitor:
-    def __init__(self, logger: Logger):
+    def __init__(self, logger: Logger, cadence: AdaptiveCadence = None):
         self.logger = logger
         self.is_monitoring = False
         self.last_state = False
+        # 自适应轮询节奏：空闲时慢速轮询，触发或检测到变化后短时间高频轮询
+        self.cadence = cadence if cadence is not None else AdaptiveCadence()
         
         # 定义Windows API常量
         self.DESKTOP_SWITCHDESKTOP = 0x0100
@@ -70,6 +73,7 @@ class LockScreenMonitor:
                 
                 # 检测状态变化
                 if current_state != self.last_state:
+                    self.cadence.notify_change()
                     now = datetime.now()
                     duration = (now - last_change_time).total_seconds() * 1000  # 转换为毫秒
                     
@@ -84,8 +88,8 @@ class LockScreenMonitor:
                     self.last_state = current_state
                     last_change_time = now
                 
-                # 降低CPU使用率，但保持较快的响应速度
-                time.sleep(0.001)  # 1ms延迟
+                # 空闲时慢速轮询降低CPU占用，状态变化后短时间内高频轮询
+                self.cadence.wait()
                 
         except KeyboardInterrupt:
             self.logger.info("监控被手动中断")
@@ -4,16 +4,97 @@
 @Time    : 2025/01/06
 @Author  : Bruce.Si
 @Desc    : 通用日志类
+    - 异步模式：日志记录放入有界队列，由后台线程写文件和控制台，热路径上一次日志调用只是一次入队
+    - 队列满时按丢弃策略处理并计数，进程退出（包括multiprocessing子进程）时写完队列中剩余的日志
 """
 
 import logging
 import os
+import queue
 import sys
+import threading
 from datetime import datetime
-from logging.handlers import RotatingFileHandler, TimedRotatingFileHandler
+from logging.handlers import RotatingFileHandler, TimedRotatingFileHandler, QueueHandler, QueueListener
 from typing import Optional, Union, Dict
 import json
 
+# 异步模式下队列的默认容量（条）
+LOG_QUEUE_SIZE = 10000
+
+# 队列满时的处理方式：丢弃新日志、丢弃最旧的日志、阻塞等待
+DROP_NEW = 'drop_new'
+DROP_OLD = 'drop_old'
+BLOCK = 'block'
+DROP_POLICIES = (DROP_NEW, DROP_OLD, BLOCK)
+
+
+class BoundedQueueListener(QueueListener):
+    """写入线程：结束标记阻塞入队，队列恰好满时停止不会抛出queue.Full"""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    有界队列处理器：调用线程只做入队，格式化和写入由QueueListener线程完成
+    """
+
+    def __init__(self, log_queue: queue.Queue, drop_policy: str = DROP_NEW):
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"不支持的丢弃策略: {drop_policy}，可选 {DROP_POLICIES}")
+        super().__init__(log_queue)
+        self.drop_policy = drop_policy
+        self.enqueued = 0
+        self.dropped = 0
+        self.dropped_by_level: Dict[str, int] = {}
+        self._count_lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        入队前只固定消息内容，不在调用线程格式化
+        参数和异常在入队时转成字符串，避免写入前被调用方修改或长时间持有栈帧
+        """
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        """按丢弃策略入队"""
+        if self.drop_policy == BLOCK:
+            self.queue.put(record)
+        else:
+            try:
+                self.queue.put_nowait(record)
+            except queue.Full:
+                if self.drop_policy == DROP_NEW:
+                    self._count_drop(record)
+                    return
+                # 丢弃最旧的一条后重试，写入线程可能同时取走队首
+                while True:
+                    try:
+                        self._count_drop(self.queue.get_nowait())
+                    except queue.Empty:
+                        pass
+                    try:
+                        self.queue.put_nowait(record)
+                        break
+                    except queue.Full:
+                        continue
+        # 钩子回调和各监听线程并发写日志，计数与丢弃计数使用同一把锁
+        with self._count_lock:
+            self.enqueued += 1
+
+    def _count_drop(self, record: logging.LogRecord):
+        with self._count_lock:
+            self.dropped += 1
+            self.dropped_by_level[record.levelname] = self.dropped_by_level.get(record.levelname, 0) + 1
+
+
 class Logger:
     """
     通用日志类，支持控制台和文件输出，支持日志轮转
@@ -31,7 +112,10 @@ class Logger:
         encoding: str = 'utf-8',
         time_rotating: bool = False,
         when: str = 'midnight',
-        format_string: Optional[str] = None
+        format_string: Optional[str] = None,
+        async_mode: bool = False,
+        queue_size: int = LOG_QUEUE_SIZE,
+        drop_policy: str = DROP_NEW
     ):
         """
         初始化日志器
@@ -48,12 +132,20 @@ class Logger:
             time_rotating: 是否按时间轮转
             when: 时间轮转周期 ('S', 'M', 'H', 'D', 'midnight')
             format_string: 自定义日志格式
+            async_mode: 异步模式，由后台线程写文件和控制台，用于鼠标、键盘钩子回调和窗口轮询等热路径
+            queue_size: 异步模式下队列容量（条）
+            drop_policy: 队列满时的处理方式 drop_new（丢弃新日志）/ drop_old（丢弃最旧的日志）/ block（阻塞等待）
         """
         self.name = name
         self.level = getattr(logging, level.upper())
         self.log_dir = log_dir
         self.console_output = console_output
         self.encoding = encoding
+        self.async_mode = async_mode
+        self.queue_size = queue_size
+        self.drop_policy = drop_policy
+        self.queue_handler: Optional[BoundedQueueHandler] = None
+        self.listener: Optional[BoundedQueueListener] = None
         
         # 创建日志目录
         if not os.path.exists(log_dir):
@@ -103,7 +195,9 @@ class Logger:
     ):
         """添加日志处理器"""
         # 清除现有处理器
+        self.close()
         self.logger.handlers = []
+        handlers = []
         
         # 添加文件处理器
         if time_rotating:
@@ -122,13 +216,27 @@ class Logger:
             )
         
         file_handler.setFormatter(self.formatter)
-        self.logger.addHandler(file_handler)
+        handlers.append(file_handler)
         
         # 添加控制台处理器
         if self.console_output:
             console_handler = logging.StreamHandler(sys.stdout)
             console_handler.setFormatter(self.formatter)
-            self.logger.addHandler(console_handler)
+            handlers.append(console_handler)
+
+        if not self.async_mode:
+            for handler in handlers:
+                self.logger.addHandler(handler)
+            return
+
+        # 异步模式：日志器上只挂队列处理器，文件和控制台处理器由写入线程调用
+        self.queue_handler = BoundedQueueHandler(queue.Queue(self.queue_size), self.drop_policy)
+        self.listener = BoundedQueueListener(self.queue_handler.queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+        self.logger.addHandler(self.queue_handler)
+        # 子进程退出时不执行atexit，通过multiprocessing的退出回调保证主进程和子进程都写完剩余日志
+        from multiprocessing import util
+        util.Finalize(self, self.close, exitpriority=10)
 
     def debug(self, message: Union[str, Dict], *args, **kwargs):
         """记录调试级别日志"""
@@ -163,6 +271,44 @@ class Logger:
         """动态设置日志级别"""
         self.logger.setLevel(getattr(logging, level.upper()))
 
+    def stats(self) -> Dict:
+        """
+        异步模式的队列统计
+
+        Returns:
+            async_mode: 是否异步模式
+            enqueued / dropped: 入队和丢弃的日志条数，dropped_by_level 为按级别的丢弃条数
+            pending: 队列中尚未写入的条数
+        """
+        handler = self.queue_handler
+        if handler is None:
+            return {'async_mode': False, 'enqueued': 0, 'dropped': 0, 'dropped_by_level': {}, 'pending': 0}
+        return {
+            'async_mode': True,
+            'enqueued': handler.enqueued,
+            'dropped': handler.dropped,
+            'dropped_by_level': dict(handler.dropped_by_level),
+            'pending': handler.queue.qsize(),
+        }
+
+    def close(self):
+        """异步模式下写完队列中剩余的日志并停止写入线程，可重复调用"""
+        listener, self.listener = self.listener, None
+        if listener is None:
+            return
+        handler = self.queue_handler
+        self.logger.removeHandler(handler)
+        listener.stop()
+        if handler.dropped:
+            # 写入线程已退出，丢弃统计直接交给文件和控制台处理器
+            record = self.logger.makeRecord(
+                self.name, logging.WARNING, __file__, 0,
+                f"日志队列已满，共丢弃 {handler.dropped} 条日志 {handler.dropped_by_level}", None, None, func="close")
+            for target in listener.handlers:
+                target.handle(record)
+        for target in listener.handlers:
+            target.close()
+
 def create_logger(name: str, **kwargs) -> Logger:
     """
     创建日志器的工厂方法
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : metric_provider.py
+@Time    : 2025/03/19
+@Author  : Bruce.Si
+@Desc    : 指标采集提供者基类
+    - 监听器每个采样周期调用一次 sample()，返回 列名 -> 数值 的字典
+    - 返回的数值会写入监听器的列式存储，缺失值可以直接省略
+"""
+
+from typing import Dict
+
+
+class MetricProvider:
+    """指标采集提供者"""
+    name = "provider"
+
+    def open(self):
+        """开始采集前调用，用于建立连接或读取初始快照"""
+
+    def sample(self, timestamp_ns: int) -> Dict[str, float]:
+        """
+        采集一次数据
+
+        Args:
+            timestamp_ns: 本次采样的时间戳（纳秒），同一周期内所有提供者共用
+        Returns:
+            列名到数值的字典
+        """
+        return {}
+
+    def close(self):
+        """停止采集后调用，用于释放资源"""
@@ -12,8 +12,6 @@
 """
 import threading
 
-from PyQt5.QtWidgets import QApplication, QWidget
-from PyQt5.QtCore import Qt, QObject
 from datetime import datetime
 import win32api
 import win32gui
@@ -21,6 +19,11 @@ import win32con
 import time
 import sys
 from common.logger import create_logger, Logger
+from common.precision_timer import Ticker
+
+# 鼠标轮询间隔（秒），检测时延不超过两个间隔
+MOUSE_POLL_INTERVAL = 0.001
+
 
 class MouseMonitor:
     """
@@ -41,6 +44,7 @@ class MouseMonitor:
         # 获取上次鼠标状态
         self.last_state = win32api.GetKeyState(win32con.VK_LBUTTON)
         self.last_pos = win32api.GetCursorPos()
+        ticker = Ticker(MOUSE_POLL_INTERVAL, slack=MOUSE_POLL_INTERVAL)
         while self.is_running:
             # 检查ESC键
             if win32api.GetAsyncKeyState(win32con.VK_ESCAPE):
@@ -66,7 +70,7 @@ class MouseMonitor:
                     self.logger.info(pos_info)
             self.last_pos = current_pos
             self.last_state = current_state
-            time.sleep(0.00001)  # 降低CPU使用率，同时保持较高精度
+            ticker.wait()  # 固定1毫秒节拍，降低CPU使用率，同时保持较高精度
 
     def on_mouse_press(self):
         self.press_time = datetime.now()
@@ -114,8 +118,12 @@ if __name__ == '__main__':
             name="mouse_monitor",
             level="INFO",
             time_rotating=True,
-            when='midnight'
+            when='midnight',
+            async_mode=True
         )
+    # Qt只在独立运行时使用，避免子进程导入时加载
+    from PyQt5.QtWidgets import QApplication, QWidget
+
     app = QApplication(sys.argv)
     window = QWidget()
     monitor = MouseMonitor(logger=logger)
@@ -123,8 +131,9 @@ if __name__ == '__main__':
     # 启动监听
     try:
         monitor.start_monitoring()
-        while monitor.is_monitoring:
-            time.sleep(0.00001)
+        # 带超时的join，Windows下主线程仍能响应Ctrl+C
+        while monitor.monitor_thread.is_alive():
+            monitor.monitor_thread.join(0.5)
     except KeyboardInterrupt:
         monitor.stop_monitoring()
     sys.exit()
\ No newline at end of file
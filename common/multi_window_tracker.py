@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : multi_window_tracker.py
+@Time    : 2025/04/06
+@Author  : Bruce.Si
+@Desc    : 多窗口几何信息批量采样
+    - 目标为窗口句柄或标题正则，开始时枚举一次顶层窗口完成解析，之后不再枚举
+    - 每个节拍一次遍历读取全部窗口的矩形和状态，写入 (时间 × 窗口 × 字段) 的int32数组
+    - 采样过程中逐帧维护每个窗口最后一次变化的时刻，可在线判断整个布局是否已稳定
+    - 离线分析向量化计算每个窗口的首次变化、最后变化，以及整个布局的稳定时刻（全部窗口完成时延）
+    - 分屏、一键恢复窗口等多窗口场景用一个采样线程代替每个窗口一个监听进程
+"""
+
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+from common.logger import create_logger, Logger
+from common.window_backend import WindowBackend, Win32WindowBackend, GEOMETRY_FIELDS
+from common.precision_timer import Ticker
+from common.trajectory_analysis import SETTLE_TIME
+
+# 默认采样间隔（秒）
+TRACKER_INTERVAL = 0.005
+
+# 采样缓冲区初始容量：200Hz下约10秒
+TRACKER_CHUNK = 2048
+
+
+class MultiWindowTracker:
+    """多窗口几何信息批量采样"""
+
+    def __init__(self, logger: Logger, targets: Iterable[Union[int, str]] = None, backend: WindowBackend = None,
+                 interval: float = TRACKER_INTERVAL, settle_time: float = SETTLE_TIME):
+        """
+        Args:
+            logger: 日志器
+            targets: 窗口句柄或标题正则（re.search），一个正则可匹配多个窗口；不指定时跟踪全部可见的有标题窗口
+            backend: 窗口信息后端，默认win32gui
+            interval: 采样间隔（秒）
+            settle_time: 所有窗口都保持不变超过该时长（毫秒）视为布局已稳定
+        """
+        self.targets = list(targets) if targets is not None else None
+        self.backend = backend if backend is not None else Win32WindowBackend()
+        self.interval = interval
+        self.settle_ns = int(settle_time * 1_000_000)
+        self.hwnds: List[int] = []
+        self.titles: Dict[int, str] = {}
+        self._resolved = False
+        self._timestamps = np.empty(0, dtype=np.int64)
+        self._geometry = np.zeros((0, 0, len(GEOMETRY_FIELDS)), dtype=np.int32)
+        self._valid = np.zeros((0, 0), dtype=bool)
+        self._count = 0
+        # 在线稳定判断：每个窗口第一次和最后一次变化的时刻，未变化为-1
+        self._first_change = np.zeros(0, dtype=np.int64)
+        self._last_change = np.zeros(0, dtype=np.int64)
+        self.is_monitoring = False
+        self.monitor_thread = None
+        self._stop_event = threading.Event()
+
+        # 初始化日志器
+        self.logger = logger
+
+    def resolve(self) -> List[int]:
+        """
+        解析目标窗口，只枚举一次顶层窗口
+
+        Returns:
+            跟踪的窗口句柄
+        """
+        windows = self.backend.list_windows()
+        if self.targets is None:
+            hwnds = list(windows)
+        else:
+            hwnds = []
+            for target in self.targets:
+                if isinstance(target, int):
+                    matched = [target]
+                else:
+                    pattern = re.compile(target)
+                    matched = [hwnd for hwnd, title in windows.items() if pattern.search(title)]
+                    if not matched:
+                        self.logger.warning(f"没有标题匹配 {target!r} 的窗口")
+                hwnds.extend(hwnd for hwnd in matched if hwnd not in hwnds)
+        self.hwnds = hwnds
+        self.titles = {hwnd: windows.get(hwnd, "") for hwnd in hwnds}
+        self._resolved = True
+        return self.hwnds
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """采样时间戳（perf_counter_ns）的零拷贝视图"""
+        return self._timestamps[:self._count]
+
+    @property
+    def geometry(self) -> np.ndarray:
+        """几何信息 (采样数, 窗口数, 字段数) 的零拷贝视图，字段见 GEOMETRY_FIELDS"""
+        return self._geometry[:self._count]
+
+    @property
+    def valid(self) -> np.ndarray:
+        """窗口是否存在 (采样数, 窗口数)"""
+        return self._valid[:self._count]
+
+    def reset(self):
+        """清空采样，首次调用时解析目标窗口"""
+        if not self._resolved:
+            self.resolve()
+        windows = len(self.hwnds)
+        self._timestamps = np.empty(TRACKER_CHUNK, dtype=np.int64)
+        self._geometry = np.zeros((TRACKER_CHUNK, windows, len(GEOMETRY_FIELDS)), dtype=np.int32)
+        self._valid = np.zeros((TRACKER_CHUNK, windows), dtype=bool)
+        self._count = 0
+        self._first_change = np.full(windows, -1, dtype=np.int64)
+        self._last_change = np.full(windows, -1, dtype=np.int64)
+
+    def _grow(self):
+        """缓冲区扩容，成倍增长"""
+        size = len(self._timestamps) * 2
+        timestamps = np.empty(size, dtype=np.int64)
+        geometry = np.zeros((size,) + self._geometry.shape[1:], dtype=np.int32)
+        valid = np.zeros((size, self._valid.shape[1]), dtype=bool)
+        timestamps[:self._count] = self._timestamps[:self._count]
+        geometry[:self._count] = self._geometry[:self._count]
+        valid[:self._count] = self._valid[:self._count]
+        self._timestamps, self._geometry, self._valid = timestamps, geometry, valid
+
+    def record_sample(self) -> int:
+        """
+        一次遍历采样全部窗口
+
+        Returns:
+            采样时间戳（perf_counter_ns）
+        """
+        if self._count == len(self._timestamps):
+            self._grow()
+        index = self._count
+        timestamp = time.perf_counter_ns()
+        self._timestamps[index] = timestamp
+        row = self._geometry[index]
+        valid = self.backend.geometry(self.hwnds, row)
+        self._valid[index] = valid
+        if index:
+            changed = np.any(row != self._geometry[index - 1], axis=1) | (valid != self._valid[index - 1])
+            if changed.any():
+                self._first_change[changed & (self._first_change < 0)] = timestamp
+                self._last_change[changed] = timestamp
+        self._count += 1
+        return timestamp
+
+    def layout_settled(self, now: int = None) -> Optional[int]:
+        """
+        在线判断整个布局是否已稳定
+
+        Args:
+            now: 当前时刻（perf_counter_ns），默认为最后一次采样时刻
+        Returns:
+            布局稳定的时刻（最后一个窗口最后一次变化的采样时刻）；还没有窗口变化或仍在变化时返回None
+        """
+        if not len(self._last_change) or self._last_change.max() < 0:
+            return None
+        if now is None:
+            now = int(self._timestamps[self._count - 1])
+        settled_ns = int(self._last_change.max())
+        return settled_ns if now - settled_ns >= self.settle_ns else None
+
+    def analyze(self, start_ns: int = None) -> Dict:
+        """
+        向量化分析采样记录
+
+        Args:
+            start_ns: 操作开始时刻（perf_counter_ns），默认为第一次采样时刻
+        Returns:
+            windows: 每个窗口的 {hwnd, title, changes, response_ms, complete_ms, final}
+                     response_ms / complete_ms 为首次和最后一次变化相对开始时刻的时延，未变化时为None
+            changed_windows: 发生变化的窗口数
+            response_ms: 第一个窗口开始变化的时延
+            complete_ms: 全部窗口完成（布局最后一次变化）的时延
+            settled: 记录结束时布局是否已保持稳定超过settle_time
+        """
+        timestamps = self.timestamps
+        result = {'windows': [], 'changed_windows': 0, 'response_ms': None, 'complete_ms': None, 'settled': False}
+        if len(timestamps) < 2 or not self.hwnds:
+            return result
+        if start_ns is None:
+            start_ns = int(timestamps[0])
+
+        geometry = self.geometry
+        valid = self.valid
+        changed = np.any(np.diff(geometry, axis=0) != 0, axis=2) | (np.diff(valid, axis=0) != 0)
+        counts = changed.sum(axis=0)
+        any_change = counts > 0
+        first = np.argmax(changed, axis=0) + 1
+        last = len(changed) - np.argmax(changed[::-1], axis=0)
+        first_ms = (timestamps[first] - start_ns) / 1_000_000
+        last_ms = (timestamps[last] - start_ns) / 1_000_000
+
+        for k, hwnd in enumerate(self.hwnds):
+            result['windows'].append({
+                'hwnd': hwnd,
+                'title': self.titles.get(hwnd, ""),
+                'changes': int(counts[k]),
+                'response_ms': float(first_ms[k]) if any_change[k] else None,
+                'complete_ms': float(last_ms[k]) if any_change[k] else None,
+                'final': dict(zip(GEOMETRY_FIELDS, geometry[-1, k].tolist())) if valid[-1, k] else None,
+            })
+        if any_change.any():
+            result['changed_windows'] = int(any_change.sum())
+            result['response_ms'] = float(first_ms[any_change].min())
+            result['complete_ms'] = float(last_ms[any_change].max())
+            settled_ns = int(timestamps[last[any_change].max()])
+            result['settled'] = int(timestamps[-1]) - settled_ns >= self.settle_ns
+        return result
+
+    def results_analysis(self, start_ns: int = None) -> Dict:
+        """分析并输出结果"""
+        result = self.analyze(start_ns)
+        lines = [f"\n多窗口布局: {self._count} 次采样, {len(self.hwnds)} 个窗口, {result['changed_windows']} 个发生变化"]
+        for window in result['windows']:
+            if window['changes']:
+                lines.append(f"[{window['hwnd']}] {window['title']}: 变化{window['changes']}次, "
+                             f"响应 {window['response_ms']:.2f}ms, 完成 {window['complete_ms']:.2f}ms")
+        if result['complete_ms'] is not None:
+            lines.append(f"首个窗口响应时延: {result['response_ms']:.2f}ms")
+            lines.append(f"全部窗口完成时延: {result['complete_ms']:.2f}ms"
+                         f"{'' if result['settled'] else '（记录结束时仍未稳定）'}")
+        self.logger.info("\n".join(lines))
+        return result
+
+    def _monitor_loop(self):
+        """采样线程"""
+        ticker = Ticker(self.interval)
+        while not self._stop_event.is_set():
+            try:
+                self.record_sample()
+            except Exception as e:
+                self.logger.error(f"多窗口采样出错: {e}")
+                break
+            ticker.wait()
+        self.is_monitoring = False
+
+    def start_monitoring(self):
+        """开始采样，在后台线程中运行，立即返回"""
+        if self.is_monitoring:
+            return
+        self.reset()
+        self._stop_event.clear()
+        self.is_monitoring = True
+        self.monitor_thread = threading.Thread(target=self._monitor_loop, name="MultiWindowTracker", daemon=True)
+        self.monitor_thread.start()
+        self.logger.info(f"多窗口采样已启动，跟踪 {len(self.hwnds)} 个窗口")
+
+    def stop_monitoring(self):
+        """停止采样"""
+        self._stop_event.set()
+        if self.monitor_thread and self.monitor_thread is not threading.current_thread():
+            self.monitor_thread.join()
+        self.monitor_thread = None
+        self.is_monitoring = False
+        self.logger.info("多窗口采样已停止")
+
+    def capture(self, duration: float, until_settled: bool = False) -> Optional[int]:
+        """
+        在当前线程中同步采样
+
+        Args:
+            duration: 最长采样时长（秒）
+            until_settled: 布局发生变化并稳定后立即结束
+        Returns:
+            布局稳定的时刻（perf_counter_ns），未变化或未稳定时为None
+        """
+        self.reset()
+        ticker = Ticker(self.interval)
+        deadline = time.perf_counter_ns() + int(duration * 1e9)
+        while True:
+            timestamp = self.record_sample()
+            if until_settled and self.layout_settled(timestamp) is not None:
+                break
+            if timestamp >= deadline:
+                break
+            ticker.wait()
+        return self.layout_settled()
+
+
+def main():
+    logger = create_logger(
+        name="multi_window_tracker",
+        level="INFO",
+        time_rotating=True,
+        when='midnight'
+    )
+    tracker = MultiWindowTracker(logger=logger)
+    print("5秒内调整窗口布局（分屏、最小化、恢复）...")
+    tracker.capture(duration=5, until_settled=True)
+    tracker.results_analysis()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : nvml_monitor.py
+@Time    : 2025/03/21
+@Author  : Bruce.Si
+@Desc    : 英伟达显卡NVML采集
+    - 整个会话只调用一次 nvmlInit/nvmlShutdown，并缓存所有显卡句柄
+    - 每个采样周期一次性读取使用率、显存、功耗、频率和温度
+    - 某项查询首次失败（显卡不支持）后不再重复调用
+    - 未安装pynvml或没有英伟达显卡时退化为空操作
+"""
+
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from common.metric_provider import MetricProvider
+
+# 所有可用的查询项
+NVML_QUERIES = ('utilization', 'memory', 'power', 'clocks', 'temperature')
+
+
+class NvmlProvider(MetricProvider):
+    """NVML多显卡采集"""
+    name = "nvml"
+
+    def __init__(self, queries: Optional[Iterable[str]] = None):
+        """
+        Args:
+            queries: 需要采集的查询项，默认全部，可选值见 NVML_QUERIES
+        """
+        self.queries = tuple(NVML_QUERIES if queries is None else queries)
+        self.available = False
+        self.device_count = 0
+        self._nvml = None
+        self._handles = []
+        # 每个显卡的查询列表: [(列名元组, 查询函数), ...]
+        self._device_queries: List[List[Tuple[Tuple[str, ...], Callable]]] = []
+
+    def open(self):
+        """初始化NVML并缓存句柄，失败时保持不可用状态"""
+        if self.available:
+            return
+        try:
+            import pynvml
+            pynvml.nvmlInit()
+        except Exception:
+            self._nvml = None
+            return
+
+        self._nvml = pynvml
+        try:
+            self.device_count = pynvml.nvmlDeviceGetCount()
+            self._handles = [pynvml.nvmlDeviceGetHandleByIndex(i) for i in range(self.device_count)]
+        except Exception:
+            pynvml.nvmlShutdown()
+            self._nvml = None
+            return
+        self._device_queries = [self._build_queries(i) for i in range(self.device_count)]
+        self.available = True
+
+    def _build_queries(self, index: int) -> List[Tuple[Tuple[str, ...], Callable]]:
+        """生成单个显卡的查询函数列表"""
+        nvml = self._nvml
+        prefix = f"gpu{index}"
+        table = {
+            'utilization': (
+                (f"{prefix}_util", f"{prefix}_mem_util"),
+                lambda h: self._rates(nvml.nvmlDeviceGetUtilizationRates(h)),
+            ),
+            'memory': (
+                (f"{prefix}_mem_used_mb", f"{prefix}_mem_percent"),
+                lambda h: self._memory(nvml.nvmlDeviceGetMemoryInfo(h)),
+            ),
+            'power': (
+                (f"{prefix}_power",),
+                # 单位为毫瓦
+                lambda h: (nvml.nvmlDeviceGetPowerUsage(h) / 1000.0,),
+            ),
+            'clocks': (
+                (f"{prefix}_clock_graphics_mhz", f"{prefix}_clock_sm_mhz", f"{prefix}_clock_mem_mhz"),
+                lambda h: (
+                    nvml.nvmlDeviceGetClockInfo(h, nvml.NVML_CLOCK_GRAPHICS),
+                    nvml.nvmlDeviceGetClockInfo(h, nvml.NVML_CLOCK_SM),
+                    nvml.nvmlDeviceGetClockInfo(h, nvml.NVML_CLOCK_MEM),
+                ),
+            ),
+            'temperature': (
+                (f"{prefix}_temperature",),
+                lambda h: (nvml.nvmlDeviceGetTemperature(h, nvml.NVML_TEMPERATURE_GPU),),
+            ),
+        }
+        return [table[query] for query in self.queries if query in table]
+
+    @staticmethod
+    def _rates(rates):
+        return rates.gpu, rates.memory
+
+    @staticmethod
+    def _memory(info):
+        return info.used / (1024 * 1024), info.used / info.total * 100 if info.total else None
+
+    def sample(self, timestamp_ns: int) -> Dict[str, float]:
+        result = {}
+        if not self.available:
+            return result
+        for handle, queries in zip(self._handles, self._device_queries):
+            unsupported = None
+            for query in queries:
+                columns, read = query
+                try:
+                    values = read(handle)
+                except Exception:
+                    # 不支持的查询只尝试一次
+                    unsupported = unsupported or []
+                    unsupported.append(query)
+                    continue
+                for column, value in zip(columns, values):
+                    result[column] = value
+            if unsupported:
+                for query in unsupported:
+                    queries.remove(query)
+        return result
+
+    def close(self):
+        """关闭NVML会话"""
+        if self.available and self._nvml is not None:
+            try:
+                self._nvml.nvmlShutdown()
+            except Exception:
+                pass
+        self.available = False
+        self._nvml = None
+        self._handles = []
+        self._device_queries = []
@@ -9,37 +9,43 @@
     - 监听GPU使用率
 @Version : 1.0
 """
-import pynvml
 import psutil
 import time
+from datetime import datetime
 from common.logger import create_logger, Logger
 from common.HWinfolog_monitor import HWINFOLOGMonitor
+from common.column_store import ColumnStore
+from common import plotting
+from common.metric_provider import MetricProvider
+from common.io_monitor import DiskNetProvider
+from common.nvml_monitor import NvmlProvider
+from common.precision_timer import Ticker
 import numpy as np
-import matplotlib.pyplot as plt
-from datetime import datetime
-from typing import Dict, List
-import pandas as pd
+from typing import Dict, List, Optional
 import threading
 
+# 性能指标列
+PERFORMANCE_METRICS = ['cpu_usage', 'memory_usage', 'gpu_usage']
+
 
 class PerformanceMonitor:
-    def __init__(self, logger: Logger):
+    def __init__(self, logger: Logger, providers: Optional[List[MetricProvider]] = None):
+        """
+        Args:
+            logger: 日志器
+            providers: 额外的指标提供者，默认采集磁盘、网络吞吐和英伟达显卡（无NVML时自动跳过）
+        """
         self.logger = logger
         self.is_monitoring = False
         self.last_state = 0
         self.monitor_thread = None
-        # 添加数据存储
-        self.performance_data = {
-            'timestamp': [],
-            'cpu_usage': [],
-            'memory_usage': [],
-            'disk_usage': [],
-            'network_sent': [],
-            'network_recv': [],
-            'gpu_usage': []
-        }
+        # 添加数据存储（列式float32存储，时间戳为int64纳秒）
+        self.performance_data = ColumnStore(PERFORMANCE_METRICS)
+        self.providers = [DiskNetProvider(), NvmlProvider()] if providers is None else list(providers)
         self.start_time = None
         self.end_time = None
+        # 墙上时间锚点：(time.time_ns, perf_counter_ns)，采样时间戳为单调时钟，只在显示时换算成墙上时间
+        self.wall_anchor = (time.time_ns(), time.perf_counter_ns())
 
     @staticmethod
     def get_cpu_usage(gpu_info):
@@ -53,18 +59,16 @@ class PerformanceMonitor:
 
     @staticmethod
     def get_gpu_usage(gpu_info):
-        # 英伟达显卡支持
-        # pynvml.nvmlInit()
-        # handle = pynvml.nvmlDeviceGetHandleByIndex(0)
-        # utilization = pynvml.nvmlDeviceGetUtilizationRates(handle)
-        # gpu_util = utilization.gpu
-        # pynvml.nvmlShutdown()
+        # 英伟达显卡数据由 NvmlProvider 采集，写入 gpu{序号}_util 等列
         if gpu_info:
             for gpu_name, info in gpu_info.items():
                 return float(info['gpu_usage'])
 
     def start_monitoring(self):
         if not self.is_monitoring:
+            for provider in self.providers:
+                provider.open()
+            self.wall_anchor = (time.time_ns(), time.perf_counter_ns())
             self.is_monitoring = True
             self.monitor_thread = threading.Thread(target=self.monitor)
             self.monitor_thread.daemon = True
@@ -75,19 +79,26 @@ class PerformanceMonitor:
         self.is_monitoring = False
         if self.monitor_thread:
             self.monitor_thread.join()
+        for provider in self.providers:
+            provider.close()
         self.logger.info("性能监听工具停止")
         
+    def wall_time(self, timestamp_ns: int) -> datetime:
+        """把perf_counter_ns采样时间戳换算成墙上时间"""
+        wall_ns, perf_ns = self.wall_anchor
+        return datetime.fromtimestamp((wall_ns + int(timestamp_ns) - perf_ns) / 1e9)
+
     def _clear_data(self):
         """清空历史数据"""
-        for key in self.performance_data:
-            self.performance_data[key] = []
+        self.performance_data.clear()
 
     # ... 保留原有的get_xxx_usage方法 ...
 
     def monitor(self):
-        """监控并收集性能数据"""
+        """监控并收集性能数据，按固定1秒节拍采样，不随读取耗时漂移"""
+        ticker = Ticker(1.0)
         while self.is_monitoring:
-            current_time = time.time()
+            current_time = time.perf_counter_ns()  # 单调时钟，不受系统对时影响
 
             hw_monitor = HWINFOLOGMonitor()
             hw_info = hw_monitor.read_gpu_info()
@@ -97,78 +108,90 @@ class PerformanceMonitor:
             memory_usage = self.get_memory_usage(hw_info)
             gpu_usage = self.get_gpu_usage(hw_info)
 
+            values = {
+                'cpu_usage': cpu_usage,
+                'memory_usage': memory_usage,
+                'gpu_usage': gpu_usage,
+            }
+            # 提供者与HWiNFO数据共用同一个时间戳
+            for provider in self.providers:
+                try:
+                    values.update(provider.sample(current_time))
+                except Exception as e:
+                    self.logger.error(f"{provider.name} 采集失败: {e}")
+
             # 存储数据
-            self.performance_data['timestamp'].append(current_time)
-            self.performance_data['cpu_usage'].append(cpu_usage)
-            self.performance_data['memory_usage'].append(memory_usage)
-            self.performance_data['gpu_usage'].append(gpu_usage)
+            self.performance_data.append(current_time, values)
 
             # 日志输出
             # self.logger.info(f"CPU使用率: {cpu_usage}%")
             # self.logger.info(f"内存使用率: {memory_usage}%")
             # self.logger.info(f"GPU使用率: {gpu_usage}%")
-            time.sleep(1)
+            ticker.wait()
 
     def get_performance_summary(self) -> Dict:
         """获取性能统计摘要"""
-        if not self.performance_data['timestamp']:
+        if not len(self.performance_data):
             return {}
 
-        summary = {}
-        for metric in ['cpu_usage', 'memory_usage', 'gpu_usage']:
-            data = self.performance_data[metric]
-            summary[metric] = {
-                'min': min(data),
-                'max': max(data),
-                'avg': round(sum(data) / len(data), 4),
-            }
-        return summary
-
-    def plot_performance_curves(self, save_path: str = None):
-        """绘制性能曲线图"""
-        # 加载中文字体，需要确保字体文件路径正确
-        plt.rcParams['font.sans-serif'] = ['SimHei']  # SimHei是一种常见的支持中文的字体，也可以替换为其他支持中文的字体名
-        plt.rcParams['axes.unicode_minus'] = False  # 解决负号'-'显示为方块的问题
-
-
-        if not self.performance_data['timestamp']:
+        # 按列向量化统计，NaN视为缺失值
+        return self.performance_data.summary(ndigits=4)
+
+    def to_numpy(self) -> Dict[str, np.ndarray]:
+        """导出性能数据为numpy数组视图（零拷贝），时间戳为perf_counter_ns，可用 wall_time() 换算"""
+        return self.performance_data.to_numpy()
+
+    def to_dataframe(self):
+        """导出性能数据为pandas DataFrame（零拷贝），索引为perf_counter_ns时间戳"""
+        return self.performance_data.to_dataframe()
+
+    def plot_performance_curves(self, save_path: str = None, background: bool = True):
+        """
+        绘制性能曲线图，每条曲线先降采样到像素量级
+        :param save_path: 保存路径，不指定时弹窗显示
+        :param background: 保存文件时是否在后台进程渲染
+        :return: 后台渲染时返回渲染进程，可调用 join() 等待完成
+        """
+        if not len(self.performance_data):
             self.logger.warning("没有可用的性能数据来绘制图表")
-            return
+            return None
 
         # 转换时间戳为相对时间（秒）
-        relative_time = np.array(self.performance_data['timestamp']) - self.performance_data['timestamp'][0]
-
-        # 创建子图
-        fig, axs = plt.subplots(3, 2, figsize=(15, 12))
-        fig.suptitle('性能监控报告', fontsize=16)
-
-        # CPU使用率
-        axs[0, 0].plot(relative_time, self.performance_data['cpu_usage'])
-        axs[0, 0].set_title('CPU使用率')
-        axs[0, 0].set_ylabel('%')
-
-        # 内存使用率
-        axs[0, 1].plot(relative_time, self.performance_data['memory_usage'])
-        axs[0, 1].set_title('内存使用率')
-        axs[0, 1].set_ylabel('%')
-
-        # GPU使用率
-        axs[1, 1].plot(relative_time, self.performance_data['gpu_usage'])
-        axs[1, 1].set_title('GPU使用率')
-        axs[1, 1].set_ylabel('%')
-
-        # 调整布局
-        plt.tight_layout()
+        timestamps = self.performance_data.timestamps
+        relative_time = (timestamps - timestamps[0]) / 1e9
+        column = self.performance_data.column
+
+        panels = [
+            {'pos': (0, 0), 'title': 'CPU使用率', 'ylabel': '%',
+             'series': [plotting.line(relative_time, column('cpu_usage'))]},
+            {'pos': (0, 1), 'title': '内存使用率', 'ylabel': '%',
+             'series': [plotting.line(relative_time, column('memory_usage'))]},
+            {'pos': (1, 1), 'title': 'GPU使用率', 'ylabel': '%',
+             'series': [plotting.line(relative_time, column('gpu_usage'))]},
+        ]
+        # 磁盘吞吐
+        if 'disk_read_bps' in self.performance_data:
+            panels.append({'pos': (2, 0), 'title': '磁盘吞吐', 'ylabel': 'MB/s', 'series': [
+                plotting.line(relative_time, column('disk_read_bps') / 1e6, label='读'),
+                plotting.line(relative_time, column('disk_write_bps') / 1e6, label='写'),
+            ]})
+        # 网络吞吐
+        if 'net_sent_bps' in self.performance_data:
+            panels.append({'pos': (2, 1), 'title': '网络吞吐', 'ylabel': 'MB/s', 'series': [
+                plotting.line(relative_time, column('net_sent_bps') / 1e6, label='发送'),
+                plotting.line(relative_time, column('net_recv_bps') / 1e6, label='接收'),
+            ]})
+        spec = plotting.panels_of(panels, layout=(3, 2), title='性能监控报告', figsize=(15, 12))
 
         # 保存或显示图表
+        if save_path and background:
+            process = plotting.render_in_background(spec, save_path)
+            self.logger.info(f"性能曲线图正在后台渲染: {save_path}")
+            return process
+        plotting.render(spec, save_path)
         if save_path:
-            plt.savefig(save_path)
             self.logger.info(f"性能曲线图已保存至: {save_path}")
-        else:
-            plt.show()
-
-        plt.close()
-
+        return None
 
 if __name__ == '__main__':
 
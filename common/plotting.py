@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : plotting.py
+@Time    : 2025/03/24
+@Author  : Bruce.Si
+@Desc    : 长时间数据的绘图工具
+    - 每条曲线先降采样到屏幕像素量级（每像素列保留最小/最大值包络，或LTTB）再交给matplotlib
+    - 保存文件时使用无界面的Agg画布，并可在后台进程中渲染，不阻塞监听进程
+    - 图表用可序列化的字典描述，便于传给后台进程
+"""
+
+import multiprocessing
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# 每条曲线最多绘制的点数，约等于图宽的像素数
+DEFAULT_MAX_POINTS = 2000
+
+# 中文字体，按顺序回退
+CHINESE_FONTS = ['Microsoft YaHei', 'SimHei', 'DejaVu Sans']
+
+_fonts_ready = False
+
+
+def minmax_envelope(x: np.ndarray, y: np.ndarray, buckets: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    最小/最大值包络降采样，每个桶保留最小值和最大值两个点，保证尖峰不会丢失
+
+    Args:
+        x: 横坐标（单调递增）
+        y: 纵坐标，NaN视为缺失
+        buckets: 桶数量（像素列数）
+    Returns:
+        降采样后的 (x, y)，点数不超过 2 * buckets
+    """
+    n = len(y)
+    if n <= 2 * buckets:
+        return x, y
+    size = -(-n // buckets)  # 向上取整
+    pad = size * buckets - n
+    lows = np.pad(np.where(np.isnan(y), np.inf, y), (0, pad), constant_values=np.inf).reshape(buckets, size)
+    highs = np.pad(np.where(np.isnan(y), -np.inf, y), (0, pad), constant_values=-np.inf).reshape(buckets, size)
+    offsets = np.arange(buckets) * size
+    low_idx = offsets + lows.argmin(axis=1)
+    high_idx = offsets + highs.argmax(axis=1)
+    # 按时间顺序排列每个桶的两个点
+    idx = np.sort(np.stack([low_idx, high_idx], axis=1), axis=1).ravel()
+    idx = idx[idx < n]
+    return x[idx], y[idx]
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Largest-Triangle-Three-Buckets降采样，保留曲线的视觉形状
+
+    Args:
+        x: 横坐标（单调递增）
+        y: 纵坐标（不含NaN）
+        threshold: 输出点数
+    Returns:
+        降采样后的 (x, y)
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return x, y
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # 首尾点固定，中间 threshold-2 个桶
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    # 预先计算每个桶的平均点，作为下一个桶的参考点
+    sums_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1)
+    counts = np.diff(edges)
+    avg_x = np.append(sums_x / counts, x[-1])
+    avg_y = np.append(sums_y / counts, y[-1])
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        bx = x[start:end]
+        by = y[start:end]
+        # 三角形面积（省略常数1/2）
+        area = np.abs((x[a] - avg_x[i + 1]) * (by - y[a]) - (x[a] - bx) * (avg_y[i + 1] - y[a]))
+        a = start + int(area.argmax())
+        selected[i + 1] = a
+    return x[selected], y[selected]
+
+
+def downsample(x: np.ndarray, y: np.ndarray, max_points: int = DEFAULT_MAX_POINTS,
+               method: str = 'minmax') -> Tuple[np.ndarray, np.ndarray]:
+    """
+    按显示需要降采样
+
+    Args:
+        x: 横坐标
+        y: 纵坐标
+        max_points: 最多保留的点数
+        method: 'minmax'（包络，保留尖峰）或 'lttb'（保留形状）
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if len(y) <= max_points:
+        return x, y
+    if method == 'lttb':
+        valid = ~np.isnan(y)
+        return lttb(x[valid], y[valid], max_points)
+    return minmax_envelope(x, y, max_points // 2)
+
+
+def line(x, y, label: Optional[str] = None, max_points: int = DEFAULT_MAX_POINTS,
+         method: str = 'minmax', **style) -> Dict:
+    """生成一条降采样后的折线描述"""
+    x, y = downsample(x, y, max_points, method)
+    return {'kind': 'line', 'x': np.ascontiguousarray(x), 'y': np.ascontiguousarray(y), 'label': label, 'style': style}
+
+
+def histogram(values, bins: int = 50, label: Optional[str] = None, **style) -> Dict:
+    """生成直方图描述，只传递分箱统计结果而不是原始数据"""
+    values = np.asarray(values)
+    counts, edges = np.histogram(values[~np.isnan(values)], bins=bins)
+    return {'kind': 'hist', 'counts': counts, 'edges': edges, 'label': label, 'style': style}
+
+
+def _setup_fonts(matplotlib):
+    """设置中文字体，每个进程只设置一次"""
+    global _fonts_ready
+    if _fonts_ready:
+        return
+    matplotlib.rcParams['font.sans-serif'] = CHINESE_FONTS
+    matplotlib.rcParams['axes.unicode_minus'] = False
+    _fonts_ready = True
+
+
+def _draw(fig, spec: Dict):
+    """按描述在figure上绘图"""
+    rows, cols = spec.get('layout', (1, 1))
+    if spec.get('title'):
+        fig.suptitle(spec['title'], fontsize=16)
+    for panel in spec['panels']:
+        row, col = panel.get('pos', (0, 0))
+        ax = fig.add_subplot(rows, cols, row * cols + col + 1)
+        has_label = False
+        for series in panel['series']:
+            if series['kind'] == 'hist':
+                ax.stairs(series['counts'], series['edges'], fill=True, label=series['label'], **series['style'])
+            else:
+                ax.plot(series['x'], series['y'], label=series['label'], **series['style'])
+            has_label = has_label or bool(series['label'])
+        ax.set_title(panel.get('title', ''), fontsize=12)
+        ax.set_xlabel(panel.get('xlabel', ''), fontsize=10)
+        ax.set_ylabel(panel.get('ylabel', ''), fontsize=10)
+        if panel.get('grid'):
+            ax.grid(True, alpha=0.3)
+        if has_label:
+            ax.legend()
+    fig.tight_layout()
+
+
+def render(spec: Dict, save_path: Optional[str] = None):
+    """
+    渲染图表
+
+    Args:
+        spec: 图表描述，{'title', 'layout': (行, 列), 'figsize', 'panels': [...]}
+        save_path: 保存路径；指定时用Agg画布直接写文件，不指定时弹出窗口显示
+    """
+    import matplotlib
+    _setup_fonts(matplotlib)
+    figsize = spec.get('figsize', (12, 8))
+
+    if save_path:
+        # 直接使用Agg画布，不经过pyplot，不依赖任何界面后端
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        _draw(fig, spec)
+        fig.savefig(save_path)
+        return save_path
+
+    import matplotlib.pyplot as plt
+    fig = plt.figure(figsize=figsize)
+    _draw(fig, spec)
+    plt.show()
+    plt.close(fig)
+    return None
+
+
+def render_in_background(spec: Dict, save_path: str) -> multiprocessing.Process:
+    """
+    在后台进程中渲染并保存图表，立即返回进程对象，需要等待时调用 join()
+    """
+    process = multiprocessing.Process(target=render, args=(spec, save_path), name="PlotRender")
+    process.start()
+    return process
+
+
+def panels_of(panels: List[Dict], layout: Tuple[int, int], title: str = '', figsize=(12, 8)) -> Dict:
+    """组装图表描述"""
+    return {'title': title, 'layout': layout, 'figsize': figsize, 'panels': panels}
@@ -6,28 +6,82 @@
 @Desc    : 功耗监控
 """
 
-import subprocess
 import threading
 from common.logger import create_logger, Logger
-import wmi
-import psutil
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple, Union
 import time
-import re
+from datetime import datetime
+import numpy as np
 from common.HWinfolog_monitor import HWINFOLOGMonitor
+from common.column_store import ColumnStore
+from common.metric_provider import MetricProvider
+from common.nvml_monitor import NvmlProvider
+from common.rapl_monitor import RaplProvider
+from common.battery_monitor import BatteryPowerProvider
+from common.precision_timer import Ticker
+
+# 功耗指标列
+POWER_METRICS = ['cpu_power', 'gpu_power']
+
+
+def cumulative_energy(timestamps_ns: np.ndarray, power: np.ndarray) -> np.ndarray:
+    """
+    按真实采样时间做梯形积分，得到累计能量
+
+    Args:
+        timestamps_ns: 采样时间戳（纳秒），长度为n
+        power: 功率（瓦），形状为 (列数, n)，NaN视为缺失，相邻任一端缺失的区间不计入
+    Returns:
+        形状为 (列数, n) 的累计能量（焦耳），第0个点为0
+    """
+    dt = np.diff(timestamps_ns) / 1e9
+    power = np.asarray(power, dtype=np.float64)
+    segments = (power[:, :-1] + power[:, 1:]) * 0.5 * dt
+    energy = np.zeros(power.shape, dtype=np.float64)
+    np.cumsum(np.nan_to_num(segments, nan=0.0), axis=1, out=energy[:, 1:])
+    return energy
+
+
+def covered_time(timestamps_ns: np.ndarray, power: np.ndarray) -> np.ndarray:
+    """每列有效（两端都不缺失）区间的累计时长（秒），形状与 cumulative_energy 相同"""
+    dt = np.diff(timestamps_ns) / 1e9
+    valid = ~(np.isnan(power[:, :-1]) | np.isnan(power[:, 1:]))
+    covered = np.zeros(power.shape, dtype=np.float64)
+    np.cumsum(valid * dt, axis=1, out=covered[:, 1:])
+    return covered
 
 
 class PowerMonitor:
-    def __init__(self, logger: Logger):
+    def __init__(self, logger: Logger, providers: Optional[List[MetricProvider]] = None, interval: float = 0.1):
+        """
+        Args:
+            logger: 日志器
+            providers: 额外的功耗提供者，默认通过NVML采集英伟达显卡功耗、通过RAPL采集Linux下CPU各域功耗、
+                通过电池放电估算笔记本整机功耗（没有对应接口时自动跳过）
+            interval: 采样间隔（秒），默认100毫秒
+        """
         self.logger = logger
-        self.wmi = wmi.WMI()
+        self._wmi = None  # WMI连接，首次使用时建立
         self.is_monitoring = False
         self.monitor_thread = None
-        self.power_data = {
-            'timestamp': [],
-            'cpu_power': [],         # CPU功耗
-            'gpu_power': [],         # GPU功耗
-        }
+        # cpu_power: CPU功耗, gpu_power: 核显功耗, 其余列由提供者写入
+        self.power_data = ColumnStore(POWER_METRICS)
+        self.interval = interval
+        if providers is None:
+            providers = [NvmlProvider(queries=('power',)), RaplProvider(), BatteryPowerProvider()]
+        self.providers = list(providers)
+        # 阶段标记: [(名称, perf_counter_ns时间戳)]，相邻两个标记之间为一个阶段
+        self.markers: List[Tuple[str, int]] = []
+        # 墙上时间锚点：(time.time_ns, perf_counter_ns)，采样和标记使用单调时钟，只在显示时换算成墙上时间
+        self.wall_anchor = (time.time_ns(), time.perf_counter_ns())
+
+    @property
+    def wmi(self):
+        """WMI连接，建立连接较慢，延迟到首次使用"""
+        if self._wmi is None:
+            import wmi
+            self._wmi = wmi.WMI()
+        return self._wmi
 
     def get_cpu_power(self, gpu_info) -> Optional[float]:
         """获取CPU功耗（需要管理员权限）"""
@@ -36,15 +90,7 @@ class PowerMonitor:
                 return float(info['cpu_power'])
 
     def get_gpu_power(self, gpu_info) -> Optional[float]:
-        """获取GPU功耗"""
-        # NVIDIA GPU
-        # try:
-        #     cmd = "nvidia-smi --query-gpu=power.draw --format=csv,noheader,nounits"
-        #     result = subprocess.check_output(cmd, shell=True)
-        #     return float(result.decode().strip())
-        # except Exception as e:
-        #     self.logger.info(f"获取GPU功耗失败: {e}")
-        # return None
+        """获取GPU功耗（英伟达显卡功耗由 NvmlProvider 写入 gpu{序号}_power 列）"""
         if gpu_info:
             for gpu_name, info in gpu_info.items():
                 return float(info['gpu_power'])
@@ -52,6 +98,9 @@ class PowerMonitor:
     def start_monitoring(self):
         """开始监控"""
         if not self.is_monitoring:
+            for provider in self.providers:
+                provider.open()
+            self.wall_anchor = (time.time_ns(), time.perf_counter_ns())
             self.is_monitoring = True
             self.monitor_thread = threading.Thread(target=self.monitor)
             self.monitor_thread.daemon = True
@@ -63,47 +112,173 @@ class PowerMonitor:
         self.is_monitoring = False
         if self.monitor_thread:
             self.monitor_thread.join()
+        for provider in self.providers:
+            provider.close()
         self.logger.info("功耗监听工具停止")
 
     def monitor(self):
-        """监控循环"""
+        """监控循环，按固定节拍采样，不随读取耗时漂移"""
+        ticker = Ticker(self.interval)
         while self.is_monitoring:
             monitor = HWINFOLOGMonitor()
             hw_info = monitor.read_gpu_info()
 
-            current_time = time.time()
-            
+            current_time = time.perf_counter_ns()  # 单调时钟，积分区间不受系统对时影响
+
             # 收集数据
-            cpu_power = self.get_cpu_power(hw_info)
-            gpu_power = self.get_gpu_power(hw_info)
+            values = {
+                'cpu_power': self.get_cpu_power(hw_info),
+                'gpu_power': self.get_gpu_power(hw_info),
+            }
+            for provider in self.providers:
+                try:
+                    values.update(provider.sample(current_time))
+                except Exception as e:
+                    self.logger.error(f"{provider.name} 采集失败: {e}")
 
             # 存储数据
-            self.power_data['timestamp'].append(current_time)
-                
-            self.power_data['cpu_power'].append(cpu_power)
-            self.power_data['gpu_power'].append(gpu_power)
+            self.power_data.append(current_time, values)
 
-            time.sleep(0.1)  # 每100毫秒采样一次
+            ticker.wait()  # 默认每100毫秒采样一次
 
     def get_power_summary(self) -> Dict:
         """获取功耗统计摘要"""
-        summary = {}
-        
-        for metric in ['cpu_power', 'gpu_power']:
-            data = [x for x in self.power_data[metric] if x is not None]
-            if data:
-                summary[metric] = {
-                    'min': min(data),
-                    'max': max(data),
-                    'avg': sum(data) / len(data)
-                }
+        return self.power_data.summary()
+
+    def mark(self, name: str, timestamp_ns: Optional[int] = None):
+        """
+        记录阶段标记，从该时刻到下一个标记（或采样结束）为名为name的阶段
+        同名标记多次出现时视为同一种操作重复执行，用于计算单次操作能耗
+        :param timestamp_ns: 标记时刻（perf_counter_ns），不指定时为当前时刻
+        """
+        self.markers.append((name, time.perf_counter_ns() if timestamp_ns is None else timestamp_ns))
+
+    def wall_time(self, timestamp_ns: int) -> datetime:
+        """把perf_counter_ns采样或标记时间戳换算成墙上时间"""
+        wall_ns, perf_ns = self.wall_anchor
+        return datetime.fromtimestamp((wall_ns + int(timestamp_ns) - perf_ns) / 1e9)
+
+    @staticmethod
+    def _phase_integrals(timestamps: np.ndarray, energy: np.ndarray, covered: np.ndarray,
+                         starts: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        各阶段的能量和有效时长：每个标记到下一个标记，最后一个到采样结束，边界截断到采样范围内
+
+        Args:
+            starts: 升序的标记时刻（perf_counter_ns），至少一个
+        Returns:
+            (starts, ends, 能量, 有效时长)，后两者形状为 (列数, 阶段数)，阶段内没有有效数据的列能量为NaN
+        """
+        ends = np.append(starts[1:], timestamps[-1])
+        starts = np.clip(starts, timestamps[0], timestamps[-1])
+        ends = np.clip(ends, timestamps[0], timestamps[-1])
+
+        # 在标记时刻对累计能量和有效时长做线性插值，所有阶段一次算完
+        t = (timestamps - timestamps[0]).astype(np.float64)
+        ts_start = (starts - timestamps[0]).astype(np.float64)
+        ts_end = (ends - timestamps[0]).astype(np.float64)
+        phase_energy = np.empty((len(energy), len(starts)))
+        phase_covered = np.empty((len(energy), len(starts)))
+        for i in range(len(energy)):
+            phase_energy[i] = np.interp(ts_end, t, energy[i]) - np.interp(ts_start, t, energy[i])
+            phase_covered[i] = np.interp(ts_end, t, covered[i]) - np.interp(ts_start, t, covered[i])
+        phase_energy[phase_covered <= 0] = np.nan
+        return starts, ends, phase_energy, phase_covered
+
+    def power_columns(self) -> List[str]:
+        """所有功率列（单位为瓦）"""
+        return [name for name in self.power_data.columns if name.endswith('power')]
+
+    def get_energy_summary(self, idle_baseline: Union[str, Dict[str, float], None] = None) -> Dict:
+        """
+        获取能耗统计，按真实时间戳做梯形积分
+
+        Args:
+            idle_baseline: 空闲基线，可以是阶段名（取该阶段各次的总能量除以总有效时长）或 列名 -> 瓦 的字典
+                （未给出的列按0瓦）；指定后额外给出扣除基线后的净能耗，基线缺失的列净能耗也记为缺失
+        Returns:
+            {'duration', 'total', 'phases', 'per_operation'}，能量单位为焦耳；
+            阶段的 start/end 为perf_counter_ns时间戳，可用 wall_time() 换算；
+            没有阶段标记时 phases 和 per_operation 为空；少于两个采样点时无法积分，返回空字典
+        """
+        timestamps = self.power_data.timestamps
+        if len(timestamps) < 2:
+            return {}
+
+        columns = self.power_columns()
+        power = self.power_data.block(columns)
+        energy = cumulative_energy(timestamps, power)
+        covered = covered_time(timestamps, power)
+
+        # 标记可能通过timestamp_ns补记，按时间排序；同一时刻的标记保持记录顺序
+        markers = sorted(self.markers, key=lambda marker: marker[1])
+        names = [name for name, _ in markers]
+        if names:
+            starts, ends, phase_energy, phase_covered = self._phase_integrals(
+                timestamps, energy, covered, np.array([ts for _, ts in markers], dtype=np.int64))
+        else:
+            starts = ends = np.zeros(0, dtype=np.int64)
+            phase_energy = phase_covered = np.zeros((len(columns), 0))
+        phase_duration = (ends - starts) / 1e9
+
+        # 空闲基线（瓦）
+        baseline = None
+        if isinstance(idle_baseline, str):
+            idx = [i for i, name in enumerate(names) if name == idle_baseline]
+            if idx:
+                # 某次空闲阶段内缺失的列不计入，只用有数据的几次求平均功率
+                idle_energy = np.nansum(phase_energy[:, idx], axis=1)
+                idle_covered = phase_covered[:, idx].sum(axis=1)
+                baseline = np.full(len(columns), np.nan)
+                np.divide(idle_energy, idle_covered, out=baseline, where=idle_covered > 0)
             else:
-                summary[metric] = {
-                    'min': None,
-                    'max': None,
-                    'avg': None
-                }
-                
+                self.logger.warning(f"未找到空闲基线阶段: {idle_baseline}")
+        elif idle_baseline:
+            baseline = np.array([idle_baseline.get(name, 0.0) for name in columns], dtype=np.float64)
+
+        def per_column(values):
+            return {name: None if np.isnan(value) else round(float(value), 4) for name, value in zip(columns, values)}
+
+        total_covered = covered[:, -1]
+        total_energy = np.where(total_covered > 0, energy[:, -1], np.nan)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            avg_power = total_energy / total_covered
+        summary = {
+            'duration': (timestamps[-1] - timestamps[0]) / 1e9,
+            'total': {
+                'energy_j': per_column(total_energy),
+                'avg_power_w': per_column(avg_power),
+            },
+            'phases': [],
+            'per_operation': {},
+        }
+        if baseline is not None:
+            summary['baseline_w'] = per_column(baseline)
+            summary['total']['net_energy_j'] = per_column(total_energy - baseline * total_covered)
+
+        net_energy = phase_energy - baseline[:, None] * phase_covered if baseline is not None else None
+        for i, name in enumerate(names):
+            phase = {
+                'name': name,
+                'start': int(starts[i]),
+                'end': int(ends[i]),
+                'duration': float(phase_duration[i]),
+                'energy_j': per_column(phase_energy[:, i]),
+            }
+            if net_energy is not None:
+                phase['net_energy_j'] = per_column(net_energy[:, i])
+            summary['phases'].append(phase)
+
+        # 同名阶段视为同一种操作，计算单次操作能耗
+        for name in dict.fromkeys(names):
+            idx = [i for i, phase_name in enumerate(names) if phase_name == name]
+            operation = {
+                'count': len(idx),
+                'energy_j': per_column(phase_energy[:, idx].sum(axis=1) / len(idx)),
+            }
+            if net_energy is not None:
+                operation['net_energy_j'] = per_column(net_energy[:, idx].sum(axis=1) / len(idx))
+            summary['per_operation'][name] = operation
         return summary
 
 
@@ -116,8 +291,11 @@ if __name__ == "__main__":
         # 开始监控
         power_monitor.start_monitoring()
 
-        # 运行一段时间
-        time.sleep(5)
+        # 空闲基线2秒，之后运行一段时间
+        power_monitor.mark('idle')
+        time.sleep(2)
+        power_monitor.mark('run')
+        time.sleep(3)
         
         # 停止监控
         power_monitor.stop_monitoring()
@@ -125,6 +303,7 @@ if __name__ == "__main__":
         # 获取统计信息
         summary = power_monitor.get_power_summary()
         print(summary)
+        print(power_monitor.get_energy_summary(idle_baseline='idle'))
 
             
     except KeyboardInterrupt:
@@ -0,0 +1,313 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : precision_timer.py
+@Time    : 2025/04/04
+@Author  : Bruce.Si
+@Desc    : 睡眠+自旋混合的高精度定时器
+    - time.sleep(0.00001) 的实际效果取决于系统定时器精度：Windows默认约15.6毫秒，Linux约几十微秒
+    - 先粗略睡眠到截止时间前的安全余量处，再在 perf_counter_ns 上自旋到截止时间
+    - 安全余量由启动时的校准得到（实测sleep的超时），每个进程只校准一次
+    - Windows 10 1803以上使用高精度可等待定时器（CREATE_WAITABLE_TIMER_HIGH_RESOLUTION），
+      不修改全局定时器精度，也就不影响被测系统的功耗
+    - 调用方可给出允许的迟到时间（slack），允许范围内不自旋，节省CPU
+    - 统计实际达到的精度（迟到时间）和自旋占比：定时器在进程内共享，汇总统计加锁更新；
+      节拍计时器和轮询节奏各自持有 WaitStats，只统计自己的等待
+"""
+
+import atexit
+import ctypes
+import sys
+import threading
+import time
+import weakref
+from typing import Dict, Optional
+
+# 校准时每次请求的睡眠时长（纳秒）
+CALIBRATION_SLEEP_NS = 500_000
+CALIBRATION_SAMPLES = 15
+
+# 自旋余量的下限（纳秒）
+MIN_SPIN_MARGIN_NS = 100_000
+
+# Windows 高精度可等待定时器
+CREATE_WAITABLE_TIMER_HIGH_RESOLUTION = 0x00000002
+TIMER_ALL_ACCESS = 0x1F0003
+INFINITE = 0xFFFFFFFF
+
+
+class _TimerHandle:
+    """一个线程的定时器句柄，线程结束（线程局部变量释放）或定时器关闭时关闭句柄"""
+
+    def __init__(self, kernel32, handle: int):
+        self._kernel32 = kernel32
+        self.handle = handle
+
+    def close(self):
+        handle, self.handle = self.handle, None
+        if handle:
+            self._kernel32.CloseHandle(ctypes.c_void_p(handle))
+
+    def __del__(self):
+        self.close()
+
+
+class _WaitableTimer:
+    """Windows高精度可等待定时器，每个线程一个句柄"""
+
+    def __init__(self):
+        self._kernel32 = ctypes.windll.kernel32
+        self._kernel32.CreateWaitableTimerExW.restype = ctypes.c_void_p
+        self._local = threading.local()
+        # 所有线程的句柄，关闭定时器时统一关闭
+        self._handles = weakref.WeakSet()
+        self._lock = threading.Lock()
+        # 探测系统是否支持高精度定时器
+        if self._handle() is None:
+            raise OSError("不支持高精度可等待定时器")
+
+    def _handle(self) -> Optional[_TimerHandle]:
+        """当前线程的句柄，首次使用时创建"""
+        timer_handle = getattr(self._local, 'handle', None)
+        if timer_handle is None:
+            handle = self._kernel32.CreateWaitableTimerExW(
+                None, None, CREATE_WAITABLE_TIMER_HIGH_RESOLUTION, TIMER_ALL_ACCESS)
+            if not handle:
+                return None
+            timer_handle = self._local.handle = _TimerHandle(self._kernel32, handle)
+            with self._lock:
+                self._handles.add(timer_handle)
+        return timer_handle
+
+    def sleep_ns(self, duration_ns: int):
+        handle = ctypes.c_void_p(self._handle().handle)
+        # 负值表示相对时间，单位100纳秒
+        due = ctypes.c_longlong(-max(duration_ns // 100, 1))
+        self._kernel32.SetWaitableTimer(handle, ctypes.byref(due), 0, None, None, False)
+        self._kernel32.WaitForSingleObject(handle, INFINITE)
+
+    def close(self):
+        """关闭所有线程的句柄"""
+        with self._lock:
+            handles = list(self._handles)
+            self._handles.clear()
+        for timer_handle in handles:
+            timer_handle.close()
+
+
+class WaitStats:
+    """一个调用方的定时精度统计"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.waits = 0
+        self.late_total_ns = 0
+        self.late_max_ns = 0
+        self.sleep_total_ns = 0
+        self.spin_total_ns = 0
+
+    def record(self, late_ns: int, sleep_ns: int, spin_ns: int):
+        self.waits += 1
+        self.late_total_ns += late_ns
+        if late_ns > self.late_max_ns:
+            self.late_max_ns = late_ns
+        self.sleep_total_ns += sleep_ns
+        self.spin_total_ns += spin_ns
+
+    def merge(self, other: 'WaitStats'):
+        self.waits += other.waits
+        self.late_total_ns += other.late_total_ns
+        self.late_max_ns = max(self.late_max_ns, other.late_max_ns)
+        self.sleep_total_ns += other.sleep_total_ns
+        self.spin_total_ns += other.spin_total_ns
+
+    def to_dict(self) -> Dict:
+        """
+        Returns:
+            waits: 等待次数
+            late_avg_us / late_max_us: 实际唤醒相对截止时刻的迟到时间
+            spin_ratio: 自旋时间占全部等待时间的比例（近似CPU代价）
+        """
+        waited = self.sleep_total_ns + self.spin_total_ns
+        return {
+            'waits': self.waits,
+            'late_avg_us': self.late_total_ns / self.waits / 1e3 if self.waits else 0.0,
+            'late_max_us': self.late_max_ns / 1e3,
+            'spin_ratio': self.spin_total_ns / waited if waited else 0.0,
+        }
+
+
+class PrecisionTimer:
+    """睡眠+自旋混合定时器"""
+
+    def __init__(self, spin_margin_ns: Optional[int] = None, samples: int = CALIBRATION_SAMPLES):
+        """
+        Args:
+            spin_margin_ns: 自旋余量（纳秒），不指定时自动校准
+            samples: 校准采样次数
+        """
+        self._sleep_ns = self._sleep_builtin
+        self._waitable: Optional[_WaitableTimer] = None
+        if sys.platform == 'win32':
+            try:
+                self._waitable = _WaitableTimer()
+                self._sleep_ns = self._waitable.sleep_ns
+            except (AttributeError, OSError):
+                pass
+        # 所有调用方的汇总统计，多个线程共享定时器，加锁更新
+        self._stats_lock = threading.Lock()
+        self.totals = WaitStats()
+        self.sleep_granularity_ns = 0
+        self.spin_margin_ns = spin_margin_ns
+        if spin_margin_ns is None:
+            self.calibrate(samples)
+        self.reset_stats()
+
+    @staticmethod
+    def _sleep_builtin(duration_ns: int):
+        time.sleep(duration_ns / 1e9)
+
+    def calibrate(self, samples: int = CALIBRATION_SAMPLES) -> int:
+        """
+        测量睡眠的实际超时，取较大的分位作为睡眠粒度，余量为粒度的1.5倍
+
+        Returns:
+            自旋余量（纳秒）
+        """
+        overshoots = []
+        for _ in range(samples):
+            start = time.perf_counter_ns()
+            self._sleep_ns(CALIBRATION_SLEEP_NS)
+            overshoots.append(time.perf_counter_ns() - start - CALIBRATION_SLEEP_NS)
+        overshoots.sort()
+        self.sleep_granularity_ns = max(overshoots[int(len(overshoots) * 0.9)], 0)
+        self.spin_margin_ns = max(int(self.sleep_granularity_ns * 1.5), MIN_SPIN_MARGIN_NS)
+        return self.spin_margin_ns
+
+    def reset_stats(self):
+        """清空汇总的精度统计"""
+        with self._stats_lock:
+            self.totals.reset()
+
+    def close(self):
+        """关闭Windows定时器句柄，之后退回内置sleep"""
+        self._sleep_ns = self._sleep_builtin
+        if self._waitable is not None:
+            self._waitable.close()
+            self._waitable = None
+
+    def sleep_until(self, deadline_ns: int, slack_ns: int = 0, stats: Optional[WaitStats] = None) -> int:
+        """
+        等待到指定的 perf_counter_ns 时刻
+
+        Args:
+            deadline_ns: 截止时刻
+            slack_ns: 允许的迟到时间，余量不超过该值时只睡眠不自旋
+            stats: 调用方自己的统计，只由调用方所在线程更新
+        Returns:
+            实际唤醒时刻
+        """
+        now = time.perf_counter_ns()
+        remaining = deadline_ns - now
+        margin = self.spin_margin_ns
+        slept = spun = 0
+        if remaining > 0:
+            if margin <= slack_ns:
+                # 允许迟到一个睡眠粒度，直接睡到截止时刻
+                self._sleep_ns(remaining)
+                now = time.perf_counter_ns()
+                slept = remaining
+            else:
+                if remaining > margin:
+                    self._sleep_ns(remaining - margin)
+                    slept = remaining - margin
+                spin_start = time.perf_counter_ns()
+                now = spin_start
+                while now < deadline_ns:
+                    now = time.perf_counter_ns()
+                spun = now - spin_start
+
+        late = max(now - deadline_ns, 0)
+        with self._stats_lock:
+            self.totals.record(late, slept, spun)
+        if stats is not None:
+            stats.record(late, slept, spun)
+        return now
+
+    def sleep(self, seconds: float, slack: float = 0.0, stats: Optional[WaitStats] = None) -> int:
+        """等待指定秒数，slack为允许的迟到时间（秒）"""
+        return self.sleep_until(time.perf_counter_ns() + int(seconds * 1e9), int(slack * 1e9), stats)
+
+    def ticker(self, interval: float, slack: Optional[float] = None) -> 'Ticker':
+        """创建固定节拍的计时器"""
+        return Ticker(interval, timer=self, slack=slack)
+
+    def stats(self, wait_stats: Optional[WaitStats] = None) -> Dict:
+        """
+        精度统计
+
+        Args:
+            wait_stats: 某个调用方的统计，不指定时为所有调用方的汇总
+        Returns:
+            sleep_granularity_ms: 校准得到的睡眠粒度
+            spin_margin_ms: 自旋余量
+            以及 WaitStats.to_dict() 的各项
+        """
+        if wait_stats is None:
+            with self._stats_lock:
+                wait_stats = WaitStats()
+                wait_stats.merge(self.totals)
+        return {
+            'sleep_granularity_ms': self.sleep_granularity_ns / 1e6,
+            'spin_margin_ms': self.spin_margin_ns / 1e6,
+            **wait_stats.to_dict(),
+        }
+
+
+class Ticker:
+    """固定节拍计时器，截止时刻按节拍累加，不随处理耗时漂移；落后超过一个节拍时跳过错过的节拍"""
+
+    def __init__(self, interval: float, timer: Optional[PrecisionTimer] = None, slack: Optional[float] = None):
+        """
+        Args:
+            interval: 节拍间隔（秒）
+            timer: 定时器，默认使用进程共享的定时器
+            slack: 允许的迟到时间（秒），默认为节拍间隔的1%
+        """
+        self.timer = timer if timer is not None else get_timer()
+        self.interval_ns = int(interval * 1e9)
+        self.slack_ns = int((interval * 0.01 if slack is None else slack) * 1e9)
+        self.deadline_ns = time.perf_counter_ns() + self.interval_ns
+        self.missed = 0
+        self.wait_stats = WaitStats()
+
+    def wait(self) -> int:
+        """等待下一个节拍，返回实际唤醒时刻（perf_counter_ns）"""
+        now = time.perf_counter_ns()
+        if now - self.deadline_ns > self.interval_ns:
+            skipped = (now - self.deadline_ns) // self.interval_ns
+            self.missed += skipped
+            self.deadline_ns += skipped * self.interval_ns
+        woke = self.timer.sleep_until(self.deadline_ns, self.slack_ns, self.wait_stats)
+        self.deadline_ns += self.interval_ns
+        return woke
+
+    def stats(self) -> Dict:
+        """本计时器的定时精度统计，另含错过的节拍数"""
+        return {**self.timer.stats(self.wait_stats), 'missed': self.missed}
+
+
+_timer: Optional[PrecisionTimer] = None
+_timer_lock = threading.Lock()
+
+
+def get_timer() -> PrecisionTimer:
+    """进程共享的定时器，首次使用时校准，进程退出时关闭"""
+    global _timer
+    if _timer is None:
+        with _timer_lock:
+            if _timer is None:
+                _timer = PrecisionTimer()
+                atexit.register(_timer.close)
+    return _timer
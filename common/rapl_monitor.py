@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : rapl_monitor.py
+@Time    : 2025/03/25
+@Author  : Bruce.Si
+@Desc    : Linux RAPL功耗采集（powercap接口）
+    - 读取 /sys/class/powercap/intel-rapl*/energy_uj，覆盖package、core、uncore、dram等域
+    - 文件描述符在整个会话中保持打开，每次用pread从偏移0重新读取，不重复打开文件
+    - 按 max_energy_range_uj 处理计数器回绕，能量差分除以时间差得到瓦
+    - root参数可以指向伪造的sysfs目录，便于在没有RAPL的机器上测试
+"""
+
+import glob
+import os
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from common.metric_provider import MetricProvider
+
+POWERCAP_ROOT = "/sys/class/powercap"
+
+
+class RaplDomain:
+    """单个RAPL域"""
+
+    def __init__(self, path: str, name: str, max_range_uj: int):
+        self.path = path
+        self.name = name
+        self.max_range_uj = max_range_uj
+        self.fd = None
+
+
+class RaplProvider(MetricProvider):
+    """RAPL各域功耗"""
+    name = "rapl"
+
+    def __init__(self, root: str = POWERCAP_ROOT):
+        """
+        Args:
+            root: powercap目录，默认为 /sys/class/powercap
+        """
+        self.root = root
+        self.domains: List[RaplDomain] = []
+        self.columns: List[str] = []
+        self.errors: Dict[str, str] = {}  # 无法打开的域及原因
+        self.available = False
+        self._max_range = np.zeros(0, dtype=np.int64)
+        self._prev = np.zeros(0, dtype=np.int64)
+        self._cur = np.zeros(0, dtype=np.int64)
+        self._prev_ts = None
+
+    @staticmethod
+    def _read_text(path: str) -> str:
+        with open(path, 'r') as f:
+            return f.read().strip()
+
+    def discover(self) -> List[RaplDomain]:
+        """查找所有带 energy_uj 的RAPL域"""
+        domains = []
+        for path in sorted(glob.glob(os.path.join(self.root, "intel-rapl*"))):
+            if not os.path.exists(os.path.join(path, "energy_uj")):
+                continue
+            try:
+                name = self._read_text(os.path.join(path, "name"))
+                max_range = int(self._read_text(os.path.join(path, "max_energy_range_uj")))
+            except (OSError, ValueError) as e:
+                self.errors[path] = str(e)
+                continue
+            domains.append(RaplDomain(path, name, max_range))
+        return domains
+
+    def open(self):
+        """打开所有域的 energy_uj，并读取初始快照"""
+        if self.available:
+            return
+        opened = []
+        for domain in self.discover():
+            try:
+                domain.fd = os.open(os.path.join(domain.path, "energy_uj"), os.O_RDONLY)
+            except OSError as e:
+                # 较新内核只允许root读取energy_uj
+                self.errors[domain.path] = str(e)
+                continue
+            opened.append(domain)
+        self.domains = opened
+        if not self.domains:
+            return
+
+        # 多路CPU时域名会重复（例如多个core），加上zone编号区分
+        names = [domain.name for domain in self.domains]
+        self.columns = []
+        for domain in self.domains:
+            label = domain.name
+            if names.count(label) > 1:
+                label = f"{label}-{os.path.basename(domain.path).split(':', 1)[-1].replace(':', '-')}"
+            self.columns.append(f"rapl_{label}_power")
+
+        self._max_range = np.array([domain.max_range_uj for domain in self.domains], dtype=np.int64)
+        self._prev = np.zeros(len(self.domains), dtype=np.int64)
+        self._cur = np.zeros(len(self.domains), dtype=np.int64)
+        self._prev_ts = None
+        self.available = True
+        self._read(self._prev)
+        self._prev_ts = time.perf_counter_ns()
+
+    def _read(self, out: np.ndarray):
+        """用pread读取所有域的累计能量（微焦）"""
+        for i, domain in enumerate(self.domains):
+            out[i] = int(os.pread(domain.fd, 32, 0))
+
+    def sample(self, timestamp_ns: int) -> Dict[str, float]:
+        if not self.available:
+            return {}
+        # 两块缓冲区交替使用
+        cur = self._cur
+        self._read(cur)
+        now = time.perf_counter_ns()
+        dt = (now - self._prev_ts) / 1e9
+
+        delta = cur - self._prev
+        # 计数器回绕：从上一次的值涨到max_energy_range_uj后归零
+        wrapped = delta < 0
+        delta[wrapped] += self._max_range[wrapped]
+        self._prev, self._cur = cur, self._prev
+        self._prev_ts = now
+        if dt <= 0:
+            return {}
+        watts = delta / 1e6 / dt
+        return dict(zip(self.columns, watts.tolist()))
+
+    def close(self):
+        """关闭文件描述符"""
+        for domain in self.domains:
+            if domain.fd is not None:
+                try:
+                    os.close(domain.fd)
+                except OSError:
+                    pass
+                domain.fd = None
+        self.available = False
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : trajectory_analysis.py
+@Time    : 2025/04/05
+@Author  : Bruce.Si
+@Desc    : 窗口矩形轨迹分析
+    - 输入为逐帧采样的时间戳（perf_counter_ns）和窗口矩形 (left, top, right, bottom)
+    - 动画检测：相邻帧矩形变化的步进按时间间隔分组，间隔超过稳定时间的视为两次动画
+    - 每次动画计算起始帧、稳定帧、时长、过冲和逐帧步进的不规则程度（停顿、跳变）
+    - 步进、速度和不规则度对整条轨迹向量化计算，只在动画之间做Python循环
+    - synthesize_trajectory 生成合成轨迹（缓动、过冲、注入停顿），在Linux上验证分析结果
+"""
+
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+# 运动停止超过该时长（毫秒）视为动画结束，之后的运动算作下一次动画
+SETTLE_TIME = 100.0
+
+# 与最终矩形的偏差不超过该像素数即视为已稳定
+SETTLE_TOLERANCE = 1
+
+# 步进速度偏离前后两帧平均速度的比例超过该值时记为一次不规则步进
+STEP_IRREGULARITY = 0.5
+
+# 计算不规则度时速度的下限（像素/帧），缓动末尾速度很小时相对偏差没有意义
+MIN_STEP_PX = 3.0
+
+# 矩形坐标取整带来的步进误差（像素），不计入不规则度
+QUANTIZATION_PX = 1.0
+
+
+def trajectory_steps(timestamps_ns: np.ndarray, rects: np.ndarray) -> Tuple[np.ndarray, np.ndarray, float]:
+    """
+    逐帧步进和速度
+
+    Args:
+        timestamps_ns: 采样时间戳（纳秒），长度N
+        rects: 窗口矩形，形状 (N, 4)
+    Returns:
+        steps: 相邻帧的矩形变化（像素），形状 (N-1, 4)
+        velocity: 速度（像素/帧），步进除以经过的帧数，形状 (N-1, 4)
+        frame_ns: 标称帧间隔（纳秒）
+    """
+    timestamps_ns = np.asarray(timestamps_ns, dtype=np.int64)
+    rects = np.asarray(rects, dtype=np.float64).reshape(-1, 4)
+    steps = np.diff(rects, axis=0)
+    dt = np.diff(timestamps_ns).astype(np.float64)
+    if not len(dt):
+        return steps, steps.copy(), 0.0
+    frame_ns = float(np.median(dt))
+    if frame_ns <= 0:
+        return steps, steps.copy(), frame_ns
+    # 按经过的整帧数归一化：丢帧时步进变大但速度不变，时间戳的唤醒抖动也不会被当成速度变化
+    elapsed = np.maximum(np.rint(dt / frame_ns), 1.0)
+    velocity = steps / elapsed[:, None]
+    return steps, velocity, frame_ns
+
+
+def step_irregularity(velocity: np.ndarray, min_step: float = MIN_STEP_PX) -> np.ndarray:
+    """
+    每一步相对前后两帧平均速度的偏离程度
+
+    速度按矢量比较：过冲回弹时速度反向，前后两帧平均接近0，平滑回弹不会被误判。
+    偏差先扣除坐标取整误差；首尾两步没有完整的相邻帧，记为0。
+
+    Returns:
+        形状 (N-1,) 的不规则度，0表示匀变速，1表示停顿一帧或跳过一帧
+    """
+    irregularity = np.zeros(len(velocity))
+    if len(velocity) < 3:
+        return irregularity
+    speed = np.linalg.norm(velocity, axis=1)
+    expected = (velocity[:-2] + velocity[2:]) / 2
+    reference = np.maximum(np.maximum(speed[:-2], speed[2:]), min_step)
+    error = np.maximum(np.linalg.norm(velocity[1:-1] - expected, axis=1) - QUANTIZATION_PX, 0.0)
+    irregularity[1:-1] = error / reference
+    return irregularity
+
+
+def detect_animations(timestamps_ns: np.ndarray, rects: np.ndarray, settle_time: float = SETTLE_TIME,
+                      tolerance: int = SETTLE_TOLERANCE, irregularity: float = STEP_IRREGULARITY,
+                      min_step: float = MIN_STEP_PX) -> List[Dict]:
+    """
+    检测轨迹中的动画并逐个分析
+
+    Args:
+        timestamps_ns: 采样时间戳（纳秒），长度N
+        rects: 窗口矩形，形状 (N, 4)
+        settle_time: 运动停止超过该时长（毫秒）视为动画结束
+        tolerance: 与最终矩形的偏差不超过该像素数即视为已稳定
+        irregularity: 不规则步进的阈值
+        min_step: 计算不规则度时速度的下限（像素/帧）
+    Returns:
+        每次动画一个字典:
+            start_index / start_ts: 第一帧出现变化的采样序号和时间戳
+            settle_index / settle_ts: 稳定帧（此后与最终矩形的偏差都不超过tolerance）
+            duration_ms: 从最后一个静止帧到稳定帧的时长
+            frames: 动画经历的帧数
+            from_rect / to_rect: 起始和最终矩形
+            distance_px: 各边的最大位移
+            overshoot_px / overshoot_pct: 越过最终位置的最大像素数及其占该边位移的比例
+            peak_speed: 峰值速度（像素/毫秒）
+            stalled_frames: 动画中途前后帧都在运动（速度不低于min_step）而该帧矩形没有变化的帧数
+            irregular_steps / max_irregularity: 不规则步进的数量和最大不规则度
+    """
+    timestamps_ns = np.asarray(timestamps_ns, dtype=np.int64)
+    rects = np.asarray(rects, dtype=np.float64).reshape(-1, 4)
+    if len(timestamps_ns) < 2:
+        return []
+
+    steps, velocity, frame_ns = trajectory_steps(timestamps_ns, rects)
+    moving = np.any(steps != 0, axis=1)
+    moves = np.flatnonzero(moving)
+    if not len(moves):
+        return []
+    deviation = step_irregularity(velocity, min_step)
+    speed = np.linalg.norm(velocity, axis=1)
+    # 停顿：前后帧平均速度足够大而该帧没有移动；缓动末尾和过冲折返处的零步进不算
+    stalled = np.zeros(len(moving), dtype=bool)
+    if len(moving) >= 3:
+        expected_speed = np.linalg.norm((velocity[:-2] + velocity[2:]) / 2, axis=1)
+        stalled[1:-1] = ~moving[1:-1] & (expected_speed >= min_step)
+
+    # 相邻两次运动的间隔超过稳定时间时分为两次动画
+    move_ts = timestamps_ns[moves + 1]
+    breaks = np.flatnonzero(np.diff(move_ts) > settle_time * 1_000_000)
+    firsts = moves[np.concatenate(([0], breaks + 1))]
+    lasts = moves[np.concatenate((breaks, [len(moves) - 1]))]
+
+    animations = []
+    for first, last in zip(firsts.tolist(), lasts.tolist()):
+        segment = rects[first:last + 2]
+        from_rect = segment[0]
+        to_rect = segment[-1]
+        delta = to_rect - from_rect
+
+        # 稳定帧：此后与最终矩形的偏差都不超过tolerance
+        outside = np.flatnonzero(np.max(np.abs(segment - to_rect), axis=1) > tolerance)
+        settle = first + (int(outside[-1]) + 1 if len(outside) else 1)
+
+        # 过冲：沿位移方向越过最终位置的像素数，只统计发生位移的边
+        moved = delta != 0
+        overshoot = np.clip((segment - to_rect) * np.sign(delta), 0, None).max(axis=0)
+        overshoot_px = float(overshoot[moved].max()) if moved.any() else 0.0
+        overshoot_pct = float((overshoot[moved] / np.abs(delta[moved])).max() * 100) if moved.any() else 0.0
+
+        # 动画中途的步进（首尾两步没有完整的相邻帧）
+        interior = slice(first + 1, last)
+        interior_deviation = deviation[interior]
+
+        animations.append({
+            'start_index': first + 1,
+            'start_ts': int(timestamps_ns[first + 1]),
+            'settle_index': settle,
+            'settle_ts': int(timestamps_ns[settle]),
+            'duration_ms': (int(timestamps_ns[settle]) - int(timestamps_ns[first])) / 1_000_000,
+            'frames': settle - first,
+            'from_rect': tuple(int(v) for v in from_rect),
+            'to_rect': tuple(int(v) for v in to_rect),
+            'distance_px': float(np.abs(delta).max()),
+            'overshoot_px': overshoot_px,
+            'overshoot_pct': overshoot_pct,
+            'peak_speed': float(speed[first:last + 1].max() / frame_ns * 1_000_000) if frame_ns > 0 else 0.0,
+            'stalled_frames': int(np.count_nonzero(stalled[interior])),
+            'irregular_steps': int(np.count_nonzero(interior_deviation > irregularity)),
+            'max_irregularity': float(interior_deviation.max()) if len(interior_deviation) else 0.0,
+        })
+    return animations
+
+
+def synthesize_trajectory(from_rect: Sequence[int], to_rect: Sequence[int], duration_ms: float = 250.0,
+                          refresh_rate: float = 60.0, hold_ms: float = 200.0, overshoot: float = 0.0,
+                          stalls: Iterable[int] = (), start_ns: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    生成合成的窗口动画轨迹
+
+    位置按三次缓出曲线变化；指定过冲时前70%的时长冲到 1+overshoot，剩余时长回到最终位置。
+
+    Args:
+        from_rect / to_rect: 起始和最终矩形
+        duration_ms: 动画时长
+        refresh_rate: 采样频率（Hz）
+        hold_ms: 动画前后静止的时长
+        overshoot: 过冲比例（相对位移）
+        stalls: 注入停顿的动画帧序号（第一次变化的帧为0），该帧重复上一帧的矩形，下一帧按时间追上
+        start_ns: 第一帧的时间戳
+    Returns:
+        (时间戳 int64 (N,), 矩形 int32 (N, 4))
+    """
+    frame_ns = 1e9 / refresh_rate
+    hold = int(round(hold_ms * 1e6 / frame_ns))
+    frames = max(int(round(duration_ms * 1e6 / frame_ns)), 1)
+    t = np.arange(1, frames + 1) / frames
+
+    if overshoot > 0:
+        peak = 0.7
+        rise = np.minimum(t / peak, 1.0)
+        fall = np.clip((t - peak) / (1 - peak), 0.0, 1.0)
+        progress = (1 + overshoot) * (1 - (1 - rise) ** 3) - overshoot * (1 - np.cos(np.pi * fall)) / 2
+    else:
+        progress = 1 - (1 - t) ** 3
+
+    for stall in stalls:
+        if 1 <= stall < frames:
+            progress[stall] = progress[stall - 1]
+
+    from_rect = np.asarray(from_rect, dtype=np.float64)
+    to_rect = np.asarray(to_rect, dtype=np.float64)
+    moving = from_rect + progress[:, None] * (to_rect - from_rect)
+    rects = np.concatenate((
+        np.repeat(from_rect[None, :], hold + 1, axis=0),
+        moving,
+        np.repeat(to_rect[None, :], hold, axis=0),
+    ))
+    timestamps = start_ns + (np.arange(len(rects)) * frame_ns).astype(np.int64)
+    return timestamps, np.rint(rects).astype(np.int32)
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : vsync_source.py
+@Time    : 2025/03/31
+@Author  : Bruce.Si
+@Desc    : 垂直同步信号源
+    - RefreshRateMonitor 每帧调用一次 wait()，阻塞到下一次垂直同步并返回时间戳（perf_counter_ns时基）
+    - DwmVsyncSource: Windows DWM（DwmFlush），真实采集
+    - SimulatedVsyncSource: 虚拟时钟，可配置刷新率（最高1000Hz）、抖动和注入丢帧，默认不等待，远快于实时
+    - ReplayVsyncSource: 回放已记录的时间戳
+    - 模拟和回放源可在Linux上运行，用于帧分析的基准测试和回归测试
+"""
+
+import sys
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from common.precision_timer import get_timer
+
+# 模拟源支持的最高刷新率
+MAX_SIMULATED_RATE = 1000.0
+
+# 模拟源每次批量生成的帧数
+SIMULATION_CHUNK = 4096
+
+
+class VsyncSource:
+    """垂直同步信号源"""
+    name = "vsync"
+    # 标称刷新率（Hz），未知时为None
+    refresh_hint: Optional[float] = None
+
+    def open(self):
+        """开始采集前调用"""
+
+    def wait(self) -> Optional[int]:
+        """
+        等待下一次垂直同步
+
+        Returns:
+            时间戳（纳秒，perf_counter_ns时基），信号源结束时返回None
+        """
+        return None
+
+    def close(self):
+        """停止采集后调用"""
+
+
+class DwmVsyncSource(VsyncSource):
+    """Windows DWM垂直同步"""
+    name = "dwm"
+
+    def __init__(self):
+        self.dwm = None
+
+    def open(self):
+        if self.dwm is None:
+            if sys.platform != 'win32':
+                raise OSError("DWM垂直同步只在Windows下可用")
+            from ctypes import windll
+            self.dwm = windll.dwmapi
+
+    def wait(self) -> Optional[int]:
+        if self.dwm is None:
+            self.open()
+        self.dwm.DwmFlush()  # 等待垂直同步
+        return time.perf_counter_ns()
+
+
+def _sleep_until(deadline_ns: int):
+    """睡到指定的perf_counter_ns时刻"""
+    get_timer().sleep_until(deadline_ns)
+
+
+class SimulatedVsyncSource(VsyncSource):
+    """模拟垂直同步，虚拟时钟"""
+    name = "simulated"
+
+    def __init__(self, refresh_rate: float = 144.0, jitter_ms: float = 0.0, drop_rate: float = 0.0,
+                 max_drop: int = 3, drops: Optional[Dict[int, int]] = None,
+                 schedule: Optional[Sequence[Tuple[int, float]]] = None, frames: Optional[int] = None,
+                 realtime: bool = False, speed: float = 1.0, seed: Optional[int] = None):
+        """
+        Args:
+            refresh_rate: 刷新率（Hz），最高 MAX_SIMULATED_RATE
+            jitter_ms: 帧间隔的正态抖动标准差（毫秒）
+            drop_rate: 每帧随机丢帧的概率
+            max_drop: 随机丢帧时一次最多丢失的帧数
+            drops: 指定位置注入丢帧，帧序号 -> 丢失帧数
+            schedule: 刷新率切换计划 [(起始帧序号, 刷新率), ...]，用于模拟60/144Hz切换
+            frames: 总帧数，达到后wait()返回None；不指定时无限
+            realtime: 是否按（虚拟时间 / speed）实际等待；默认不等待，尽可能快地产生帧
+            speed: 实时模式下的加速倍数
+            seed: 随机数种子
+        """
+        rates = [refresh_rate] + [rate for _, rate in (schedule or [])]
+        if max(rates) > MAX_SIMULATED_RATE or min(rates) <= 0:
+            raise ValueError(f"刷新率必须在 (0, {MAX_SIMULATED_RATE}] Hz 范围内")
+        self.refresh_hint = refresh_rate
+        self.jitter_ns = jitter_ms * 1_000_000
+        self.drop_rate = drop_rate
+        self.max_drop = max_drop
+        self.drops = dict(drops or {})
+        self._schedule_start = np.array([0] + [start for start, _ in (schedule or [])], dtype=np.int64)
+        self._schedule_period = 1e9 / np.array(rates, dtype=np.float64)
+        self.frames = frames
+        self.realtime = realtime
+        self.speed = speed
+        self.seed = seed
+        self.open()
+
+    def open(self):
+        """重置虚拟时钟，起点为当前的perf_counter_ns"""
+        self._rng = np.random.default_rng(self.seed)
+        self._origin = time.perf_counter_ns()
+        self._last = self._origin
+        self._generated = 0
+        self._chunk: List[int] = []
+        self._pos = 0
+
+    def generate(self, count: int) -> np.ndarray:
+        """
+        向量化生成接下来的count个垂直同步时间戳，推进虚拟时钟
+
+        Returns:
+            int64时间戳数组（纳秒）
+        """
+        if self.frames is not None:
+            count = min(count, self.frames - self._generated)
+        if count <= 0:
+            return np.zeros(0, dtype=np.int64)
+        index = np.arange(self._generated, self._generated + count)
+        periods = self._schedule_period[np.searchsorted(self._schedule_start, index, side='right') - 1]
+
+        skipped = np.zeros(count)
+        if self.drop_rate > 0:
+            hit = self._rng.random(count) < self.drop_rate
+            skipped[hit] = self._rng.integers(1, self.max_drop + 1, int(hit.sum()))
+        for frame, dropped in self.drops.items():
+            if self._generated <= frame < self._generated + count:
+                skipped[frame - self._generated] = dropped
+
+        deltas = periods * (1 + skipped)
+        if self.jitter_ns > 0:
+            # 抖动不会让帧间隔小于标称周期的10%
+            deltas = np.maximum(deltas + self._rng.normal(0.0, self.jitter_ns, count), periods * 0.1)
+        timestamps = self._last + np.cumsum(deltas).astype(np.int64)
+        self._last = int(timestamps[-1])
+        self._generated += count
+        return timestamps
+
+    def wait(self) -> Optional[int]:
+        if self._pos == len(self._chunk):
+            # 批量生成后转成Python整数列表，逐帧读取时避免numpy标量开销
+            self._chunk = self.generate(SIMULATION_CHUNK).tolist()
+            self._pos = 0
+            if not self._chunk:
+                return None
+        timestamp = self._chunk[self._pos]
+        self._pos += 1
+        if self.realtime:
+            _sleep_until(self._origin + int((timestamp - self._origin) / self.speed))
+        return timestamp
+
+
+class ReplayVsyncSource(VsyncSource):
+    """回放已记录的垂直同步时间戳"""
+    name = "replay"
+
+    def __init__(self, timestamps: Union[np.ndarray, Iterable[int]], realtime: bool = False,
+                 speed: float = 1.0, refresh_hint: Optional[float] = None):
+        """
+        Args:
+            timestamps: 记录的时间戳（纳秒）
+            realtime: 是否按原始间隔（/ speed）实际等待
+            speed: 实时模式下的加速倍数
+            refresh_hint: 标称刷新率
+        """
+        self.timestamps = np.asarray(timestamps, dtype=np.int64)
+        self.realtime = realtime
+        self.speed = speed
+        self.refresh_hint = refresh_hint
+        self._values: List[int] = []
+        self.open()
+
+    def open(self):
+        # 转成Python整数列表，逐帧读取时避免numpy标量开销
+        self._values = self.timestamps.tolist()
+        self._pos = 0
+        self._origin = time.perf_counter_ns()
+
+    def wait(self) -> Optional[int]:
+        if self._pos >= len(self._values):
+            return None
+        timestamp = self._values[self._pos]
+        self._pos += 1
+        if self.realtime:
+            _sleep_until(self._origin + int((timestamp - self._values[0]) / self.speed))
+        return timestamp
@@ -0,0 +1,499 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : window_backend.py
+@Time    : 2025/04/02
+@Author  : Bruce.Si
+@Desc    : 窗口信息后端
+    - WindowMonitor 通过后端读取前台窗口，分两级：foreground()/rect() 为廉价查询，describe() 读取完整信息
+    - Win32WindowBackend: win32gui轮询
+    - WinEventHookBackend: SetWinEventHook 事件驱动，前台切换、位置/大小、标题、最小化变化时才唤醒，不再空转轮询
+    - SimulatedWindowBackend: 模拟窗口，可在Linux上驱动WindowMonitor的全部逻辑
+    - geometry() 一次遍历批量读取多个窗口的矩形和状态，写入调用方预分配的数组
+    - subscribe() 订阅顶层窗口的创建、销毁、显示、隐藏和标题变化，供 WindowIndex 增量更新
+"""
+
+import ctypes
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+Rect = Tuple[int, int, int, int]
+
+
+class WindowEntry(NamedTuple):
+    """顶层窗口的索引信息"""
+    class_name: str
+    title: str
+    pid: int
+    visible: bool
+
+
+# geometry() 每个窗口的字段
+GEOMETRY_FIELDS = ('left', 'top', 'right', 'bottom', 'state')
+
+# state字段的标志位（最小化/最大化与WindowMonitor历史记录的标志位一致）
+STATE_MINIMIZED = 0x01
+STATE_MAXIMIZED = 0x02
+STATE_VISIBLE = 0x08
+
+# WinEvent事件常量
+EVENT_SYSTEM_FOREGROUND = 0x0003
+EVENT_SYSTEM_MINIMIZESTART = 0x0016
+EVENT_SYSTEM_MINIMIZEEND = 0x0017
+EVENT_OBJECT_CREATE = 0x8000
+EVENT_OBJECT_DESTROY = 0x8001
+EVENT_OBJECT_SHOW = 0x8002
+EVENT_OBJECT_HIDE = 0x8003
+EVENT_OBJECT_LOCATIONCHANGE = 0x800B
+EVENT_OBJECT_NAMECHANGE = 0x800C
+WINEVENT_OUTOFCONTEXT = 0x0000
+WINEVENT_SKIPOWNPROCESS = 0x0002
+OBJID_WINDOW = 0
+CHILDID_SELF = 0
+GA_PARENT = 1
+WM_QUIT = 0x0012
+
+# 需要订阅的事件区间
+WINEVENT_RANGES = (
+    (EVENT_SYSTEM_FOREGROUND, EVENT_SYSTEM_FOREGROUND),
+    (EVENT_SYSTEM_MINIMIZESTART, EVENT_SYSTEM_MINIMIZEEND),
+    (EVENT_OBJECT_LOCATIONCHANGE, EVENT_OBJECT_NAMECHANGE),
+)
+
+# 有订阅者时额外订阅的事件区间（标题变化已包含在上面的区间中）
+SUBSCRIBE_EVENT_RANGES = (
+    (EVENT_OBJECT_CREATE, EVENT_OBJECT_HIDE),
+)
+
+# 订阅者关心的事件
+SUBSCRIBE_EVENTS = (EVENT_OBJECT_CREATE, EVENT_OBJECT_DESTROY, EVENT_OBJECT_SHOW, EVENT_OBJECT_HIDE,
+                    EVENT_OBJECT_NAMECHANGE)
+
+# 订阅回调：callback(event, hwnd)
+WindowEventCallback = Callable[[int, int], None]
+
+
+class WindowBackend:
+    """窗口信息后端"""
+    name = "backend"
+    # 是否为事件驱动，事件驱动的后端在没有事件时 wait_event() 会阻塞
+    event_driven = False
+
+    def open(self):
+        """开始监听前调用"""
+
+    def foreground(self) -> int:
+        """前台窗口句柄，没有时返回0"""
+        return 0
+
+    def rect(self, hwnd: int) -> Rect:
+        """窗口矩形 (left, top, right, bottom)"""
+        return 0, 0, 0, 0
+
+    def class_name(self, hwnd: int) -> str:
+        """窗口类名"""
+        return ""
+
+    def describe(self, hwnd: int, class_name: Optional[str] = None) -> Dict:
+        """
+        读取窗口完整信息
+
+        Args:
+            hwnd: 窗口句柄
+            class_name: 已缓存的类名，提供时不再查询
+        Returns:
+            {'hwnd', 'title', 'class_name', 'rect', 'is_minimized', 'is_maximized'}
+        """
+        return {}
+
+    def list_windows(self) -> Dict[int, str]:
+        """可见的顶层窗口：句柄 -> 标题，只包含有标题的窗口"""
+        return {}
+
+    def toplevel_windows(self) -> List[int]:
+        """全部顶层窗口句柄（包括不可见的）"""
+        return []
+
+    def window_entry(self, hwnd: int) -> Optional[WindowEntry]:
+        """顶层窗口的类名、标题、进程ID和可见性；窗口不存在或不是顶层窗口时返回None"""
+        return None
+
+    def subscribe(self, callback: WindowEventCallback) -> bool:
+        """
+        订阅顶层窗口的创建、销毁、显示、隐藏和标题变化
+
+        Args:
+            callback: callback(event, hwnd)，event为 EVENT_OBJECT_* 常量，在后端的事件线程中调用
+        Returns:
+            不支持订阅（轮询后端，或事件线程已经启动）时返回False
+        """
+        return False
+
+    def geometry(self, hwnds: Sequence[int], out: np.ndarray) -> np.ndarray:
+        """
+        批量读取窗口矩形和状态
+
+        Args:
+            hwnds: 窗口句柄
+            out: 输出数组，形状 (len(hwnds), len(GEOMETRY_FIELDS))
+        Returns:
+            每个窗口是否读取成功（窗口已关闭时为False，对应行保持不变）
+        """
+        valid = np.zeros(len(hwnds), dtype=bool)
+        for k, hwnd in enumerate(hwnds):
+            try:
+                info = self.describe(hwnd)
+            except Exception:
+                continue
+            out[k, :4] = info["rect"]
+            out[k, 4] = (STATE_MINIMIZED if info["is_minimized"] else 0) \
+                | (STATE_MAXIMIZED if info["is_maximized"] else 0) | STATE_VISIBLE
+            valid[k] = True
+        return valid
+
+    def wait_event(self, timeout: float) -> bool:
+        """
+        等待可能的窗口变化
+
+        Args:
+            timeout: 最长等待时间（秒）
+        Returns:
+            期间是否发生了事件；轮询后端总是返回True
+        """
+        return True
+
+    def close(self):
+        """停止监听后调用"""
+
+
+class Win32WindowBackend(WindowBackend):
+    """win32gui轮询"""
+    name = "win32"
+
+    def __init__(self, interval: float = 0.0):
+        """
+        Args:
+            interval: 每次轮询之间的等待时间（秒），0表示不等待
+        """
+        import win32gui
+        import win32con
+        self._win32gui = win32gui
+        self._sw_maximized = win32con.SW_SHOWMAXIMIZED
+        self._sw_minimized = win32con.SW_SHOWMINIMIZED
+        self.interval = interval
+        # 批量读取几何信息时直接调用user32，避免win32gui逐次构造元组
+        from ctypes import wintypes
+        self._user32 = ctypes.windll.user32
+        self._rect_buffer = wintypes.RECT()
+
+    def foreground(self) -> int:
+        return self._win32gui.GetForegroundWindow()
+
+    def rect(self, hwnd: int) -> Rect:
+        return self._win32gui.GetWindowRect(hwnd)
+
+    def class_name(self, hwnd: int) -> str:
+        return self._win32gui.GetClassName(hwnd)
+
+    def describe(self, hwnd: int, class_name: Optional[str] = None) -> Dict:
+        win32gui = self._win32gui
+        placement = win32gui.GetWindowPlacement(hwnd)
+        return {
+            "hwnd": hwnd,
+            "title": win32gui.GetWindowText(hwnd),
+            "class_name": class_name if class_name is not None else win32gui.GetClassName(hwnd),
+            "rect": win32gui.GetWindowRect(hwnd),
+            "is_minimized": placement[1] == self._sw_minimized,
+            "is_maximized": placement[1] == self._sw_maximized,
+        }
+
+    def list_windows(self) -> Dict[int, str]:
+        win32gui = self._win32gui
+        windows = {}
+
+        def callback(hwnd, _):
+            if win32gui.IsWindowVisible(hwnd):
+                title = win32gui.GetWindowText(hwnd)
+                if title:
+                    windows[hwnd] = title
+            return True
+
+        win32gui.EnumWindows(callback, None)
+        return windows
+
+    def toplevel_windows(self) -> List[int]:
+        hwnds = []
+        self._win32gui.EnumWindows(lambda hwnd, _: hwnds.append(hwnd) or True, None)
+        return hwnds
+
+    def window_entry(self, hwnd: int) -> Optional[WindowEntry]:
+        from ctypes import wintypes
+        user32 = self._user32
+        if not user32.IsWindow(hwnd) or user32.GetAncestor(hwnd, GA_PARENT) != user32.GetDesktopWindow():
+            return None
+        buffer = ctypes.create_unicode_buffer(512)
+        user32.GetClassNameW(hwnd, buffer, 512)
+        class_name = buffer.value
+        # InternalGetWindowText 不向窗口发送消息，目标程序无响应时也不会阻塞
+        user32.InternalGetWindowText(hwnd, buffer, 512)
+        pid = wintypes.DWORD()
+        user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+        return WindowEntry(class_name, buffer.value, pid.value, bool(user32.IsWindowVisible(hwnd)))
+
+    def geometry(self, hwnds: Sequence[int], out: np.ndarray) -> np.ndarray:
+        user32 = self._user32
+        rect = self._rect_buffer
+        rect_ref = ctypes.byref(rect)
+        valid = np.zeros(len(hwnds), dtype=bool)
+        for k, hwnd in enumerate(hwnds):
+            if not user32.GetWindowRect(hwnd, rect_ref):
+                continue
+            row = out[k]
+            row[0] = rect.left
+            row[1] = rect.top
+            row[2] = rect.right
+            row[3] = rect.bottom
+            row[4] = (STATE_MINIMIZED if user32.IsIconic(hwnd) else 0) \
+                | (STATE_MAXIMIZED if user32.IsZoomed(hwnd) else 0) \
+                | (STATE_VISIBLE if user32.IsWindowVisible(hwnd) else 0)
+            valid[k] = True
+        return valid
+
+    def wait_event(self, timeout: float) -> bool:
+        if self.interval > 0:
+            time.sleep(min(self.interval, timeout))
+        return True
+
+
+class WinEventHookBackend(Win32WindowBackend):
+    """SetWinEventHook事件驱动"""
+    name = "winevent"
+    event_driven = True
+
+    def __init__(self):
+        super().__init__()
+        self._event = threading.Event()
+        self._thread = None
+        self._thread_id = None
+        self._ready = threading.Event()
+        self._callback = None
+        self._subscribers: List[WindowEventCallback] = []
+        self.error = None
+
+    def subscribe(self, callback: WindowEventCallback) -> bool:
+        # 钩子在事件线程启动时安装，之后不能再增加订阅的事件
+        if self._thread is not None:
+            return False
+        self._subscribers.append(callback)
+        return True
+
+    def _on_event(self, hook, event, hwnd, id_object, id_child, thread, event_time):
+        if self._subscribers and event in SUBSCRIBE_EVENTS and id_object == OBJID_WINDOW and id_child == CHILDID_SELF:
+            for callback in self._subscribers:
+                callback(event, hwnd)
+        if EVENT_OBJECT_CREATE <= event <= EVENT_OBJECT_HIDE:
+            # 只为订阅者安装，不唤醒窗口监听
+            return
+        # 光标、插入符等对象也会产生位置变化事件，只关心窗口本身
+        if event == EVENT_OBJECT_LOCATIONCHANGE and id_object != OBJID_WINDOW:
+            return
+        self._event.set()
+
+    def _message_loop(self):
+        """钩子必须在有消息循环的线程中安装"""
+        from ctypes import wintypes
+        user32 = ctypes.windll.user32
+        self._thread_id = ctypes.windll.kernel32.GetCurrentThreadId()
+        proc_type = ctypes.WINFUNCTYPE(None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+                                       wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD)
+        self._callback = proc_type(self._on_event)  # 保持引用，避免回调被回收
+        user32.SetWinEventHook.restype = wintypes.HANDLE
+        hooks = []
+        ranges = WINEVENT_RANGES + (SUBSCRIBE_EVENT_RANGES if self._subscribers else ())
+        for event_min, event_max in ranges:
+            hook = user32.SetWinEventHook(event_min, event_max, 0, self._callback, 0, 0,
+                                          WINEVENT_OUTOFCONTEXT | WINEVENT_SKIPOWNPROCESS)
+            if not hook:
+                self.error = f"SetWinEventHook失败: {ctypes.windll.kernel32.GetLastError()}"
+            hooks.append(hook)
+        if not any(hooks):
+            # 钩子全部安装失败，退化为轮询
+            self.event_driven = False
+        self._ready.set()
+
+        msg = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), 0, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+        for hook in hooks:
+            if hook:
+                user32.UnhookWinEvent(hook)
+
+    def open(self):
+        if self._thread is not None:
+            return
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._message_loop, name="WinEventHook", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        # 首次检查不等待事件
+        self._event.set()
+
+    def wait_event(self, timeout: float) -> bool:
+        if not self.event_driven:
+            return True
+        if not self._event.wait(timeout):
+            return False
+        self._event.clear()
+        return True
+
+    def close(self):
+        if self._thread is None:
+            return
+        ctypes.windll.user32.PostThreadMessageW(self._thread_id, WM_QUIT, 0, 0)
+        self._thread.join(timeout=1)
+        self._thread = None
+
+
+class SimulatedWindowBackend(WindowBackend):
+    """模拟窗口，事件驱动，统计各类查询的调用次数"""
+    name = "simulated"
+    event_driven = True
+
+    def __init__(self, event_driven: bool = True):
+        """
+        Args:
+            event_driven: False时模拟轮询后端，wait_event()不阻塞
+        """
+        self.event_driven = event_driven
+        self.windows: Dict[int, Dict] = {}
+        self.foreground_hwnd = 0
+        self.calls = {'foreground': 0, 'rect': 0, 'class_name': 0, 'describe': 0, 'geometry': 0}
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._subscribers: List[WindowEventCallback] = []
+
+    def _notify(self, event: int, hwnd: int):
+        for callback in self._subscribers:
+            callback(event, hwnd)
+
+    def add_window(self, hwnd: int, title: str = "", class_name: str = "", rect: Rect = (0, 0, 800, 600),
+                   is_minimized: bool = False, is_maximized: bool = False, foreground: bool = True,
+                   visible: bool = True, pid: int = 0):
+        """新建窗口，默认切换为前台窗口"""
+        with self._lock:
+            self.windows[hwnd] = {
+                "hwnd": hwnd, "title": title, "class_name": class_name, "rect": tuple(rect),
+                "is_minimized": is_minimized, "is_maximized": is_maximized, "visible": visible, "pid": pid,
+            }
+            if foreground:
+                self.foreground_hwnd = hwnd
+        self._event.set()
+        self._notify(EVENT_OBJECT_CREATE, hwnd)
+        if visible:
+            self._notify(EVENT_OBJECT_SHOW, hwnd)
+
+    def set_foreground(self, hwnd: int):
+        with self._lock:
+            self.foreground_hwnd = hwnd
+        self._event.set()
+
+    def update_window(self, hwnd: int, **changes):
+        """修改窗口属性（title、rect、is_minimized、is_maximized、visible）"""
+        with self._lock:
+            if 'rect' in changes:
+                changes['rect'] = tuple(changes['rect'])
+            self.windows[hwnd].update(changes)
+        self._event.set()
+        if 'title' in changes:
+            self._notify(EVENT_OBJECT_NAMECHANGE, hwnd)
+        if 'visible' in changes:
+            self._notify(EVENT_OBJECT_SHOW if changes['visible'] else EVENT_OBJECT_HIDE, hwnd)
+
+    def remove_window(self, hwnd: int):
+        """关闭窗口"""
+        with self._lock:
+            self.windows.pop(hwnd, None)
+            if self.foreground_hwnd == hwnd:
+                self.foreground_hwnd = 0
+        self._event.set()
+        self._notify(EVENT_OBJECT_DESTROY, hwnd)
+
+    def foreground(self) -> int:
+        self.calls['foreground'] += 1
+        return self.foreground_hwnd
+
+    def rect(self, hwnd: int) -> Rect:
+        self.calls['rect'] += 1
+        return self.windows[hwnd]["rect"]
+
+    def class_name(self, hwnd: int) -> str:
+        self.calls['class_name'] += 1
+        return self.windows[hwnd]["class_name"]
+
+    def describe(self, hwnd: int, class_name: Optional[str] = None) -> Dict:
+        self.calls['describe'] += 1
+        with self._lock:
+            info = dict(self.windows[hwnd])
+        if class_name is None:
+            self.calls['class_name'] += 1
+        else:
+            info["class_name"] = class_name
+        return info
+
+    def list_windows(self) -> Dict[int, str]:
+        with self._lock:
+            return {hwnd: info["title"] for hwnd, info in self.windows.items() if info["visible"] and info["title"]}
+
+    def toplevel_windows(self) -> List[int]:
+        with self._lock:
+            return list(self.windows)
+
+    def window_entry(self, hwnd: int) -> Optional[WindowEntry]:
+        with self._lock:
+            info = self.windows.get(hwnd)
+            if info is None:
+                return None
+            return WindowEntry(info["class_name"], info["title"], info["pid"], info["visible"])
+
+    def subscribe(self, callback: WindowEventCallback) -> bool:
+        if not self.event_driven:
+            return False
+        self._subscribers.append(callback)
+        return True
+
+    def geometry(self, hwnds: Sequence[int], out: np.ndarray) -> np.ndarray:
+        self.calls['geometry'] += 1
+        valid = np.zeros(len(hwnds), dtype=bool)
+        with self._lock:
+            for k, hwnd in enumerate(hwnds):
+                info = self.windows.get(hwnd)
+                if info is None:
+                    continue
+                out[k, :4] = info["rect"]
+                out[k, 4] = (STATE_MINIMIZED if info["is_minimized"] else 0) \
+                    | (STATE_MAXIMIZED if info["is_maximized"] else 0) \
+                    | (STATE_VISIBLE if info["visible"] else 0)
+                valid[k] = True
+        return valid
+
+    def wait_event(self, timeout: float) -> bool:
+        if not self.event_driven:
+            return True
+        if not self._event.wait(timeout):
+            return False
+        self._event.clear()
+        return True
+
+
+def create_backend() -> WindowBackend:
+    """默认后端：Windows下优先使用WinEvent钩子，不可用时退回轮询"""
+    if sys.platform != 'win32':
+        raise OSError("当前平台没有可用的窗口后端，请使用 SimulatedWindowBackend")
+    try:
+        return WinEventHookBackend()
+    except (ImportError, AttributeError, OSError):
+        return Win32WindowBackend()
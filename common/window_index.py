@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : window_index.py
+@Time    : 2025/04/07
+@Author  : Bruce.Si
+@Desc    : 顶层窗口增量索引
+    - 维护 句柄 -> (类名, 标题, 进程ID, 是否可见)，以及按类名、进程ID、标题正则的反向索引
+    - 事件驱动：订阅后端的窗口创建、销毁、显示、隐藏和标题变化事件，只更新发生变化的窗口
+    - 后端不支持订阅时退化为后台线程定期枚举并与索引比对（增量更新）
+    - 按类名/进程ID查找为字典查询；标题正则首次使用时扫描一次，之后随窗口变化增量维护，
+      最多缓存 MAX_TITLE_PATTERNS 个正则，超出时淘汰最久未使用的
+    - wait_for() 在索引更新时被唤醒，不再反复调用EnumWindows
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Pattern, Set, Tuple
+
+from common.logger import Logger
+from common.window_backend import WindowBackend, WindowEntry, create_backend, EVENT_OBJECT_DESTROY
+from common.precision_timer import Ticker
+
+# 不支持事件订阅时的枚举比对间隔（秒）
+REFRESH_INTERVAL = 0.05
+
+# 增量维护的标题正则个数上限，每个正则在每次窗口变化时都要匹配一次
+MAX_TITLE_PATTERNS = 32
+
+
+class WindowIndex:
+    """顶层窗口增量索引"""
+
+    def __init__(self, logger: Logger, backend: WindowBackend = None, refresh_interval: float = REFRESH_INTERVAL):
+        """
+        Args:
+            logger: 日志器
+            backend: 窗口信息后端，默认Windows下使用WinEvent钩子；索引需要独占后端（订阅须在后端启动前完成）
+            refresh_interval: 后端不支持事件订阅时的枚举比对间隔（秒）
+        """
+        self.logger = logger
+        self.backend = backend if backend is not None else create_backend()
+        self.refresh_interval = refresh_interval
+        self.event_driven = False
+        self._entries: Dict[int, WindowEntry] = {}
+        self._by_class: Dict[str, Set[int]] = {}
+        self._by_pid: Dict[int, Set[int]] = {}
+        # 标题正则 -> (编译结果, 匹配的窗口)，按最近使用排序
+        self._patterns: 'OrderedDict[str, Tuple[Pattern, Set[int]]]' = OrderedDict()
+        self._cond = threading.Condition()
+        self.updates = 0  # 索引变化次数
+        self.is_monitoring = False
+        self.monitor_thread = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, hwnd: int) -> bool:
+        return hwnd in self._entries
+
+    def open(self):
+        """订阅窗口事件并建立初始索引"""
+        if self.is_monitoring:
+            return
+        self.event_driven = self.backend.subscribe(self._on_event)
+        self.backend.open()
+        self.refresh()
+        self.is_monitoring = True
+        if not self.event_driven:
+            self.monitor_thread = threading.Thread(target=self._refresh_loop, name="WindowIndex", daemon=True)
+            self.monitor_thread.start()
+
+    def close(self):
+        """停止更新"""
+        self.is_monitoring = False
+        if self.monitor_thread and self.monitor_thread is not threading.current_thread():
+            self.monitor_thread.join()
+        self.monitor_thread = None
+        self.backend.close()
+
+    def _add(self, hwnd: int, entry: WindowEntry):
+        self._entries[hwnd] = entry
+        self._by_class.setdefault(entry.class_name, set()).add(hwnd)
+        self._by_pid.setdefault(entry.pid, set()).add(hwnd)
+        for pattern, matched in self._patterns.values():
+            if pattern.search(entry.title):
+                matched.add(hwnd)
+
+    def _discard(self, hwnd: int) -> Optional[WindowEntry]:
+        entry = self._entries.pop(hwnd, None)
+        if entry is None:
+            return None
+        self._by_class[entry.class_name].discard(hwnd)
+        self._by_pid[entry.pid].discard(hwnd)
+        for _, matched in self._patterns.values():
+            matched.discard(hwnd)
+        return entry
+
+    def _update(self, hwnd: int, entry: Optional[WindowEntry]) -> bool:
+        """更新单个窗口，entry为None表示窗口已不存在；返回索引是否变化"""
+        with self._cond:
+            if self._entries.get(hwnd) == entry:
+                return False
+            self._discard(hwnd)
+            if entry is not None:
+                self._add(hwnd, entry)
+            self.updates += 1
+            self._cond.notify_all()
+            return True
+
+    def _on_event(self, event: int, hwnd: int):
+        """后端事件线程中调用，只读取发生变化的窗口"""
+        entry = None if event == EVENT_OBJECT_DESTROY else self.backend.window_entry(hwnd)
+        # 子窗口的事件读取结果为None，索引中没有该窗口时_update不会产生变化
+        self._update(hwnd, entry)
+
+    def refresh(self) -> int:
+        """
+        枚举顶层窗口并与索引比对，只更新有差异的窗口
+
+        Returns:
+            发生变化的窗口数
+        """
+        hwnds = set(self.backend.toplevel_windows())
+        changed = 0
+        for hwnd in list(self._entries):
+            if hwnd not in hwnds:
+                changed += self._update(hwnd, None)
+        for hwnd in hwnds:
+            changed += self._update(hwnd, self.backend.window_entry(hwnd))
+        return changed
+
+    def _refresh_loop(self):
+        """不支持事件订阅时的比对线程"""
+        ticker = Ticker(self.refresh_interval)
+        while self.is_monitoring:
+            ticker.wait()
+            try:
+                self.refresh()
+            except Exception as e:
+                self.logger.error(f"窗口索引更新出错: {e}")
+
+    def get(self, hwnd: int) -> Optional[WindowEntry]:
+        """窗口的索引信息"""
+        return self._entries.get(hwnd)
+
+    def by_class(self, class_name: str) -> List[int]:
+        """按类名查找"""
+        with self._cond:
+            return list(self._by_class.get(class_name, ()))
+
+    def by_pid(self, pid: int) -> List[int]:
+        """按进程ID查找"""
+        with self._cond:
+            return list(self._by_pid.get(pid, ()))
+
+    def _title_matches(self, pattern: str) -> Set[int]:
+        """标题正则的匹配集合，首次使用时扫描全部窗口，之后随窗口变化增量维护；超出上限时淘汰最久未使用的正则"""
+        if pattern in self._patterns:
+            self._patterns.move_to_end(pattern)
+            return self._patterns[pattern][1]
+        compiled = re.compile(pattern)
+        matched = {hwnd for hwnd, entry in self._entries.items() if compiled.search(entry.title)}
+        self._patterns[pattern] = (compiled, matched)
+        if len(self._patterns) > MAX_TITLE_PATTERNS:
+            self._patterns.popitem(last=False)
+        return matched
+
+    def by_title(self, pattern: str) -> List[int]:
+        """按标题正则（re.search）查找"""
+        with self._cond:
+            return list(self._title_matches(pattern))
+
+    def _matches(self, class_name: str = None, title: str = None, pid: int = None,
+                 visible: Optional[bool] = None) -> Iterator[int]:
+        """按条件逐个产生窗口句柄：遍历最小的候选集合，其余条件逐个做集合成员判断"""
+        candidates = []
+        if class_name is not None:
+            candidates.append(self._by_class.get(class_name, set()))
+        if pid is not None:
+            candidates.append(self._by_pid.get(pid, set()))
+        if title is not None:
+            candidates.append(self._title_matches(title))
+        if candidates:
+            candidates.sort(key=len)
+            smallest, others = candidates[0], candidates[1:]
+        else:
+            smallest, others = self._entries, []
+        for hwnd in smallest:
+            if all(hwnd in other for other in others) and (visible is None or self._entries[hwnd].visible == visible):
+                yield hwnd
+
+    def find(self, class_name: str = None, title: str = None, pid: int = None,
+             visible: Optional[bool] = None) -> List[int]:
+        """
+        按条件查找窗口，条件之间为“与”
+
+        Args:
+            class_name: 类名
+            title: 标题正则（re.search）
+            pid: 进程ID
+            visible: 是否可见，None表示不限
+        Returns:
+            窗口句柄列表
+        """
+        with self._cond:
+            return list(self._matches(class_name, title, pid, visible))
+
+    def first(self, class_name: str = None, title: str = None, pid: int = None,
+              visible: Optional[bool] = None) -> Optional[int]:
+        """按条件查找一个窗口，没有时返回None"""
+        with self._cond:
+            return next(self._matches(class_name, title, pid, visible), None)
+
+    def wait_for(self, class_name: str = None, title: str = None, pid: int = None, visible: Optional[bool] = True,
+                 timeout: float = None) -> Optional[int]:
+        """
+        等待符合条件的窗口出现，索引每次变化时重新检查
+
+        Args:
+            timeout: 最长等待时间（秒），None表示一直等待
+        Returns:
+            窗口句柄，超时返回None
+        """
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        with self._cond:
+            while True:
+                hwnd = self.first(class_name, title, pid, visible)
+                if hwnd is not None:
+                    return hwnd
+                remaining = None if deadline is None else deadline - time.perf_counter()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
@@ -4,80 +4,162 @@
 @Time    : 2025/01/06
 @Author  : Bruce.Si
 @Desc    : 窗口监听模块
+    - 两级检查：每次只比较前台窗口句柄和窗口矩形，发生变化时才读取标题、状态等完整信息
+    - 类名按窗口句柄缓存
+    - 事件驱动的后端（WinEvent钩子）在没有窗口事件时阻塞等待，不再空转轮询
+    - 历史记录为预分配的结构化数组，时间戳为perf_counter_ns，每次会话只记录一个墙上时间锚点
 """
 
-import win32gui
-import win32con
 import time
 from datetime import datetime
 from typing import Dict, Optional
+
+import numpy as np
 from common.logger import create_logger, Logger
+from common.window_backend import WindowBackend, create_backend
+from common.cadence import AdaptiveCadence
+
+# 事件驱动后端单次等待事件的最长时间（秒），调用方循环检查停止标志的最大延迟
+EVENT_WAIT_TIMEOUT = 0.05
+
+# 轮询后端的完整检查周期（秒），捕获只有标题变化、矩形不变的情况
+FULL_CHECK_INTERVAL = 0.1
+
+# 历史记录的字段：时间戳为perf_counter_ns，跨进程可直接相减（系统级单调时钟）
+WINDOW_RECORD_DTYPE = np.dtype([
+    ('ts', np.int64),
+    ('hwnd', np.int64),
+    ('left', np.int32),
+    ('top', np.int32),
+    ('right', np.int32),
+    ('bottom', np.int32),
+    ('flags', np.uint8),
+])
+
+# 历史记录标志位
+FLAG_MINIMIZED = 0x01
+FLAG_MAXIMIZED = 0x02
+FLAG_NEW_WINDOW = 0x04  # 前台窗口切换（否则为同一窗口的状态变化）
+
+# 历史记录缓冲区初始容量
+HISTORY_CHUNK = 256
 
 
 class WindowMonitor:
-    def __init__(self, logger: Logger, target: Dict = None):
-        self.window_history: list = []  # 窗口历史记录
+    def __init__(self, logger: Logger, target: Dict = None, backend: WindowBackend = None,
+                 cadence: AdaptiveCadence = None):
+        # 窗口历史记录，预分配的结构化数组，容量不足时成倍扩容
+        self._history = np.zeros(HISTORY_CHUNK, dtype=WINDOW_RECORD_DTYPE)
+        self._history_count = 0
+        # 墙上时间锚点：(time.time_ns, perf_counter_ns)，用于把记录时间戳换算成墙上时间
+        self.wall_anchor = (time.time_ns(), time.perf_counter_ns())
         self.current_window: Optional[Dict] = None  # 当前活动窗口
         self.is_monitoring = False  # 是否正在监听
         self.monitor_thread = None  # 监听线程
-        self.monitor_interval = 0.00001  # 监听间隔（秒）
+        # 自适应轮询节奏：轮询后端空闲时慢速轮询，触发或检测到变化后短时间高频轮询；
+        # 事件驱动后端只用于触发检测和检测时延统计
+        self.cadence = cadence if cadence is not None else AdaptiveCadence()
         self.target = target  # 目标窗口
         self.target_num = 0  #目标窗口序号(实际是响应窗口序号，target_num+1)
         self.target_window_record = None  # 目标窗口记录
         self.last_window = None  # 上次记录窗口
-        
+        self.last_rect = None  # 上次检查的窗口矩形
+        self._class_names: Dict[int, str] = {}  # 窗口句柄 -> 类名缓存
+        self._last_full_check = 0.0  # 上次完整检查的时间（perf_counter）
+
+        # 窗口信息后端，默认Windows下使用WinEvent钩子
+        self.backend = backend if backend is not None else create_backend()
+        self.backend.open()
+
         # 初始化日志器
         self.logger = logger
 
+    @property
+    def window_history(self) -> np.ndarray:
+        """窗口历史记录（WINDOW_RECORD_DTYPE结构化数组）的零拷贝视图，时间戳字段为 ['ts']"""
+        return self._history[:self._history_count]
+
+    def wall_time(self, timestamp_ns: int) -> datetime:
+        """把perf_counter_ns时间戳换算成墙上时间"""
+        wall_ns, perf_ns = self.wall_anchor
+        return datetime.fromtimestamp((wall_ns + int(timestamp_ns) - perf_ns) / 1e9)
+
     def get_window_info(self, hwnd: int) -> Dict:
         """获取窗口详细信息"""
 
         try:
-            rect = win32gui.GetWindowRect(hwnd)
-            width = rect[2] - rect[0]
-            height = rect[3] - rect[1]
-
-            # 获取窗口状态
-            placement = win32gui.GetWindowPlacement(hwnd)
-            is_zoomed = placement[1] == win32con.SW_SHOWMAXIMIZED
-            is_minimized = placement[1] == win32con.SW_SHOWMINIMIZED
-            
-            return {
-                "timestamp": datetime.now(),
-                "hwnd": hwnd,
-                "title": win32gui.GetWindowText(hwnd),
-                "class_name": win32gui.GetClassName(hwnd),
-                "rect": rect,
-                "size": (width, height),
-                "position": (rect[0], rect[1]),
-                "is_minimized": is_minimized,
-                "is_maximized": is_zoomed
-            }
+            timestamp = time.perf_counter_ns()  # 检测到变化的时刻，早于读取完整信息
+            info = self.backend.describe(hwnd, class_name=self._class_names.get(hwnd))
+            self._class_names[hwnd] = info["class_name"]
+            rect = info["rect"]
+            info["timestamp"] = timestamp
+            info["size"] = (rect[2] - rect[0], rect[3] - rect[1])
+            info["position"] = (rect[0], rect[1])
+            return info
         except Exception as e:
             self.logger.error(f"获取窗口信息失败: {e}")
             return {}
 
-    def add_to_history(self, window_info: Dict):
+    def add_to_history(self, window_info: Dict, new_window: bool = False):
         """添加窗口信息到历史记录"""
-        timestamp = window_info["timestamp"]
-        self.window_history.append(timestamp)
+        if self._history_count == len(self._history):
+            history = np.zeros(len(self._history) * 2, dtype=WINDOW_RECORD_DTYPE)
+            history[:self._history_count] = self._history[:self._history_count]
+            self._history = history
+        rect = window_info.get("rect") or (0, 0, 0, 0)
+        flags = (FLAG_MINIMIZED if window_info.get("is_minimized") else 0) \
+            | (FLAG_MAXIMIZED if window_info.get("is_maximized") else 0) \
+            | (FLAG_NEW_WINDOW if new_window else 0)
+        self._history[self._history_count] = (
+            window_info.get("timestamp", time.perf_counter_ns()), window_info.get("hwnd", 0),
+            rect[0], rect[1], rect[2], rect[3], flags
+        )
+        self._history_count += 1
+
+    def _needs_full_check(self, hwnd: int, event: bool) -> bool:
+        """廉价检查：句柄或矩形变化、收到窗口事件或到达完整检查周期时才读取完整信息"""
+        if hwnd != self.last_window:
+            return True
+        try:
+            rect = self.backend.rect(hwnd)
+        except Exception:
+            return True
+        if rect != self.last_rect:
+            return True
+        if self.backend.event_driven:
+            # 事件驱动时标题、最小化等变化都会产生事件
+            return event
+        return time.perf_counter() - self._last_full_check >= FULL_CHECK_INTERVAL
 
     def monitor_window_changes(self):
         """监听窗口变化"""
-        current_hwnd = win32gui.GetForegroundWindow()
-        if current_hwnd != 0:  # 非正常窗口处理
+        # 事件驱动后端在没有窗口事件时阻塞等待，超时后直接返回，调用方可检查停止标志
+        # 节奏对象只负责触发检测和检测时延统计，等待超时不超过其空闲间隔
+        if self.backend.event_driven:
+            event = self.backend.wait_event(min(self.cadence.poll(), EVENT_WAIT_TIMEOUT))
+            if not event:
+                return
+        else:
+            self.cadence.wait()
+            event = False
+        current_hwnd = self.backend.foreground()
+        if current_hwnd != 0 and self._needs_full_check(current_hwnd, event):  # 非正常窗口处理
             window_info = self.get_window_info(current_hwnd)
+            self._last_full_check = time.perf_counter()
+            self.last_rect = window_info.get("rect")
             if current_hwnd != self.last_window:
                 self.current_window = window_info
-                self.add_to_history(window_info)
+                self.add_to_history(window_info, new_window=True)
+                self.cadence.notify_change()
                 self.log_window_info(window_info)
             else:
                 if self.has_window_changed(self.current_window, window_info):
                     self.current_window = window_info
                     self.add_to_history(window_info)
+                    self.cadence.notify_change()
                     self.log_window_info(window_info, changed_only=True)
 
-            # 检查是否遇到目标窗口
+            # 检查是否遇到目标窗口（只在完整检查后比较）
             if not self.target_window_record and self.target:
                 if not self.has_window_changed(self.current_window, self.target):
                     self.target_window_record = window_info
@@ -98,7 +180,7 @@ class WindowMonitor:
         
         log_msg = (
             f"\n{event_type}:\n"
-            f"时间: {info['timestamp'].strftime('%Y-%m-%d %H:%M:%S.%f')}\n"
+            f"时间: {self.wall_time(info['timestamp']).strftime('%Y-%m-%d %H:%M:%S.%f')}\n"
             f"标题: 【-{info['title']}-】\n"
             f"句柄: {info['hwnd']}\n"
             f"类名: {info['class_name']}\n"
@@ -118,7 +200,6 @@ class WindowMonitor:
             while self.is_monitoring:
                 try:
                     self.monitor_window_changes()
-                    time.sleep(self.monitor_interval)
                 except Exception as e:
                     print(f"读取数据时出错: {e}")
                     time.sleep(1)  # 出错时等待1秒再重试
@@ -131,13 +212,14 @@ class WindowMonitor:
     def stop_monitoring(self):
         """停止监听"""
         self.is_monitoring = False
+        self.backend.close()
         self.logger.info("窗口监听已停止")
 
     def results_analysis(self, start, end):
         """结果分析"""
-        # 计算最后一个窗口和响应窗口的时差
-        last = self.window_history[end] - self.window_history[start]
-        return last.total_seconds() * 1000
+        # 计算最后一个窗口和响应窗口的时差（毫秒）
+        timestamps = self.window_history['ts']
+        return (int(timestamps[end]) - int(timestamps[start])) / 1_000_000
 
 
 def main():
@@ -145,7 +227,8 @@ def main():
             name="window_monitor",
             level="INFO",
             time_rotating=True,
-            when='midnight'
+            when='midnight',
+            async_mode=True
         )
     target = {
         "title": "auto_win [C:/Users/Bruce.Si/PycharmProjects/auto_win] – window_monitor.py",
@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : window_trajectory.py
+@Time    : 2025/04/05
+@Author  : Bruce.Si
+@Desc    : 窗口动画轨迹记录
+    - 按垂直同步节拍（每帧一次）采样一个或多个窗口的矩形，写入预分配的NumPy缓冲区
+    - 采样时间戳为垂直同步时刻（perf_counter_ns），与刷新率监控、窗口监听的时间戳可直接相减
+    - 记录结束后用 trajectory_analysis 检测动画起始、稳定时间、过冲和逐帧步进的不规则程度
+    - 记录的是后端报告的窗口矩形：拖动、分屏吸附等由窗口位置驱动的动画可逐帧看到，
+      只由DWM合成的过渡效果在矩形上表现为一次跳变（时长约为一帧）
+    - 配合 SimulatedWindowBackend 和 SimulatedVsyncSource 可在Linux上运行
+"""
+
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from common.logger import create_logger, Logger
+from common.window_backend import WindowBackend, Win32WindowBackend
+from common.vsync_source import VsyncSource, DwmVsyncSource
+from common import trajectory_analysis
+
+# 采样缓冲区初始容量：144Hz下约10秒
+TRAJECTORY_CHUNK = 144 * 10
+
+
+class WindowTrajectoryRecorder:
+    """窗口矩形轨迹记录"""
+
+    def __init__(self, logger: Logger, hwnds: Iterable[int] = None, backend: WindowBackend = None,
+                 source: VsyncSource = None):
+        """
+        Args:
+            logger: 日志器
+            hwnds: 跟踪的窗口句柄，不指定时开始记录时跟踪当前前台窗口
+            backend: 窗口信息后端，默认win32gui
+            source: 采样节拍的垂直同步信号源，默认Windows DWM
+        """
+        self.hwnds: List[int] = list(hwnds or [])
+        self.backend = backend if backend is not None else Win32WindowBackend()
+        self.source = source if source is not None else DwmVsyncSource()
+        # 预分配的缓冲区：时间戳 (N,)、矩形 (N, 窗口数, 4)、矩形是否有效 (N, 窗口数)
+        self._timestamps = np.empty(0, dtype=np.int64)
+        self._rects = np.empty((0, 0, 4), dtype=np.int32)
+        self._valid = np.empty((0, 0), dtype=bool)
+        self._count = 0
+        self.is_monitoring = False
+        self.capture_thread = None
+        self._stop_event = threading.Event()
+        self.wall_anchor = (time.time_ns(), time.perf_counter_ns())
+
+        # 初始化日志器
+        self.logger = logger
+
+    def track(self, hwnd: int):
+        """
+        添加跟踪的窗口，只能在记录开始前调用
+
+        Raises:
+            RuntimeError: 已有采样记录
+        """
+        if self._count:
+            raise RuntimeError("已开始记录，不能再添加跟踪窗口")
+        if hwnd not in self.hwnds:
+            self.hwnds.append(hwnd)
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """采样时间戳（纳秒）的零拷贝视图"""
+        return self._timestamps[:self._count]
+
+    @property
+    def rects(self) -> np.ndarray:
+        """窗口矩形 (采样数, 窗口数, 4) 的零拷贝视图，窗口不存在的采样为0"""
+        return self._rects[:self._count]
+
+    def reset(self):
+        """清空已记录的采样，按当前跟踪的窗口数重新分配缓冲区"""
+        if not self.hwnds:
+            hwnd = self.backend.foreground()
+            if hwnd:
+                self.hwnds.append(hwnd)
+        windows = len(self.hwnds)
+        self._timestamps = np.empty(TRAJECTORY_CHUNK, dtype=np.int64)
+        self._rects = np.zeros((TRAJECTORY_CHUNK, windows, 4), dtype=np.int32)
+        self._valid = np.zeros((TRAJECTORY_CHUNK, windows), dtype=bool)
+        self._count = 0
+        self.wall_anchor = (time.time_ns(), time.perf_counter_ns())
+
+    def _grow(self):
+        """缓冲区扩容，成倍增长"""
+        size = len(self._timestamps) * 2
+        timestamps = np.empty(size, dtype=np.int64)
+        rects = np.zeros((size,) + self._rects.shape[1:], dtype=np.int32)
+        valid = np.zeros((size, self._valid.shape[1]), dtype=bool)
+        timestamps[:self._count] = self._timestamps[:self._count]
+        rects[:self._count] = self._rects[:self._count]
+        valid[:self._count] = self._valid[:self._count]
+        self._timestamps, self._rects, self._valid = timestamps, rects, valid
+
+    def record_frame(self) -> bool:
+        """
+        等待下一次垂直同步并采样所有跟踪窗口的矩形
+
+        Returns:
+            信号源已结束时返回False
+        """
+        timestamp = self.source.wait()
+        if timestamp is None:
+            return False
+        if self._count == len(self._timestamps):
+            self._grow()
+        index = self._count
+        self._timestamps[index] = timestamp
+        rects = self._rects[index]
+        valid = self._valid[index]
+        for k, hwnd in enumerate(self.hwnds):
+            try:
+                rects[k] = self.backend.rect(hwnd)
+                valid[k] = True
+            except Exception:
+                # 窗口已关闭或句柄失效
+                valid[k] = False
+        self._count += 1
+        return True
+
+    def trajectory(self, hwnd: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        单个窗口的轨迹，只包含窗口存在的采样
+
+        Returns:
+            (时间戳 (N,), 矩形 (N, 4))
+        """
+        k = self.hwnds.index(hwnd)
+        valid = self._valid[:self._count, k]
+        return self.timestamps[valid], self.rects[valid, k]
+
+    def analyze(self, hwnd: int = None, **kwargs) -> Dict[int, List[Dict]]:
+        """
+        检测动画并分析，参数同 trajectory_analysis.detect_animations
+
+        Args:
+            hwnd: 只分析指定窗口，不指定时分析全部跟踪窗口
+        Returns:
+            窗口句柄 -> 动画列表
+        """
+        hwnds = self.hwnds if hwnd is None else [hwnd]
+        return {h: trajectory_analysis.detect_animations(*self.trajectory(h), **kwargs) for h in hwnds}
+
+    def results_analysis(self) -> Dict[int, List[Dict]]:
+        """分析并输出每个窗口的动画"""
+        results = self.analyze()
+        self.logger.info(f"\n窗口轨迹: {self._count} 帧, {len(self.hwnds)} 个窗口")
+        for hwnd, animations in results.items():
+            if not animations:
+                self.logger.info(f"窗口 {hwnd}: 未检测到动画")
+                continue
+            for i, animation in enumerate(animations, 1):
+                self.logger.info(
+                    f"\n窗口 {hwnd} 动画{i}:\n"
+                    f"矩形: {animation['from_rect']} -> {animation['to_rect']}\n"
+                    f"时长: {animation['duration_ms']:.2f}ms ({animation['frames']}帧)\n"
+                    f"过冲: {animation['overshoot_px']:.0f}px ({animation['overshoot_pct']:.1f}%)\n"
+                    f"峰值速度: {animation['peak_speed']:.2f}px/ms\n"
+                    f"停顿帧: {animation['stalled_frames']}\n"
+                    f"不规则步进: {animation['irregular_steps']} (最大 {animation['max_irregularity']:.2f})"
+                )
+        return results
+
+    def _capture_loop(self):
+        """采集线程"""
+        while not self._stop_event.is_set():
+            try:
+                if not self.record_frame():
+                    break
+            except Exception as e:
+                self.logger.error(f"窗口轨迹采样出错: {e}")
+                break
+        self.is_monitoring = False
+
+    def start_monitoring(self):
+        """开始记录，在后台线程中采样，立即返回"""
+        if self.is_monitoring:
+            return
+        self.reset()
+        try:
+            self.source.open()
+        except OSError as e:
+            self.logger.error(f"垂直同步信号源不可用: {e}")
+            return
+        self._stop_event.clear()
+        self.is_monitoring = True
+        self.capture_thread = threading.Thread(target=self._capture_loop, name="WindowTrajectory", daemon=True)
+        self.capture_thread.start()
+        self.logger.info(f"窗口轨迹记录已启动，跟踪窗口: {self.hwnds}")
+
+    def stop_monitoring(self):
+        """停止记录"""
+        self._stop_event.set()
+        if self.capture_thread and self.capture_thread is not threading.current_thread():
+            self.capture_thread.join()
+        self.capture_thread = None
+        self.is_monitoring = False
+        self.source.close()
+        self.logger.info("窗口轨迹记录已停止")
+
+    def capture(self, duration: float = None, frames: int = None) -> np.ndarray:
+        """
+        在当前线程中同步记录
+
+        Args:
+            duration: 记录时长（秒）
+            frames: 最多记录的帧数
+        Returns:
+            采样时间戳的零拷贝视图
+        """
+        self.reset()
+        self.source.open()
+        deadline = time.perf_counter_ns() + int(duration * 1e9) if duration is not None else None
+        while frames is None or self._count < frames:
+            if not self.record_frame():
+                break
+            if deadline is not None and self._timestamps[self._count - 1] >= deadline:
+                break
+        self.source.close()
+        return self.timestamps
+
+
+def main():
+    logger = create_logger(
+        name="window_trajectory",
+        level="INFO",
+        time_rotating=True,
+        when='midnight'
+    )
+    recorder = WindowTrajectoryRecorder(logger=logger)
+    print("3秒内拖动或最大化前台窗口...")
+    recorder.capture(duration=3)
+    recorder.results_analysis()
+
+
+if __name__ == "__main__":
+    main()
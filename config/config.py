@@ -22,4 +22,13 @@ DESKTOP_ARG = {
         "is_maximized": False
     },
     "S990":{},
-}
\ No newline at end of file
+}
+
+# 各监听器的采样间隔（秒），频谱分析时用于识别监听器自身引起的周期性卡顿
+MONITOR_SAMPLING_INTERVALS = {
+    "PerformanceMonitor": 1.0,
+    "PowerMonitor": 0.1,
+    "CpuCoreMonitor": 0.05,
+    "HWiNFOMonitor": 1.0,
+    "HWINFOLOGMonitor": 1.0,
+}
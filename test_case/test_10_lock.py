@@ -25,7 +25,8 @@ logger = create_logger(
     name="test_open_apps",
     level="INFO",
     time_rotating=True,
-    when='midnight'
+    when='midnight',
+    async_mode=True
 )
 # 目标app
 target = {
@@ -73,7 +74,6 @@ def process_keyboard_monitor():
         # 等待监控停止
         while monitor.is_monitoring:
             process_lock_screen_monitor()
-            time.sleep(0.00001)
 
         logger.info("监控已结束")
     except KeyboardInterrupt:
@@ -86,7 +86,8 @@ def process_refreshrate_monitor():
     fps.start_monitoring()
     time.sleep(8)
     fps.stop_monitoring()
-    fps.format_drop_results()
+    fps.save_trace()  # 保存帧记录，便于离线重新分析
+    fps.results_analysis()
 
 def main():
     """主程序"""
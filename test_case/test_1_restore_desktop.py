@@ -11,9 +11,11 @@ import keyboard
 import time
 from datetime import datetime
 from common.window_monitor import WindowMonitor
+from common.cadence import AdaptiveCadence
 from common.logger import create_logger
 from common.PFS_monitor import RefreshRateMonitor
 from common.HWINFO_monitor import HWiNFOMonitor
+from common.precision_timer import Ticker
 from config.config import TARGET_LABELS
 
 
@@ -23,7 +25,8 @@ logger = create_logger(
     level="INFO",
     time_rotating=True,
     console_output=False,
-    when='midnight'
+    when='midnight',
+    async_mode=True
 )
 # 目标
 target = {
@@ -33,14 +36,19 @@ target = {
 }
 
 
-def process_window_monitor(stop_event, queue):
+def process_window_monitor(stop_event, queue, trigger_event):
     """窗口监控进程"""
-    monitor = WindowMonitor(logger=logger, target=None)
+    # 轮询后端：空闲时慢速轮询，按下快捷键（trigger_event置位）后立即进入高频轮询
+    # 事件驱动后端：按下快捷键的时刻作为起点，统计检测到窗口变化的时延
+    cadence = AdaptiveCadence(trigger=trigger_event)
+    monitor = WindowMonitor(logger=logger, cadence=cadence, target=None)
     while not stop_event.is_set():
         monitor.monitor_window_changes()
+    logger.info(f"窗口监听轮询统计: {cadence.stats()}")
     # 添加响应时间和结束时间到管道
-    response_time = monitor.window_history[1]
-    end_time = monitor.window_history[-1]
+    # 记录的是perf_counter_ns时间戳，系统级单调时钟，跨进程可直接相减
+    response_time = int(monitor.window_history['ts'][1])
+    end_time = int(monitor.window_history['ts'][-1])
     queue.put(response_time)
     queue.put(end_time)
 
@@ -49,8 +57,10 @@ def process_window_monitor(stop_event, queue):
 def fps_monitor(stop_event):
     """FPS监控进程"""
     monitor = RefreshRateMonitor(show_plot=True, logger=logger)
-    while not stop_event.is_set():
-        monitor.record_frame()
+    monitor.start_monitoring()  # 后台线程采集
+    stop_event.wait()
+    monitor.stop_monitoring()
+    monitor.save_trace()  # 保存帧记录，便于离线重新分析
     monitor.results_analysis()  # 结果分析
 
 
@@ -60,10 +70,11 @@ def process_performance_monitor(stop_event):
     monitor = HWiNFOMonitor(TARGET_LABELS, interval=1.0)
     monitor.reader.open()  # 打开监听器
     monitor.init_label_indices()  # 初始化标签
+    ticker = Ticker(monitor.interval)  # 固定节拍采样，不随读取耗时漂移
     while not stop_event.is_set():
         # 开始监听
         monitor.read_target_sensors()
-        time.sleep(monitor.interval)
+        ticker.wait()
     monitor.results_analysis()  # 结果分析
     monitor.stop()
 
@@ -73,13 +84,15 @@ def main():
 
     # 创建一个 Event 对象，用于通知子进程停止
     stop_event = multiprocessing.Event()
+    # 快捷键触发事件，通知监听进程进入高频轮询
+    trigger_event = multiprocessing.Event()
 
     # 创建队列，计算响应时延和完成时延
     queue = multiprocessing.Queue()
 
     # 创建进程
     processes = [
-        multiprocessing.Process(target=process_window_monitor,name="WindowMonitor",args=(stop_event,queue)),
+        multiprocessing.Process(target=process_window_monitor,name="WindowMonitor",args=(stop_event,queue,trigger_event)),
         multiprocessing.Process(target=fps_monitor,name="FPSMonitor",args=(stop_event,)),
         multiprocessing.Process(target=process_performance_monitor,name="PerformanceMonitor",args=(stop_event,))
     ]
@@ -97,6 +110,8 @@ def main():
     # 等待检测 Win+D 组合键
     keyboard.wait('windows+d')
     # 开始时间：键入win+D时间
+    start_ns = time.perf_counter_ns()
+    trigger_event.set()
     start_time = datetime.now()
     print(f"检测到Win+D按键时间: {start_time.strftime('%Y-%m-%d %H:%M:%S.%f')}")
     print("-------------------------")
@@ -106,8 +121,8 @@ def main():
     # 获取队列中的响应时间和结束时间--队列遵循先进先出
     response_time = queue.get()
     end_time = queue.get()
-    response_delay = (response_time - start_time).total_seconds() * 1000
-    complete_delay = (end_time - start_time).total_seconds() * 1000
+    response_delay = (response_time - start_ns) / 1_000_000
+    complete_delay = (end_time - start_ns) / 1_000_000
 
     print(
         "=============时延统计=============\n"
@@ -10,11 +10,12 @@ import multiprocessing
 import keyboard
 import time
 from datetime import datetime
-from common.window_monitor import WindowMonitor
 from common.logger import create_logger
 from common.PFS_monitor import RefreshRateMonitor
 from common.HWINFO_monitor import HWiNFOMonitor
-from config.config import TARGET_LABELS, DESKTOP_ARG
+from common.precision_timer import Ticker
+from common.multi_window_tracker import MultiWindowTracker
+from config.config import TARGET_LABELS
 
 
 # 创建主程序日志器
@@ -23,7 +24,8 @@ logger = create_logger(
     level="INFO",
     time_rotating=True,
     console_output = False,
-    when='midnight'
+    when='midnight',
+    async_mode=True
 )
 
 # 目标app
@@ -33,24 +35,28 @@ target = {
     "is_maximized": False
 }
 
-def process_window_monitor(stop_event, queue):
-    """窗口监控进程"""
-    monitor = WindowMonitor(logger=logger, target=DESKTOP_ARG["TinkBook"])
-    while not stop_event.is_set():
-        monitor.monitor_window_changes()
-    # 添加响应时间和结束时间到管道
-    response_time = monitor.window_history[monitor.target_num]
-    end_time = monitor.window_history[-1]
-    queue.put(response_time)
-    queue.put(end_time)
+def process_layout_monitor(queue, trigger_event, start_ns):
+    """
+    窗口布局监控进程：一个采样线程跟踪全部可见窗口，不再为单个窗口另起监听进程
+    响应时延为第一个窗口开始变化，完成时延为全部窗口恢复完成（布局稳定）
+    """
+    tracker = MultiWindowTracker(logger=logger)
+    tracker.resolve()  # 提前枚举窗口，触发后直接开始采样
+    trigger_event.wait()
+    tracker.capture(duration=3, until_settled=True)
+    # 起点为主进程键入Win+D的时刻（perf_counter_ns，跨进程可直接相减）
+    result = tracker.results_analysis(start_ns.value)
+    queue.put((result['response_ms'], result['complete_ms'], result['settled']))
 
 
 
 def fps_monitor(stop_event):
     """FPS监控进程"""
     monitor = RefreshRateMonitor(show_plot=True, logger=logger)
-    while not stop_event.is_set():
-        monitor.record_frame()
+    monitor.start_monitoring()  # 后台线程采集
+    stop_event.wait()
+    monitor.stop_monitoring()
+    monitor.save_trace()  # 保存帧记录，便于离线重新分析
     monitor.results_analysis()  # 结果分析
 
 
@@ -60,10 +66,11 @@ def process_performance_monitor(stop_event):
     monitor = HWiNFOMonitor(TARGET_LABELS, interval=1.0)
     monitor.reader.open()  # 打开监听器
     monitor.init_label_indices()  # 初始化标签
+    ticker = Ticker(monitor.interval)  # 固定节拍采样，不随读取耗时漂移
     while not stop_event.is_set():
         # 开始监听
         monitor.read_target_sensors()
-        time.sleep(monitor.interval)
+        ticker.wait()
     monitor.results_analysis()  # 结果分析
     monitor.stop()
 
@@ -73,13 +80,17 @@ def main():
     """主程序"""
     # 创建一个 Event 对象，用于通知子进程停止
     stop_event = multiprocessing.Event()
+    # 快捷键触发事件，通知监听进程进入高频轮询
+    trigger_event = multiprocessing.Event()
 
+    # 键入Win+D的时刻（perf_counter_ns），在触发前写入
+    start_ns = multiprocessing.Value('q', 0)
     # 创建队列，计算响应时延和完成时延
     queue = multiprocessing.Queue()
 
     # 创建进程
     processes = [
-        multiprocessing.Process(target=process_window_monitor,name="WindowMonitor",args=(stop_event,queue)),
+        multiprocessing.Process(target=process_layout_monitor,name="LayoutMonitor",args=(queue,trigger_event,start_ns)),
         multiprocessing.Process(target=fps_monitor,name="FPSMonitor",args=(stop_event,)),
         multiprocessing.Process(target=process_performance_monitor,name="PerformanceMonitor",args=(stop_event,))
     ]
@@ -97,22 +108,22 @@ def main():
     # 等待检测 Win+D 组合键
     keyboard.wait('windows+d')
     # 开始时间：键入win+D时间
+    start_ns.value = time.perf_counter_ns()
+    trigger_event.set()
     start_time = datetime.now()
     print(f"检测到Win+D按键时间: {start_time.strftime('%Y-%m-%d %H:%M:%S.%f')}")
     print("-------------------------")
     time.sleep(1)
     # 设置 Event 对象，通知子进程停止
     stop_event.set()
-    # 获取队列中的响应时间和结束时间--队列遵循先进先出
-    response_time = queue.get()
-    end_time = queue.get()
-    response_delay = (response_time - start_time).total_seconds() * 1000
-    complete_delay = (end_time - start_time).total_seconds() * 1000
+    # 获取响应时延和全部窗口完成时延（毫秒），没有窗口变化时为None
+    response_delay, complete_delay, settled = queue.get()
 
     print(
         "=============时延统计=============\n"
-        f"响应时延：{response_delay:3f}\n"
-        f"完成时延：{complete_delay:3f}"
+        f"响应时延：{'无变化' if response_delay is None else f'{response_delay:3f}'}\n"
+        f"全部窗口完成时延：{'无变化' if complete_delay is None else f'{complete_delay:3f}'}"
+        f"{'' if settled else '（未稳定）'}"
     )
     for process in processes:
         process.join()
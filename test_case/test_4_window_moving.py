@@ -17,13 +17,15 @@ from common.logger import create_logger
 from common.mouse_monitor import MouseMonitor
 from common.performance_monitor import PerformanceMonitor
 from common.power_consumption import PowerMonitor
+from common.window_trajectory import WindowTrajectoryRecorder
 
 # 创建主程序日志器
 logger = create_logger(
     name="test_window_moving",
     level="INFO",
     time_rotating=True,
-    when='midnight'
+    when='midnight',
+    async_mode=True
 )
 
 target = {
@@ -45,8 +47,6 @@ def process_window_monitor():
     monitor = WindowMonitor(logger=logger, target=target)
     try:
         monitor.start_monitoring()
-        while monitor.is_monitoring:
-            time.sleep(0.00001)
     except KeyboardInterrupt:
         monitor.stop_monitoring()
 
@@ -61,7 +61,16 @@ def process_keyboard_monitor():
     fps.start_monitoring()
     time.sleep(5)
     fps.stop_monitoring()
-    fps.format_drop_results()
+    fps.save_trace()  # 保存帧记录，便于离线重新分析
+    fps.results_analysis()
+
+def process_trajectory_monitor():
+    """窗口动画轨迹进程：按键后逐帧记录前台窗口矩形，分析动画时长、过冲和卡顿"""
+    recorder = WindowTrajectoryRecorder(logger=logger)
+    keyboard.wait('alt+tab')
+    recorder.capture(duration=3)
+    recorder.results_analysis()
+
 
 def process_performance_monitor():
     """性能监控进程"""
@@ -104,6 +113,11 @@ def main():
             name="MouseMonitor"
         )
 
+        trajectory_process = multiprocessing.Process(
+            target=process_trajectory_monitor,
+            name="TrajectoryMonitor"
+        )
+
         performance_process = multiprocessing.Process(
             target=process_performance_monitor,
             name="PerformanceMonitor"
@@ -119,6 +133,7 @@ def main():
         window_process.start()
         keyboard_process.start()
         mouse_process.start()
+        trajectory_process.start()
         performance_process.start()
         power_process.start()
 
@@ -126,6 +141,7 @@ def main():
         window_process.join()
         keyboard_process.join()
         mouse_process.join()
+        trajectory_process.join()
         performance_process.join()
         power_process.join()
 
@@ -141,6 +157,8 @@ def main():
             keyboard_process.terminate()
         if mouse_process.is_alive():
             mouse_process.terminate()
+        if trajectory_process.is_alive():
+            trajectory_process.terminate()
         if performance_process.is_alive():
             performance_process.terminate()
         if power_process.is_alive():
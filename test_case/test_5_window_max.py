@@ -16,6 +16,7 @@ from common.window_monitor import WindowMonitor
 from common.logger import create_logger
 from common.performance_monitor import PerformanceMonitor
 from common.power_consumption import PowerMonitor
+from common.window_trajectory import WindowTrajectoryRecorder
 
 
 # 创建主程序日志器
@@ -23,7 +24,8 @@ logger = create_logger(
     name="test_window_max",
     level="INFO",
     time_rotating=True,
-    when='midnight'
+    when='midnight',
+    async_mode=True
 )
 
 target = {
@@ -37,8 +39,6 @@ def process_window_monitor():
     monitor = WindowMonitor(logger=logger, target=target)
     try:
         monitor.start_monitoring()
-        while monitor.is_monitoring:
-            time.sleep(0.00001)
     except KeyboardInterrupt:
         monitor.stop_monitoring()
 
@@ -52,7 +52,16 @@ def process_keyboard_monitor():
     fps.start_monitoring()
     time.sleep(5)
     fps.stop_monitoring()
-    fps.format_drop_results()
+    fps.save_trace()  # 保存帧记录，便于离线重新分析
+    fps.results_analysis()
+
+def process_trajectory_monitor():
+    """窗口动画轨迹进程：按键后逐帧记录前台窗口矩形，分析动画时长、过冲和卡顿"""
+    recorder = WindowTrajectoryRecorder(logger=logger)
+    keyboard.wait('win+up')
+    recorder.capture(duration=3)
+    recorder.results_analysis()
+
 
 def process_performance_monitor():
     """性能监控进程"""
@@ -90,6 +99,11 @@ def main():
             name="KeyboardMonitor"
         )
 
+        trajectory_process = multiprocessing.Process(
+            target=process_trajectory_monitor,
+            name="TrajectoryMonitor"
+        )
+
         performance_process = multiprocessing.Process(
             target=process_performance_monitor,
             name="PerformanceMonitor"
@@ -104,12 +118,14 @@ def main():
         logger.info("正在启动窗口监控进程...")
         window_process.start()
         keyboard_monitor.start()
+        trajectory_process.start()
         performance_process.start()
         power_process.start()
 
         # 等待进程结束
         window_process.join()
         keyboard_monitor.join()
+        trajectory_process.join()
         performance_process.join()
         power_process.join()
 
@@ -123,6 +139,8 @@ def main():
             window_process.terminate()
         if keyboard_monitor.is_alive():
             keyboard_monitor.terminate()
+        if trajectory_process.is_alive():
+            trajectory_process.terminate()
         if performance_process.is_alive():
             performance_process.terminate()
         if power_process.is_alive():
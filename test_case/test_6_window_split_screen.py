@@ -13,17 +13,19 @@ from datetime import datetime
 
 from common.PFS_monitor import RefreshRateMonitor
 from common.keyboard_monitor import KeyboardMonitor
-from common.window_monitor import WindowMonitor
 from common.logger import create_logger
 from common.performance_monitor import PerformanceMonitor
 from common.power_consumption import PowerMonitor
+from common.window_trajectory import WindowTrajectoryRecorder
+from common.multi_window_tracker import MultiWindowTracker
 
 # 创建主程序日志器
 logger = create_logger(
     name="test_window_split_screen",
     level="INFO",
     time_rotating=True,
-    when='midnight'
+    when='midnight',
+    async_mode=True
 )
 
 target = {
@@ -33,18 +35,6 @@ target = {
 }
 
 
-def process_window_monitor():
-    """窗口监控进程"""
-    monitor = WindowMonitor(logger=logger)
-
-    try:
-        monitor.start_monitoring()
-        while monitor.is_monitoring:
-            time.sleep(0.00001)
-    except KeyboardInterrupt:
-        monitor.stop_monitoring()
-
-
 def process_keyboard_monitor():
     """键盘监控进程"""
     # 等待检测 win+right 组合键
@@ -53,9 +43,8 @@ def process_keyboard_monitor():
         # 开始监控
         monitor.start_monitoring()
         logger.info("等待目标组合键 (win+right) 或按 Ctrl+C 退出...")
-        # 等待监控停止
-        while monitor.is_monitoring:
-            time.sleep(0.00001)
+        # 等待监控停止（目标组合键触发后监听线程退出）
+        monitor.listener.join()
         logger.info("监控已结束")
     except KeyboardInterrupt:
         monitor.stop_monitoring()
@@ -68,7 +57,27 @@ def process_refreshrate_monitor():
     fps.start_monitoring()
     time.sleep(3)
     fps.stop_monitoring()
-    fps.format_drop_results()
+    fps.save_trace()  # 保存帧记录，便于离线重新分析
+    fps.results_analysis()
+
+def process_trajectory_monitor():
+    """窗口动画轨迹进程：按键后逐帧记录前台窗口矩形，分析动画时长、过冲和卡顿"""
+    recorder = WindowTrajectoryRecorder(logger=logger)
+    keyboard.wait('win+right')
+    recorder.capture(duration=3)
+    recorder.results_analysis()
+
+
+def process_layout_monitor():
+    """多窗口布局进程：分屏后两侧窗口都调整完成的时延，窗口几何信息只由该进程采样"""
+    tracker = MultiWindowTracker(logger=logger)
+    tracker.resolve()  # 提前枚举窗口，按键后直接开始采样
+    keyboard.wait('win+right')
+    start_ns = time.perf_counter_ns()
+    # 分屏助手会等待选择另一侧窗口，采样固定时长，不在第一次稳定时结束
+    tracker.capture(duration=5)
+    tracker.results_analysis(start_ns)
+
 
 def process_performance_monitor():
     """性能监控进程"""
@@ -96,11 +105,6 @@ def main():
 
     try:
         # 创建进程
-        window_process = multiprocessing.Process(
-            target=process_window_monitor,
-            name="WindowMonitor"
-        )
-
         keyboard_monitor = multiprocessing.Process(
             target=process_keyboard_monitor,
             name="KeyboardMonitor"
@@ -111,6 +115,16 @@ def main():
             name="KeyboardMonitor"
         )
 
+        trajectory_process = multiprocessing.Process(
+            target=process_trajectory_monitor,
+            name="TrajectoryMonitor"
+        )
+
+        layout_process = multiprocessing.Process(
+            target=process_layout_monitor,
+            name="LayoutMonitor"
+        )
+
         performance_process = multiprocessing.Process(
             target=process_performance_monitor,
             name="PerformanceMonitor"
@@ -122,16 +136,18 @@ def main():
         )
         # 启动进程
         logger.info("正在启动监控进程...")
-        window_process.start()
         keyboard_monitor.start()
         refreshrate_monitor.start()
+        trajectory_process.start()
+        layout_process.start()
         performance_process.start()
         power_process.start()
 
         # 等待进程结束
-        window_process.join()
         keyboard_monitor.join()
         refreshrate_monitor.join()
+        trajectory_process.join()
+        layout_process.join()
         performance_process.join()
         power_process.join()
 
@@ -141,12 +157,14 @@ def main():
         logger.error(f"主程序异常: {e}")
     finally:
         # 确保进程正确退出
-        if window_process.is_alive():
-            window_process.terminate()
         if keyboard_monitor.is_alive():
             keyboard_monitor.terminate()
         if refreshrate_monitor.is_alive():
             refreshrate_monitor.terminate()
+        if trajectory_process.is_alive():
+            trajectory_process.terminate()
+        if layout_process.is_alive():
+            layout_process.terminate()
         if performance_process.is_alive():
             performance_process.terminate()
         if power_process.is_alive():
@@ -6,6 +6,7 @@
 """
 
 import multiprocessing
+import re
 import keyboard
 import time
 from datetime import datetime
@@ -16,6 +17,8 @@ from common.PFS_monitor import RefreshRateMonitor
 from pywinauto import Application
 from common.performance_monitor import PerformanceMonitor
 from common.power_consumption import PowerMonitor
+from common.window_index import WindowIndex
+from common.cadence import AdaptiveCadence
 
 
 # 创建主程序日志器
@@ -23,7 +26,8 @@ logger = create_logger(
     name="test_open_apps",
     level="INFO",
     time_rotating=True,
-    when='midnight'
+    when='midnight',
+    async_mode=True
 )
 # 目标app
 target = {
@@ -47,8 +51,6 @@ def process_window_monitor():
     monitor = WindowMonitor(logger=logger, target=target)
     try:
         monitor.start_monitoring()
-        while monitor.is_monitoring:
-            time.sleep(0.00001)
     except KeyboardInterrupt:
         monitor.stop_monitoring()
 
@@ -63,7 +65,8 @@ def process_keyboard_monitor():
     fps.start_monitoring()
     time.sleep(5)
     fps.stop_monitoring()
-    fps.format_drop_results()
+    fps.save_trace()  # 保存帧记录，便于离线重新分析
+    fps.results_analysis()
 
 
 def process_performance_monitor():
@@ -102,24 +105,34 @@ def monitor_element():
         logger.error("请提供要监测的元素标题")
         return
 
-    app = Application(backend="uia")
+    # 窗口索引在开始计时前建立，之后等待窗口出现不再枚举窗口
+    window_index = WindowIndex(logger=logger)
+    window_index.open()
     start_time = datetime.now()
     logger.info(f"开始监测元素 - 窗口: {window_title}, 元素: {element_title}")
 
+    # 等待目标窗口出现，只按句柄连接一次
+    hwnd = window_index.wait_for(title=f"^{re.escape(window_title)}$")
+    window_index.close()
+    window_time = datetime.now()
+    logger.info(f"目标窗口出现: {hwnd}, 耗时 {(window_time - start_time).total_seconds() * 1000:.2f}ms")
+    app = Application(backend="uia").connect(handle=hwnd)
+    window = app.window(handle=hwnd)
+
     # 性能统计变量
     iteration_count = 0
+    # 窗口已出现，元素随时可能出现：立即进入突发轮询，之后逐步退回空闲间隔
+    cadence = AdaptiveCadence()
+    cadence.fire()
 
     while True:
         try:
             iteration_count += 1
 
-            # 尝试连接窗口
-            app.connect(title=window_title)
-            window = app.window(title=window_title)
-
             try:
                 # 尝试查找元素
-                window.child_window(title=element_title)
+                if not window.child_window(title=element_title).exists(timeout=0):
+                    raise LookupError(element_title)
                 found_time = datetime.now()
                 duration = (found_time - start_time).total_seconds() * 1000
 
@@ -139,14 +152,15 @@ def monitor_element():
                     f"平均每次检测耗时: {avg_iteration_time:.3f}ms\n"
                     f"平均检测频率: {iterations_per_second:.1f}次/秒"
                 )
+                logger.info(f"元素检测轮询统计: {cadence.stats()}")
                 break
             except Exception:
                 # 元素未找到，继续监测
-                time.sleep(0.00001)  # 添加小延迟，降低CPU使用率
+                cadence.wait()
                 continue
         except Exception as e:
             # 窗口未找到或其他错误，继续监测
-            time.sleep(0.00001)  # 添加小延迟，降低CPU使用率
+            cadence.wait()
             continue
 
 
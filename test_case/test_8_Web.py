@@ -10,6 +10,7 @@ from common.logger import create_logger
 from common.PFS_monitor import RefreshRateMonitor
 from common.performance_monitor import PerformanceMonitor
 from common.power_consumption import PowerMonitor
+from common.cadence import AdaptiveCadence
 import keyboard
 import multiprocessing
 
@@ -17,7 +18,8 @@ logger = create_logger(
     name="test_restore_desktop",
     level="INFO",
     time_rotating=True,
-    when='midnight')
+    when='midnight',
+    async_mode=True)
 
 def process_performance_monitor():
     """性能监控进程"""
@@ -51,7 +53,8 @@ def process_keyboard_monitor():
     fps.start_monitoring()
     time.sleep(5)
     fps.stop_monitoring()
-    fps.format_drop_results()
+    fps.save_trace()  # 保存帧记录，便于离线重新分析
+    fps.results_analysis()
 
 
 class ScrollMonitor:
@@ -67,10 +70,13 @@ class ScrollMonitor:
         self.mouse_scroll_time = None
         self.pixel_scroll_time = None
         self.monitoring = True
+        # 滚轮事件前空闲轮询，滚轮移动后突发轮询页面偏移
+        self.cadence = AdaptiveCadence()
 
     def on_scroll(self, x, y, dx, dy):
         if self.mouse_scroll_time is None:
             self.mouse_scroll_time = datetime.now()
+            self.cadence.fire()
             print(f"\n检测到鼠标滚轮移动，时间: {self.mouse_scroll_time.strftime('%H:%M:%S.%f')}")
 
     def monitor_page_scroll(self):
@@ -105,10 +111,11 @@ class ScrollMonitor:
                     print(f"页面响应时间: {self.pixel_scroll_time.strftime('%H:%M:%S.%f')}")
                     print(f"响应延迟: {response_time * 1000:.2f} 毫秒")
                     
+                    print(f"页面滚动轮询统计: {self.cadence.stats()}")
                     self.monitoring = False
                     break
-                
-                time.sleep(0.001)  # 降低CPU使用率
+
+                self.cadence.wait()
 
         finally:
             listener.stop()
@@ -156,4 +163,4 @@ if __name__ == "__main__":
     keyboard_monitor.join()
 
     # fps.stop_monitoring()
-    # fps.format_drop_results()
\ No newline at end of file
+    # fps.results_analysis()
\ No newline at end of file
@@ -11,6 +11,8 @@ from common.logger import create_logger
 from common.PFS_monitor import RefreshRateMonitor
 from common.performance_monitor import PerformanceMonitor
 from common.power_consumption import PowerMonitor
+from common.window_index import WindowIndex
+from common.cadence import AdaptiveCadence
 import keyboard
 import multiprocessing
 
@@ -20,7 +22,8 @@ logger = create_logger(
             level="DEBUG",
             console_output=True,
             time_rotating=True,
-            when='midnight'
+            when='midnight',
+            async_mode=True
         )
 
 def process_performance_monitor():
@@ -55,7 +58,8 @@ def process_keyboard_monitor():
     fps.start_monitoring()
     time.sleep(15)
     fps.stop_monitoring()
-    fps.format_drop_results()
+    fps.save_trace()  # 保存帧记录，便于离线重新分析
+    fps.results_analysis()
 
 def capture_window(hwnd):
     """捕获窗口内容"""
@@ -97,18 +101,9 @@ def is_window_content_changed(prev_content, curr_content):
         return False
     return not np.array_equal(prev_content, curr_content)
 
-def find_slideshow_window():
-    """查找PPT放映窗口"""
-    def callback(hwnd, hwnds):
-        if win32gui.IsWindowVisible(hwnd):
-            className = win32gui.GetClassName(hwnd)
-            if className == "screenClass":
-                hwnds.append(hwnd)
-        return True
-    
-    hwnds = []
-    win32gui.EnumWindows(callback, hwnds)
-    return hwnds[0] if hwnds else None
+def find_slideshow_window(window_index, timeout=None):
+    """等待PPT放映窗口出现，窗口索引更新时被唤醒，不再反复枚举窗口"""
+    return window_index.wait_for(class_name="screenClass", visible=True, timeout=timeout)
 
 def get_time_ms(start_time):
     """计算从开始时间到现在的毫秒数"""
@@ -123,6 +118,10 @@ def monitor_ppt_performance():
         #
         # fps.start_monitoring()
 
+        # 窗口索引：订阅窗口创建/显示事件，在开始计时前建立
+        window_index = WindowIndex(logger=logger)
+        window_index.open()
+
         # 创建PPT应用实例
         ppt = win32com.client.Dispatch("PowerPoint.Application")
         
@@ -137,20 +136,20 @@ def monitor_ppt_performance():
         presentation.SlideShowSettings.Run()
         
         # 等待放映窗口出现
-        slideshow_hwnd = None
-        while not slideshow_hwnd:
-            slideshow_hwnd = find_slideshow_window()
-            if slideshow_hwnd:
-                print("PPT放映窗口出现",slideshow_hwnd)
-                response_time = get_time_ms(start_time)
-                print(f"响应时间: {response_time}ms")
-            time.sleep(0.01)
+        slideshow_hwnd = find_slideshow_window(window_index)
+        print("PPT放映窗口出现",slideshow_hwnd)
+        response_time = get_time_ms(start_time)
+        print(f"响应时间: {response_time}ms")
+        window_index.close()
         
         # 监控窗口内容变化
         prev_content = None
         content_stable_start = None
         content_stable_duration = 100  # 内容稳定100ms认为完成
-        
+        # 放映窗口刚出现，内容持续变化：突发轮询，内容变化时延长突发阶段
+        cadence = AdaptiveCadence()
+        cadence.fire()
+
         while True:
             if not win32gui.IsWindow(slideshow_hwnd):
                 break
@@ -159,6 +158,7 @@ def monitor_ppt_performance():
             
             if is_window_content_changed(prev_content, current_content):
                 content_stable_start = None
+                cadence.notify_change()
             elif prev_content is not None and content_stable_start is None:
                 content_stable_start = datetime.now()
                 print("内容稳定开始", get_time_ms(start_time), 'ms')
@@ -169,11 +169,11 @@ def monitor_ppt_performance():
                 break
                 
             prev_content = current_content
-            time.sleep(0.001)
+            cadence.wait()
 
         time.sleep(2)
         # fps.stop_monitoring()
-        # fps.format_drop_results()
+        # fps.results_analysis()
             
     except Exception as e:
         print(f"发生错误: {str(e)}")
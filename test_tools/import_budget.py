@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : import_budget.py
+@Time    : 2025/03/21
+@Author  : Bruce.Si
+@Desc    : common模块导入耗时预算检查
+    - 每个测试用例的监听进程都会重新导入common模块（spawn方式），导入越慢，监听开始越晚
+    - 在全新的子进程中用 python -X importtime 测量每个模块的累计导入耗时
+    - numpy/psutil等必需依赖本身的导入耗时随机器和磁盘缓存波动很大，从同一次测量中扣除，
+      预算只约束模块自身（及其可选依赖）的导入耗时
+    - 用法: python -m test_tools.import_budget [-n 重复次数]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, Optional, Tuple
+
+# 必需依赖，其导入耗时作为基线从模块的累计导入耗时中扣除
+REQUIRED_DEPENDENCIES = ('numpy', 'psutil')
+
+# 各模块自身导入耗时预算（毫秒，不含必需依赖），约为实测值的两倍，留出机器间的波动余量
+# matplotlib/pandas/pynvml/wmi 均应延迟到首次使用时导入，单独一个出现在模块顶层就会超出预算（pandas扣除numpy后仍约200毫秒）
+IMPORT_BUDGET_MS = {
+    'common.logger': 60,
+    'common.precision_timer': 40,
+    'common.cadence': 40,
+    'common.column_store': 40,
+    'common.metric_provider': 30,
+    'common.io_monitor': 40,
+    'common.cpu_core_monitor': 60,
+    'common.nvml_monitor': 30,
+    'common.HWinfolog_monitor': 40,
+    'common.performance_monitor': 80,
+    'common.power_consumption': 100,
+    'common.HWINFO_monitor': 80,
+    'common.frame_stats': 40,
+    'common.frame_analysis': 50,
+    'common.PFS_monitor': 70,
+    'common.vsync_source': 40,
+    'common.frame_trace': 40,
+    'common.window_backend': 50,
+    'common.window_monitor': 80,
+    'common.window_index': 50,
+    'common.trajectory_analysis': 40,
+    'common.window_trajectory': 90,
+    'common.multi_window_tracker': 90,
+    'common.desktop_focus_monitor': 80,
+    'common.lock_monitor': 50,
+    'common.keyboard_monitor': 100,
+    'common.mouse_monitor': 80,
+    'common.wheel_monitor': 200,
+    'common.taskmgr_monitor': 40,
+}
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_import(module: str) -> Optional[Tuple[float, float]]:
+    """
+    在新进程中测量模块的累计导入耗时
+    :return: (累计耗时, 其中必需依赖的耗时)，毫秒；导入失败（例如非Windows平台缺少依赖）时返回None
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return None
+    # 输出格式: import time: self [us] | cumulative | imported package，每个包只在首次导入时出现一次
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        parts = [part.strip() for part in line.split('|')]
+        if len(parts) == 3 and parts[1].isdigit():
+            cumulative[parts[2]] = int(parts[1]) / 1000
+    if module not in cumulative:
+        return None
+    baseline = sum(cumulative.get(name, 0.0) for name in REQUIRED_DEPENDENCIES)
+    return cumulative[module], baseline
+
+
+def check_budget(repeat: int = 3) -> Dict[str, Optional[Tuple[float, float]]]:
+    """测量所有模块，取自身耗时最小的一次以排除磁盘缓存的影响"""
+    results = {}
+    for module in IMPORT_BUDGET_MS:
+        samples = [measure_import(module) for _ in range(repeat)]
+        samples = [sample for sample in samples if sample is not None]
+        results[module] = min(samples, key=lambda sample: sample[0] - sample[1]) if samples else None
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="common模块导入耗时预算检查")
+    parser.add_argument('-n', '--repeat', type=int, default=3, help="每个模块的测量次数")
+    args = parser.parse_args()
+
+    results = check_budget(args.repeat)
+    over_budget = 0
+    print("==========导入耗时预算（不含必需依赖）==========")
+    for module, result in results.items():
+        budget = IMPORT_BUDGET_MS[module]
+        if result is None:
+            print(f"{module:<30} 跳过（当前平台无法导入）")
+            continue
+        total, baseline = result
+        elapsed = total - baseline
+        status = "OK" if elapsed <= budget else "超出预算"
+        over_budget += elapsed > budget
+        print(f"{module:<30} {elapsed:8.1f} ms / {budget} ms  {status}"
+              f"  （累计 {total:.1f} ms，必需依赖 {baseline:.1f} ms）")
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == '__main__':
+    main()
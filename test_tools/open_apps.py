@@ -24,7 +24,8 @@ logger = create_logger(
     level="INFO",
     time_rotating=True,
     console_output=False,
-    when='midnight'
+    when='midnight',
+    async_mode=True
 )
 # 目标
 target = {
@@ -40,8 +41,9 @@ def process_window_monitor(stop_event, queue):
     while not stop_event.is_set():
         monitor.monitor_window_changes()
     # 添加响应时间和结束时间到管道
-    response_time = monitor.window_history[1]
-    end_time = monitor.window_history[-1]
+    # 记录的是perf_counter_ns时间戳，系统级单调时钟，跨进程可直接相减
+    response_time = int(monitor.window_history['ts'][1])
+    end_time = int(monitor.window_history['ts'][-1])
     queue.put(response_time)
     queue.put(end_time)
 
@@ -50,8 +52,10 @@ def process_window_monitor(stop_event, queue):
 def fps_monitor(stop_event):
     """FPS监控进程"""
     monitor = RefreshRateMonitor(show_plot=True, logger=logger)
-    while not stop_event.is_set():
-        monitor.record_frame()
+    monitor.start_monitoring()  # 后台线程采集
+    stop_event.wait()
+    monitor.stop_monitoring()
+    monitor.save_trace()  # 保存帧记录，便于离线重新分析
     monitor.results_analysis()  # 结果分析
 
 
@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : conftest.py
+@Time    : 2025/04/09
+@Author  : Bruce.Si
+@Desc    : pytest公共配置，把仓库根目录加入导入路径（common、config按顶层包导入）
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : test_battery_monitor.py
+@Time    : 2025/04/09
+@Author  : Bruce.Si
+@Desc    : 电池放电功耗估算：伪造的power_supply目录，合成放电曲线上的CUSUM负载变点检测
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from common.battery_monitor import BatteryPowerProvider
+
+SECOND = 1_000_000_000
+
+
+def _write(path: str, value):
+    with open(path, 'w') as f:
+        f.write(f"{value}\n")
+
+
+class _Battery:
+    """伪造的 /sys/class/power_supply/BAT0"""
+
+    def __init__(self, root: str, energy_wh: float = 50.0, power_now: bool = True):
+        self.path = os.path.join(root, "BAT0")
+        os.makedirs(self.path)
+        _write(os.path.join(self.path, "type"), "Battery")
+        _write(os.path.join(self.path, "status"), "Discharging")
+        _write(os.path.join(self.path, "voltage_now"), 12_000_000)
+        self.power_now = power_now
+        self.set(energy_wh, 0.0)
+
+    def set(self, energy_wh: float, power_w: float):
+        _write(os.path.join(self.path, "energy_now"), int(energy_wh * 1e6))
+        if self.power_now:
+            _write(os.path.join(self.path, "power_now"), int(power_w * 1e6))
+
+    def status(self, status: str):
+        _write(os.path.join(self.path, "status"), status)
+
+
+def _provider(root: str) -> BatteryPowerProvider:
+    provider = BatteryPowerProvider(root=root)
+    provider.open()
+    assert provider.available
+    return provider
+
+
+def test_power_now_step_detected_once(tmp_path):
+    """10瓦（带噪声和一个离群读数）切换到18瓦：只检测到一个变点，位于第一个18瓦读数"""
+    battery = _Battery(str(tmp_path))
+    provider = _provider(str(tmp_path))
+    rng = np.random.default_rng(0)
+    powers = list(10.0 * (1 + rng.normal(0, 0.03, 30))) + list(18.0 * (1 + rng.normal(0, 0.03, 30)))
+    powers[12] = 14.0  # 单个离群读数
+
+    energy = 50.0
+    for i, power in enumerate(powers):
+        energy -= power / 3600
+        battery.set(energy, power)
+        result = provider.sample(i * SECOND)
+    provider.close()
+
+    assert provider.change_points == [30 * SECOND]
+    assert result['battery_power'] == pytest.approx(18.0, rel=0.05)
+
+
+def test_energy_only_discharge_curve(tmp_path):
+    """只有energy_now、每5秒更新一次：由读数变化点之间的能量差估算功率，10瓦到25瓦的负载变化被检测到"""
+    battery = _Battery(str(tmp_path), power_now=False)
+    provider = _provider(str(tmp_path))
+
+    energy = 50.0
+    estimates = []
+    for second in range(1, 121):
+        energy -= (10.0 if second <= 60 else 25.0) / 3600
+        if second % 5 == 0:
+            battery.set(energy, 0.0)
+        result = provider.sample(second * SECOND)
+        estimates.append(result.get('battery_power'))
+    provider.close()
+
+    assert len(provider.reading_updates) == 24
+    assert len(provider.change_points) == 1
+    assert 60 * SECOND < provider.change_points[0] <= 70 * SECOND
+    assert estimates[55] == pytest.approx(10.0, rel=0.02)
+    assert estimates[-1] == pytest.approx(25.0, rel=0.02)
+
+
+def test_stationary_noise_has_no_change_points(tmp_path):
+    """平稳负载上5%的读数噪声不产生变点（固定阈值的逐点判定会在离群读数上误切换）"""
+    battery = _Battery(str(tmp_path))
+    provider = _provider(str(tmp_path))
+    rng = np.random.default_rng(1)
+
+    energy = 50.0
+    for i, power in enumerate(12.0 * (1 + rng.normal(0, 0.05, 300))):
+        energy -= power / 3600
+        battery.set(energy, power)
+        result = provider.sample(i * SECOND)
+    provider.close()
+
+    assert provider.change_points == []
+    assert result['battery_power'] == pytest.approx(12.0, rel=0.1)
+
+
+def test_charging_resets_estimate(tmp_path):
+    battery = _Battery(str(tmp_path))
+    provider = _provider(str(tmp_path))
+    battery.set(49.9, 10.0)
+    assert provider.sample(SECOND)['battery_power'] == 10.0
+
+    battery.status("Charging")
+    result = provider.sample(2 * SECOND)
+    provider.close()
+
+    assert result['battery_discharging'] == 0.0
+    assert 'battery_power' not in result
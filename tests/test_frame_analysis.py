@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : test_frame_analysis.py
+@Time    : 2025/04/09
+@Author  : Bruce.Si
+@Desc    : 帧间隔分析：刷新率分段丢帧计数、周期性卡顿频谱
+"""
+
+import numpy as np
+
+from common.frame_analysis import segment_refresh_rate, spectral_analysis
+from common.vsync_source import SimulatedVsyncSource
+
+
+def test_segment_drops_after_refresh_rate_switch():
+    """125Hz切到50Hz，两段中注入已知的丢帧，每段按各自的目标帧时间计数（周期为整数纳秒，丢帧间隔是周期的整数倍）"""
+    source = SimulatedVsyncSource(refresh_rate=125, schedule=[(2000, 50)],
+                                  drops={500: 1, 1200: 2, 2500: 2, 3000: 1}, frames=4000, seed=1)
+    intervals = np.diff(source.generate(4000)) / 1_000_000
+
+    result = segment_refresh_rate(intervals)
+
+    rates = [round(segment['refresh_rate']) for segment in result['segments']]
+    assert rates == [125, 50]
+    assert [segment['total_drops'] for segment in result['segments']] == [3, 3]
+    assert result['total_drops'] == 6
+
+
+def test_segment_drops_round_down():
+    """丢帧数为 floor(间隔 / 目标) - 1：不足目标两倍的间隔不计丢帧"""
+    intervals = np.full(200, 10.0)
+    intervals[[50, 100, 150]] = [19.9, 20.0, 39.9]
+
+    result = segment_refresh_rate(intervals)
+
+    assert result['total_drops'] == 3
+    np.testing.assert_array_equal(result['dropped_frames'][[50, 100, 150]], [0, 1, 2])
+
+
+def test_spectrum_clean_trace_has_no_components():
+    """无抖动的144Hz和144->60Hz切换都不应报告周期分量（量化误差和刷新率阶跃不算卡顿）"""
+    for schedule in (None, [(8000, 60)]):
+        source = SimulatedVsyncSource(refresh_rate=144, schedule=schedule, frames=20000, seed=2)
+        result = spectral_analysis(source.generate(20000), monitor_intervals={})
+        assert result['components'] == []
+
+
+def test_spectrum_finds_periodic_drops_across_switch():
+    """刷新率切换前后都是约1Hz的周期性丢帧，频谱应报告约1Hz的分量而不是切换造成的低频分量"""
+    drops = {frame: 1 for frame in range(0, 8000, 144)}
+    drops.update({frame: 1 for frame in range(8000, 20000, 60)})
+    source = SimulatedVsyncSource(refresh_rate=144, schedule=[(8000, 60)], jitter_ms=0.1, drops=drops,
+                                  frames=20000, seed=2)
+
+    components = spectral_analysis(source.generate(20000), monitor_intervals={})['components']
+
+    assert components
+    assert abs(components[0]['frequency'] - 1.0) < 0.05
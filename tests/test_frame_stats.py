@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : test_frame_stats.py
+@Time    : 2025/04/09
+@Author  : Bruce.Si
+@Desc    : 在线帧时间统计：丢帧计数、合并
+"""
+
+import threading
+
+import numpy as np
+
+from common.frame_stats import FrameTimeStats
+
+
+def _stats(seed: int, count: int = 1000) -> FrameTimeStats:
+    stats = FrameTimeStats(target_frame_time=6.94)
+    for interval in np.random.default_rng(seed).normal(6.94, 0.3, count):
+        stats.update(interval)
+    return stats
+
+
+def test_drops_round_down():
+    """丢帧数与离线分析一致，为 floor(间隔 / 目标) - 1：不足目标两倍的间隔不计丢帧"""
+    stats = FrameTimeStats(target_frame_time=10.0)
+    for interval in (10.0, 20.0, 10.01, 30.0, 9.99, 19.98, 39.9):
+        stats.update(interval)
+
+    assert stats.total_drops == 5
+    assert stats.drop_events == 3
+
+
+def test_merge_self():
+    """合并自身等价于两次相同的运行：样本数翻倍，均值和标准差不变"""
+    stats = _stats(0)
+    mean, std_dev = stats.mean, stats.std_dev
+
+    stats.merge(stats)
+
+    assert stats.count == 2000
+    assert abs(stats.mean - mean) < 1e-12
+    assert abs(stats.std_dev - std_dev) < 1e-9
+
+
+def test_concurrent_cross_merge_does_not_deadlock():
+    """a.merge(b) 与 b.merge(a) 在两个线程中并发执行"""
+    a, b = _stats(1), _stats(2)
+    threads = [threading.Thread(target=lambda: [a.merge(b) for _ in range(20)], daemon=True),
+               threading.Thread(target=lambda: [b.merge(a) for _ in range(20)], daemon=True)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    assert not any(thread.is_alive() for thread in threads)
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : test_multi_window_tracker.py
+@Time    : 2025/04/09
+@Author  : Bruce.Si
+@Desc    : 多窗口批量采样：模拟后端上的移动、缩放、最小化，以及中途出现和关闭的窗口
+"""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from common import multi_window_tracker
+from common.multi_window_tracker import MultiWindowTracker
+from common.window_backend import GEOMETRY_FIELDS, STATE_MINIMIZED, STATE_VISIBLE, SimulatedWindowBackend
+
+STEP_NS = 5_000_000  # 采样间隔5毫秒
+START_NS = 1_000_000_000
+
+
+class _Logger:
+    def __init__(self):
+        self.warnings = []
+
+    def info(self, *args, **kwargs):
+        pass
+
+    error = info
+
+    def warning(self, message, *args, **kwargs):
+        self.warnings.append(message)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """可控的perf_counter_ns，每次采样推进一个采样间隔"""
+    clock = SimpleNamespace(now=START_NS)
+    monkeypatch.setattr(multi_window_tracker, "time", SimpleNamespace(perf_counter_ns=lambda: clock.now))
+    return clock
+
+
+def _backend() -> SimulatedWindowBackend:
+    backend = SimulatedWindowBackend(event_driven=False)
+    backend.add_window(1, title="资源管理器", rect=(0, 0, 800, 600))
+    backend.add_window(2, title="记事本", rect=(800, 0, 1600, 600))
+    backend.add_window(3, title="终端", rect=(0, 600, 800, 1000))
+    backend.add_window(5, title="临时对话框", rect=(100, 100, 300, 200))
+    return backend
+
+
+def _run(tracker: MultiWindowTracker, clock, actions: dict, samples: int):
+    """按采样序号执行窗口操作后采样"""
+    tracker.reset()
+    for index in range(samples):
+        if index in actions:
+            actions[index]()
+        tracker.record_sample()
+        clock.now += STEP_NS
+
+
+def test_per_window_changes_and_appearing_windows(clock):
+    backend = _backend()
+    # 窗口4在开始时还不存在，按句柄跟踪
+    tracker = MultiWindowTracker(_Logger(), targets=[1, 2, 3, 4, 5], backend=backend)
+    actions = {
+        2: lambda: backend.update_window(1, rect=(50, 0, 850, 600)),      # 10ms: 窗口1开始移动
+        3: lambda: backend.update_window(1, rect=(100, 0, 900, 600)),     # 15ms: 移动结束
+        4: lambda: backend.update_window(2, rect=(800, 0, 1920, 1080)),   # 20ms: 窗口2缩放
+        5: lambda: backend.add_window(4, title="新窗口", rect=(0, 0, 400, 300)),  # 25ms: 窗口4出现
+        6: lambda: backend.remove_window(5),                              # 30ms: 窗口5关闭
+    }
+    _run(tracker, clock, actions, samples=40)
+
+    assert tracker.geometry.shape == (40, 5, len(GEOMETRY_FIELDS))
+    np.testing.assert_array_equal(tracker.valid[:, 3], np.arange(40) >= 5)
+    np.testing.assert_array_equal(tracker.valid[:, 4], np.arange(40) < 6)
+
+    result = tracker.analyze()
+    windows = {window['hwnd']: window for window in result['windows']}
+    assert (windows[1]['changes'], windows[1]['response_ms'], windows[1]['complete_ms']) == (2, 10.0, 15.0)
+    assert windows[1]['final']['left'] == 100
+    assert (windows[2]['changes'], windows[2]['response_ms']) == (1, 20.0)
+    assert windows[2]['final']['right'] == 1920
+    # 没有变化的窗口
+    assert (windows[3]['changes'], windows[3]['response_ms'], windows[3]['complete_ms']) == (0, None, None)
+    assert windows[3]['final']['top'] == 600
+    # 中途出现：出现本身算一次变化
+    assert (windows[4]['changes'], windows[4]['response_ms']) == (1, 25.0)
+    assert windows[4]['final']['state'] == STATE_VISIBLE
+    # 中途关闭：关闭算一次变化，最终几何为None
+    assert (windows[5]['changes'], windows[5]['complete_ms']) == (1, 30.0)
+    assert windows[5]['final'] is None
+
+    assert result['changed_windows'] == 4
+    assert result['response_ms'] == 10.0
+    assert result['complete_ms'] == 30.0
+    # 30ms后保持不变到195ms，超过稳定时长（100ms）；与在线判断一致
+    assert result['settled']
+    assert tracker.layout_settled() == START_NS + 6 * STEP_NS
+
+
+def test_start_time_and_unsettled_layout(clock):
+    """指定操作开始时刻；记录结束时仍在变化则未稳定"""
+    backend = _backend()
+    tracker = MultiWindowTracker(_Logger(), targets=["记事本", "^终端$"], backend=backend)
+    actions = {
+        8: lambda: backend.update_window(3, is_minimized=True),
+        10: lambda: backend.update_window(2, rect=(0, 0, 10, 10)),
+    }
+    _run(tracker, clock, actions, samples=12)
+
+    result = tracker.analyze(start_ns=START_NS + 5 * STEP_NS)
+
+    assert tracker.hwnds == [2, 3]
+    terminal = result['windows'][1]
+    assert terminal['title'] == "终端"
+    assert terminal['response_ms'] == 15.0
+    assert terminal['final']['state'] == STATE_MINIMIZED | STATE_VISIBLE
+    assert result['complete_ms'] == 25.0
+    assert not result['settled']
+    assert tracker.layout_settled() is None
+
+
+def test_no_changes_or_too_few_samples(clock):
+    tracker = MultiWindowTracker(_Logger(), backend=_backend())
+    _run(tracker, clock, {}, samples=1)
+    assert tracker.analyze()['windows'] == []
+
+    _run(tracker, clock, {}, samples=10)
+    result = tracker.analyze()
+    assert [window['changes'] for window in result['windows']] == [0, 0, 0, 0]
+    assert (result['changed_windows'], result['response_ms'], result['settled']) == (0, None, False)
+
+
+def test_unmatched_title_pattern_warns():
+    tracker = MultiWindowTracker(_Logger(), targets=["不存在的窗口"], backend=_backend())
+    assert tracker.resolve() == []
+    assert tracker.logger.warnings
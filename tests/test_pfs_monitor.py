@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : test_pfs_monitor.py
+@Time    : 2025/04/09
+@Author  : Bruce.Si
+@Desc    : 刷新率监控分析：模拟垂直同步注入已知丢帧，离线分析、分段分析和在线统计结果一致；帧记录保存后零拷贝重新分析
+"""
+
+import numpy as np
+
+from common.PFS_monitor import RefreshRateMonitor
+from common.vsync_source import SimulatedVsyncSource
+
+# 帧序号 -> 丢失帧数，共7帧；125Hz和50Hz的周期是整数纳秒，丢帧间隔正好是周期的整数倍
+DROPS = {300: 1, 700: 2, 1500: 3, 3000: 1}
+
+
+class _Logger:
+    def info(self, *args, **kwargs):
+        pass
+
+    warning = error = info
+
+
+def _monitor(**kwargs) -> RefreshRateMonitor:
+    source = SimulatedVsyncSource(**kwargs)
+    return RefreshRateMonitor(logger=_Logger(), show_plot=False, source=source)
+
+
+def test_injected_drops_counted_by_every_analysis():
+    """125Hz，三种分析都数出注入的7帧丢帧"""
+    monitor = _monitor(refresh_rate=125, drops=DROPS, frames=4000, seed=4)
+    monitor.capture()
+
+    # 不指定目标帧率时以平均帧率为目标，丢帧会拉长平均帧时间，这里按标称刷新率分析
+    drops = monitor.analyze_frame_drops(target_fps=125)
+    assert drops['total_drops'] == 7
+    assert drops['max_drops'] == 3
+    np.testing.assert_array_equal(drops['drop_points']['index'], [index - 1 for index in DROPS])
+    assert monitor.segment_analysis()['total_drops'] == 7
+    assert monitor.live_stats()['total_drops'] == 7
+
+
+def test_segments_follow_refresh_rate_switch():
+    """50Hz切换到125Hz：分成两段，每段按各自的目标帧时间计数丢帧"""
+    monitor = _monitor(refresh_rate=50, schedule=[(1000, 125)], drops={500: 1, 2000: 2}, frames=3000, seed=1)
+    monitor.capture()
+
+    result = monitor.segment_analysis()
+
+    segments = result['segments']
+    assert len(segments) == 2
+    assert round(segments[0]['refresh_rate']) == 50
+    assert round(segments[1]['refresh_rate']) == 125
+    assert [segment['total_drops'] for segment in segments] == [1, 2]
+
+
+def test_loaded_trace_analysed_without_materialising(tmp_path):
+    """保存后加载的帧记录分析结果不变，分析过程不还原绝对时间戳"""
+    monitor = _monitor(refresh_rate=125, drops=DROPS, frames=4000, seed=4)
+    timestamps = monitor.capture().copy()
+    expected = monitor.analyze_frame_drops(target_fps=125)
+    path = monitor.save_trace(str(tmp_path / "fps.ftrace"))
+
+    loaded = _monitor()
+    loaded.load_trace(path)
+
+    result = loaded.analyze_frame_drops(target_fps=125)
+    assert result['total_drops'] == expected['total_drops']
+    np.testing.assert_array_equal(result['drop_points'], expected['drop_points'])
+    assert loaded.segment_analysis()['total_drops'] == 7
+    assert loaded.frame_count == len(timestamps)
+    assert loaded._count == 0
+    # 第一次访问时间戳属性才还原
+    np.testing.assert_array_equal(loaded.timestamps, timestamps)
+
+
+def test_record_frames_directly_then_save(tmp_path):
+    """不调用capture/start_monitoring，逐帧调用record_frame后直接保存帧记录"""
+    monitor = _monitor(refresh_rate=125, frames=100)
+    while monitor.record_frame():
+        pass
+
+    assert monitor.start_wall_time() > 0
+    path = monitor.save_trace(str(tmp_path / "direct.ftrace"))
+
+    loaded = _monitor()
+    trace = loaded.load_trace(path)
+    assert len(trace) == 100
+    assert trace.start_wall_ns == monitor.start_wall_time()
+    np.testing.assert_array_equal(loaded.timestamps, monitor.timestamps)
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : test_power_consumption.py
+@Time    : 2025/04/09
+@Author  : Bruce.Si
+@Desc    : 能耗统计：梯形积分、阶段标记插值、空闲基线扣除，以及无标记、单个采样点等边界情况
+"""
+
+import numpy as np
+import pytest
+
+from common.power_consumption import PowerMonitor
+
+SECOND = 1_000_000_000
+START = 1_000 * SECOND  # 任意的perf_counter_ns起点
+
+
+class _Logger:
+    def __init__(self):
+        self.warnings = []
+
+    def info(self, *args, **kwargs):
+        pass
+
+    error = info
+
+    def warning(self, message, *args, **kwargs):
+        self.warnings.append(message)
+
+
+def _monitor(cpu, gpu=None) -> PowerMonitor:
+    """每秒一个采样点的功耗记录"""
+    monitor = PowerMonitor(_Logger(), providers=[])
+    for i, cpu_power in enumerate(cpu):
+        gpu_power = None if gpu is None else gpu[i]
+        monitor.power_data.append(START + i * SECOND, {'cpu_power': cpu_power, 'gpu_power': gpu_power})
+    return monitor
+
+
+def test_without_markers():
+    """没有阶段标记：只有总能耗，阶段和单次操作为空"""
+    monitor = _monitor([10.0] * 11, [5.0] * 11)
+
+    summary = monitor.get_energy_summary()
+
+    assert summary['duration'] == 10.0
+    assert summary['total']['energy_j'] == {'cpu_power': 100.0, 'gpu_power': 50.0}
+    assert summary['total']['avg_power_w'] == {'cpu_power': 10.0, 'gpu_power': 5.0}
+    assert summary['phases'] == []
+    assert summary['per_operation'] == {}
+
+
+def test_without_markers_and_baseline_dict():
+    monitor = _monitor([10.0] * 11, [5.0] * 11)
+
+    summary = monitor.get_energy_summary(idle_baseline={'cpu_power': 4.0})
+
+    # 未给出的列按0瓦
+    assert summary['baseline_w'] == {'cpu_power': 4.0, 'gpu_power': 0.0}
+    assert summary['total']['net_energy_j'] == {'cpu_power': 60.0, 'gpu_power': 50.0}
+    assert summary['phases'] == []
+
+
+@pytest.mark.parametrize('count', [0, 1])
+def test_too_few_samples(count):
+    """少于两个采样点无法积分"""
+    monitor = _monitor([10.0] * count)
+    monitor.mark('idle', START)
+
+    assert monitor.get_energy_summary(idle_baseline='idle') == {}
+
+
+def test_phases_and_idle_baseline():
+    """空闲2瓦4秒，之后10瓦；标记插值到采样点之间，扣除空闲基线"""
+    cpu = [2.0] * 5 + [10.0] * 6
+    # 显卡只在运行阶段有数据，空闲基线缺失
+    gpu = [np.nan] * 5 + [3.0] * 6
+    monitor = _monitor(cpu, gpu)
+    monitor.mark('idle', START)
+    monitor.mark('run', START + 4 * SECOND)
+
+    summary = monitor.get_energy_summary(idle_baseline='idle')
+
+    idle, run = summary['phases']
+    assert (idle['name'], idle['duration'], run['duration']) == ('idle', 4.0, 6.0)
+    assert idle['energy_j'] == {'cpu_power': 8.0, 'gpu_power': None}
+    # 4~5秒从2瓦线性升到10瓦：6焦耳，之后5秒10瓦：50焦耳
+    assert run['energy_j']['cpu_power'] == 56.0
+    assert summary['baseline_w'] == {'cpu_power': 2.0, 'gpu_power': None}
+    assert run['net_energy_j'] == {'cpu_power': 44.0, 'gpu_power': None}
+    assert summary['total']['net_energy_j']['cpu_power'] == 64.0 - 2.0 * 10
+
+
+def test_repeated_operations_and_unordered_markers():
+    """补记的标记按时间排序；同名阶段按单次操作求平均；落在采样范围外的标记截断"""
+    monitor = _monitor([1.0] * 3 + [5.0] * 3 + [1.0] * 2 + [7.0] * 3)
+    monitor.mark('open', START + 7 * SECOND)
+    monitor.mark('idle', START - 5 * SECOND)
+    monitor.mark('open', START + 3 * SECOND)
+    monitor.mark('idle', START + 5 * SECOND)
+
+    summary = monitor.get_energy_summary(idle_baseline='idle')
+
+    assert [phase['name'] for phase in summary['phases']] == ['idle', 'open', 'idle', 'open']
+    assert summary['phases'][0]['start'] == START
+    assert [phase['duration'] for phase in summary['phases']] == [3.0, 2.0, 2.0, 3.0]
+    operation = summary['per_operation']['open']
+    assert operation['count'] == 2
+    # 3~5秒: 5瓦2秒 = 10焦耳；7~10秒: 4 + 7 + 7 = 18焦耳
+    assert operation['energy_j']['cpu_power'] == pytest.approx((10.0 + 18.0) / 2)
+
+
+def test_missing_baseline_phase_warns():
+    monitor = _monitor([10.0] * 3)
+    monitor.mark('run', START)
+
+    summary = monitor.get_energy_summary(idle_baseline='idle')
+
+    assert 'baseline_w' not in summary
+    assert monitor.logger.warnings
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : test_precision_timer.py
+@Time    : 2025/04/09
+@Author  : Bruce.Si
+@Desc    : 高精度定时器：共享定时器下各调用方的统计互不混合，并发等待时汇总统计不丢计数
+"""
+
+import threading
+import time
+
+from common.cadence import AdaptiveCadence
+from common.precision_timer import PrecisionTimer, Ticker
+
+
+def _timer() -> PrecisionTimer:
+    # 指定余量，跳过校准
+    return PrecisionTimer(spin_margin_ns=100_000)
+
+
+def test_tickers_sharing_a_timer_report_their_own_waits():
+    timer = _timer()
+    fast, slow = Ticker(0.001, timer=timer), Ticker(0.002, timer=timer)
+    for _ in range(6):
+        fast.wait()
+    for _ in range(2):
+        slow.wait()
+
+    assert fast.stats()['waits'] == 6
+    assert slow.stats()['waits'] == 2
+    assert timer.stats()['waits'] == 8
+
+
+def test_concurrent_waits_counted_in_totals():
+    """多个线程同时使用同一个定时器，汇总的等待次数不丢失"""
+    timer = _timer()
+
+    def worker():
+        for _ in range(2000):
+            timer.sleep_until(0)  # 截止时刻已过，不等待
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert timer.stats()['waits'] == 8000
+
+
+def test_cadence_stats_exclude_other_users():
+    """轮询节奏的定时统计只包含自己的等待"""
+    timer = _timer()
+    cadence = AdaptiveCadence(idle_interval=0.002, burst_interval=0.001, spin_duration=0, timer=timer)
+    other = Ticker(0.001, timer=timer)
+    for _ in range(5):
+        other.wait()
+
+    cadence.fire()
+    for _ in range(3):
+        cadence.wait()
+
+    stats = cadence.stats()
+    assert sum(stats['polls'].values()) == 3
+    assert stats['timer']['waits'] == 3
+    assert timer.stats()['waits'] == 8
+
+
+def test_closed_timer_falls_back_to_builtin_sleep():
+    timer = _timer()
+    timer.close()
+
+    start = time.perf_counter_ns()
+    woke = timer.sleep(0.001)
+
+    assert woke - start >= 1_000_000
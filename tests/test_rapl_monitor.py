@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : test_rapl_monitor.py
+@Time    : 2025/04/09
+@Author  : Bruce.Si
+@Desc    : RAPL功耗采集：伪造的powercap目录、计数器回绕
+"""
+
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from common import rapl_monitor
+from common.rapl_monitor import RaplProvider
+
+
+def _write(path: str, value):
+    with open(path, 'w') as f:
+        f.write(f"{value}\n")
+
+
+def _domain(root: str, zone: str, name: str, energy_uj: int, max_range_uj: int = 1_000_000) -> str:
+    path = os.path.join(root, zone)
+    os.makedirs(path)
+    _write(os.path.join(path, "name"), name)
+    _write(os.path.join(path, "max_energy_range_uj"), max_range_uj)
+    _write(os.path.join(path, "energy_uj"), energy_uj)
+    return path
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """可控的perf_counter_ns，每次采样前手动推进"""
+    clock = SimpleNamespace(now=0)
+    monkeypatch.setattr(rapl_monitor, "time", SimpleNamespace(perf_counter_ns=lambda: clock.now))
+    return clock
+
+
+def test_power_and_counter_wrap(tmp_path, clock):
+    """package计数器在两次采样之间回绕，按max_energy_range_uj补回后得到正确的瓦数"""
+    root = str(tmp_path)
+    package = _domain(root, "intel-rapl:0", "package-0", energy_uj=900_000)
+    core = _domain(root, "intel-rapl:0:0", "core", energy_uj=100_000)
+    provider = RaplProvider(root=root)
+    provider.open()
+    assert provider.available
+    assert provider.columns == ["rapl_package-0_power", "rapl_core_power"]
+
+    # 0.5秒内package消耗 (1_000_000 - 900_000) + 150_000 微焦（回绕），core消耗 50_000 微焦
+    _write(os.path.join(package, "energy_uj"), 150_000)
+    _write(os.path.join(core, "energy_uj"), 150_000)
+    clock.now += 500_000_000
+    values = provider.sample(clock.now)
+    provider.close()
+
+    assert values["rapl_package-0_power"] == pytest.approx(0.5)
+    assert values["rapl_core_power"] == pytest.approx(0.1)
+
+
+def test_duplicate_domain_names_get_zone_suffix(tmp_path, clock):
+    """多路CPU的同名域按zone编号区分列名"""
+    root = str(tmp_path)
+    _domain(root, "intel-rapl:0", "package-0", energy_uj=0)
+    _domain(root, "intel-rapl:0:0", "core", energy_uj=0)
+    _domain(root, "intel-rapl:1:0", "core", energy_uj=0)
+    provider = RaplProvider(root=root)
+    provider.open()
+    provider.close()
+
+    assert provider.columns == ["rapl_package-0_power", "rapl_core-0-0_power", "rapl_core-1-0_power"]
+
+
+def test_missing_powercap_is_unavailable(tmp_path):
+    """没有RAPL域时不可用，采样返回空字典"""
+    provider = RaplProvider(root=str(tmp_path))
+    provider.open()
+
+    assert not provider.available
+    assert provider.sample(0) == {}
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : test_trajectory_analysis.py
+@Time    : 2025/04/09
+@Author  : Bruce.Si
+@Desc    : 窗口矩形轨迹分析：合成的缓动、过冲和停顿轨迹，回放驱动的轨迹记录
+"""
+
+import numpy as np
+import pytest
+
+from common import trajectory_analysis
+from common.trajectory_analysis import detect_animations, synthesize_trajectory
+from common.vsync_source import ReplayVsyncSource
+from common.window_backend import SimulatedWindowBackend
+from common.window_trajectory import WindowTrajectoryRecorder
+
+FROM_RECT = (0, 0, 800, 600)
+TO_RECT = (960, 0, 1920, 1080)
+
+
+class _Logger:
+    def info(self, *args, **kwargs):
+        pass
+
+    warning = error = info
+
+
+def test_smooth_eased_move():
+    """平滑的缓出动画：一次动画，没有过冲、停顿和不规则步进"""
+    timestamps, rects = synthesize_trajectory(FROM_RECT, TO_RECT, duration_ms=250, refresh_rate=144)
+
+    animations = detect_animations(timestamps, rects)
+
+    assert len(animations) == 1
+    animation = animations[0]
+    assert animation['from_rect'] == FROM_RECT
+    assert animation['to_rect'] == TO_RECT
+    # 缓出末尾的位移小于稳定容差，稳定时刻略早于名义时长
+    assert 200 <= animation['duration_ms'] <= 260
+    assert animation['overshoot_px'] == 0
+    assert animation['stalled_frames'] == 0
+    assert animation['irregular_steps'] == 0
+
+
+def test_overshoot_and_stalls():
+    """过冲5%并在动画中途注入两次停顿"""
+    timestamps, rects = synthesize_trajectory(FROM_RECT, TO_RECT, duration_ms=250, refresh_rate=144,
+                                              overshoot=0.05, stalls=(5, 12))
+
+    animation = detect_animations(timestamps, rects)[0]
+
+    assert animation['overshoot_pct'] == pytest.approx(5.0, abs=0.5)
+    assert animation['stalled_frames'] == 2
+    assert animation['irregular_steps'] >= 2
+
+
+def test_two_moves_split_by_settle_time():
+    """两次动画之间静止超过稳定时间时分为两次"""
+    first_ts, first = synthesize_trajectory(FROM_RECT, TO_RECT, hold_ms=300)
+    second_ts, second = synthesize_trajectory(TO_RECT, FROM_RECT, hold_ms=300,
+                                              start_ns=int(first_ts[-1]) + int(1e9 / 60))
+
+    animations = detect_animations(np.concatenate((first_ts, second_ts)), np.concatenate((first, second)))
+
+    assert [(a['from_rect'], a['to_rect']) for a in animations] == [(FROM_RECT, TO_RECT), (TO_RECT, FROM_RECT)]
+    assert animations[1]['start_ts'] - animations[0]['settle_ts'] > trajectory_analysis.SETTLE_TIME * 1_000_000
+
+
+def test_recorder_replays_synthetic_trajectory():
+    """轨迹记录：回放垂直同步时间戳，窗口矩形逐帧按合成轨迹变化"""
+    timestamps, rects = synthesize_trajectory(FROM_RECT, TO_RECT, duration_ms=250, refresh_rate=144)
+    frames = iter(rects.tolist())
+
+    class MovingBackend(SimulatedWindowBackend):
+        def rect(self, hwnd):
+            return tuple(next(frames))
+
+    recorder = WindowTrajectoryRecorder(logger=_Logger(), hwnds=[1], backend=MovingBackend(),
+                                        source=ReplayVsyncSource(timestamps))
+    recorder.capture()
+
+    assert np.array_equal(recorder.timestamps, timestamps)
+    assert np.array_equal(recorder.rects[:, 0], rects)
+    animations = recorder.analyze()[1]
+    assert len(animations) == 1
+    assert animations[0]['to_rect'] == TO_RECT
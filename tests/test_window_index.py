@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : test_window_index.py
+@Time    : 2025/04/09
+@Author  : Bruce.Si
+@Desc    : 顶层窗口增量索引：模拟后端的事件订阅和枚举比对，增量增删、条件查找、标题正则缓存上限
+"""
+
+import threading
+
+from common import window_index
+from common.window_backend import SimulatedWindowBackend
+from common.window_index import WindowIndex
+
+
+class _Logger:
+    def __init__(self):
+        self.errors = []
+
+    def info(self, *args, **kwargs):
+        pass
+
+    warning = info
+
+    def error(self, message, *args, **kwargs):
+        self.errors.append(message)
+
+
+def _backend(event_driven: bool = True) -> SimulatedWindowBackend:
+    backend = SimulatedWindowBackend(event_driven=event_driven)
+    backend.add_window(1, title="记事本 - a.txt", class_name="Notepad", pid=100)
+    backend.add_window(2, title="记事本 - b.txt", class_name="Notepad", pid=200)
+    backend.add_window(3, title="PowerPoint", class_name="PPTFrameClass", pid=300, visible=False)
+    return backend
+
+
+def test_incremental_updates_from_events():
+    backend = _backend()
+    with WindowIndex(_Logger(), backend=backend) as index:
+        assert index.event_driven
+        assert len(index) == 3
+        assert sorted(index.by_title("^记事本")) == [1, 2]
+
+        # 新窗口、标题变化和关闭都只更新对应的窗口，已缓存的标题正则随之增量维护
+        updates = index.updates
+        backend.add_window(4, title="记事本 - c.txt", class_name="Notepad", pid=100)
+        backend.update_window(2, title="已保存")
+        backend.remove_window(1)
+        assert index.updates == updates + 3
+
+        assert 1 not in index
+        assert sorted(index.by_title("^记事本")) == [4]
+        assert sorted(index.by_class("Notepad")) == [2, 4]
+        assert index.by_pid(100) == [4]
+        assert index.get(2).title == "已保存"
+
+
+def test_find_combines_conditions():
+    with WindowIndex(_Logger(), backend=_backend()) as index:
+        assert sorted(index.find(class_name="Notepad")) == [1, 2]
+        assert index.find(class_name="Notepad", pid=200) == [2]
+        assert index.find(title="b\\.txt$", pid=100) == []
+        # 不可见的窗口按visible过滤
+        assert index.find(class_name="PPTFrameClass", visible=True) == []
+        assert index.first(class_name="PPTFrameClass") == 3
+        assert index.wait_for(class_name="PPTFrameClass", timeout=0.01) is None
+        assert sorted(index.find(visible=True)) == [1, 2]
+
+
+def test_polling_refresh_and_wait_for():
+    """后端不支持订阅时由后台线程枚举比对，wait_for在索引变化时被唤醒"""
+    backend = _backend(event_driven=False)
+    with WindowIndex(_Logger(), backend=backend, refresh_interval=0.005) as index:
+        assert not index.event_driven
+        timer = threading.Timer(0.02, backend.add_window, args=(5,),
+                                kwargs={"title": "幻灯片放映", "class_name": "screenClass"})
+        timer.start()
+        assert index.wait_for(class_name="screenClass", timeout=5) == 5
+        timer.join()
+
+    # 直接比对：关闭和标题变化各算一次变化，没有变化时返回0
+    backend.remove_window(5)
+    backend.update_window(1, title="记事本 - a.txt *")
+    assert index.refresh() == 2
+    assert index.refresh() == 0
+
+
+def test_refresh_errors_go_to_logger():
+    backend = _backend(event_driven=False)
+    logger = _Logger()
+
+    def fail():
+        raise RuntimeError("枚举失败")
+
+    with WindowIndex(logger, backend=backend, refresh_interval=0.005) as index:
+        backend.toplevel_windows = fail
+        for _ in range(500):
+            if logger.errors:
+                break
+            index.wait_for(class_name="none", timeout=0.01)
+    assert "枚举失败" in logger.errors[0]
+
+
+def test_title_patterns_bounded(monkeypatch):
+    """标题正则缓存有上限，淘汰后再次使用时重新扫描，结果不变"""
+    monkeypatch.setattr(window_index, "MAX_TITLE_PATTERNS", 2)
+    with WindowIndex(_Logger(), backend=_backend()) as index:
+        assert index.by_title("a\\.txt") == [1]
+        assert index.by_title("b\\.txt") == [2]
+        assert index.by_title("Power") == [3]
+        assert list(index._patterns) == ["b\\.txt", "Power"]
+
+        # 再次使用的正则移到最近，淘汰的是最久未使用的
+        index.by_title("b\\.txt")
+        index.by_title("a\\.txt")
+        assert list(index._patterns) == ["b\\.txt", "a\\.txt"]
+        assert index.by_title("a\\.txt") == [1]
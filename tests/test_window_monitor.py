@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+@File    : test_window_monitor.py
+@Time    : 2025/04/09
+@Author  : Bruce.Si
+@Desc    : 窗口监听两级检查：模拟后端驱动矩形和标题变化，分别覆盖轮询模式和事件驱动模式
+"""
+
+import time
+
+import numpy as np
+
+from common import window_monitor
+from common.cadence import AdaptiveCadence
+from common.window_backend import SimulatedWindowBackend
+from common.window_monitor import FLAG_MAXIMIZED, FLAG_NEW_WINDOW, WindowMonitor
+
+TARGET = {"title": "编辑器", "size": (1920, 1080), "is_maximized": True}
+
+
+class _Logger:
+    def info(self, *args, **kwargs):
+        pass
+
+    warning = error = info
+
+
+def _monitor(event_driven: bool):
+    backend = SimulatedWindowBackend(event_driven=event_driven)
+    cadence = AdaptiveCadence(idle_interval=0.001, burst_interval=0.0005, spin_duration=0)
+    monitor = WindowMonitor(logger=_Logger(), target=TARGET, backend=backend, cadence=cadence)
+    return monitor, backend
+
+
+def _step(monitor: WindowMonitor):
+    """执行一次检查，返回检查前后的perf_counter_ns"""
+    before = time.perf_counter_ns()
+    monitor.monitor_window_changes()
+    return before, time.perf_counter_ns()
+
+
+def test_polling_mode_two_tier_check(monkeypatch):
+    # 完整检查周期由测试控制，不依赖两次检查之间的实际耗时
+    monkeypatch.setattr(window_monitor, "FULL_CHECK_INTERVAL", 10.0)
+    monitor, backend = _monitor(event_driven=False)
+    backend.add_window(1, title="桌面", rect=(0, 0, 800, 600))
+
+    before, after = _step(monitor)
+    history = monitor.window_history
+    assert len(history) == 1
+    assert before <= history['ts'][0] <= after
+    assert history['flags'][0] & FLAG_NEW_WINDOW
+
+    # 没有变化：只读矩形，不读取完整信息
+    describes = backend.calls['describe']
+    _step(monitor)
+    assert backend.calls['describe'] == describes
+    assert len(monitor.window_history) == 1
+
+    # 只有标题变化、矩形不变：廉价检查发现不了，到完整检查周期才记录
+    backend.update_window(1, title="编辑器")
+    _step(monitor)
+    assert len(monitor.window_history) == 1
+    monkeypatch.setattr(window_monitor, "FULL_CHECK_INTERVAL", 0.0)
+    before, after = _step(monitor)
+    assert len(monitor.window_history) == 2
+    assert before <= monitor.window_history['ts'][1] <= after
+    assert monitor.target_num == 0
+
+    # 只移动位置：触发完整检查，但位置不在比较字段内，不记录
+    monkeypatch.setattr(window_monitor, "FULL_CHECK_INTERVAL", 10.0)
+    describes = backend.calls['describe']
+    backend.update_window(1, rect=(100, 100, 900, 700))
+    _step(monitor)
+    assert backend.calls['describe'] == describes + 1
+    assert len(monitor.window_history) == 2
+
+    # 最大化：矩形变化立即完整检查并记录，此时与目标窗口一致
+    backend.update_window(1, rect=(0, 0, 1920, 1080), is_maximized=True)
+    _step(monitor)
+    history = monitor.window_history
+    assert len(history) == 3
+    assert history['flags'][2] & FLAG_MAXIMIZED
+    assert not history['flags'][2] & FLAG_NEW_WINDOW
+    assert monitor.target_num == 3
+    assert np.all(np.diff(history['ts']) > 0)
+
+
+def test_event_mode_checks_only_on_events():
+    monitor, backend = _monitor(event_driven=True)
+    backend.add_window(1, title="桌面", rect=(0, 0, 800, 600))
+    _step(monitor)
+    assert len(monitor.window_history) == 1
+
+    # 没有事件：等待超时后直接返回，不查询前台窗口
+    foregrounds = backend.calls['foreground']
+    _step(monitor)
+    assert backend.calls['foreground'] == foregrounds
+
+    # 标题变化产生事件，立即完整检查，不需要等完整检查周期
+    backend.update_window(1, title="编辑器")
+    before, after = _step(monitor)
+    assert len(monitor.window_history) == 2
+    assert before <= monitor.window_history['ts'][1] <= after
+
+    # 切换到新窗口，与目标一致，记录目标窗口序号
+    backend.add_window(2, title="编辑器", rect=(0, 0, 1920, 1080), is_maximized=True)
+    _step(monitor)
+    history = monitor.window_history
+    assert len(history) == 3
+    assert history['hwnd'][2] == 2
+    assert history['flags'][2] & FLAG_NEW_WINDOW
+    assert monitor.target_num == 3
+    assert monitor.results_analysis(0, -1) > 0